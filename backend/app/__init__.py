@@ -1,3 +1,4 @@
+import atexit
 import logging
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
@@ -6,16 +7,23 @@ from flask_marshmallow import Marshmallow
 from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
 from redis import Redis
+from .config import Config
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Initialize extensions (without app context)
 db = SQLAlchemy()
 migrate = Migrate()
 jwt = JWTManager()
-redis_client = Redis.from_url("redis://localhost:6379/0")
+# One pooled Redis client per process, configured from REDIS_URL
+redis_client = Redis.from_url(
+    Config.REDIS_URL,
+    max_connections=Config.REDIS_MAX_CONNECTIONS,
+    socket_timeout=Config.REDIS_SOCKET_TIMEOUT,
+    socket_connect_timeout=Config.REDIS_CONNECT_TIMEOUT,
+    health_check_interval=Config.REDIS_HEALTH_CHECK_INTERVAL,
+    retry_on_timeout=True,
+)
 ma = Marshmallow()
 
 def create_app():
@@ -23,7 +31,10 @@ def create_app():
     Application factory function.
     Creates and configures the Flask app instance.
     """
-    from .config import Config
+    # Queued, sampled logging for the whole process (see app.logging_config)
+    from .logging_config import configure_logging
+    configure_logging()
+
     app = Flask(__name__)
     app.config.from_object(Config)
 
@@ -36,10 +47,22 @@ def create_app():
     # Enable Cross-Origin Resource Sharing
     CORS(app)
 
+    # Per-request timing, query and Redis round-trip counts (see app.instrumentation)
+    from .instrumentation import init_instrumentation
+    init_instrumentation(redis_client)
+
+    # Stop the background event loop (and its pooled OpenRouter client) when the worker exits
+    from .async_runner import shutdown
+    atexit.register(shutdown)
+
     # Register blueprints
     from .routes import main
     app.register_blueprint(main)
 
+    # Register maintenance CLI commands
+    from .cli import register_cli
+    register_cli(app)
+
     logger.info("Flask app created and configured successfully.")
 
     return app
@@ -0,0 +1,82 @@
+import logging
+from . import db
+from .models import AnswerScore, BIG_FIVE_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+
+def trait_score_aggregates(candidate_ids):
+    """
+    Aggregates candidates' per-answer Big Five scores in a single grouped query.
+
+    Args:
+        candidate_ids (list): Candidate ids to aggregate.
+
+    Returns:
+        dict: candidate_id -> trait -> {"mean", "latest", "count"}
+    """
+    columns = [(trait, getattr(AnswerScore, column)) for trait, column in BIG_FIVE_COLUMNS.items()]
+    grouped = db.session.query(
+        AnswerScore.candidate_id.label("candidate_id"),
+        db.func.max(AnswerScore.id).label("latest_id"),
+        *(db.func.avg(column).label(f"mean_{i}") for i, (_, column) in enumerate(columns)),
+        *(db.func.count(column).label(f"count_{i}") for i, (_, column) in enumerate(columns)),
+    ).filter(AnswerScore.candidate_id.in_(candidate_ids)) \
+        .group_by(AnswerScore.candidate_id) \
+        .subquery()
+
+    # Join back on the newest row id to pick up the latest scores in the same statement
+    rows = db.session.query(grouped, *(column for _, column in columns)) \
+        .join(AnswerScore, AnswerScore.id == grouped.c.latest_id).all()
+
+    result = {}
+    for row in rows:
+        cells = result.setdefault(row.candidate_id, {})
+        latest = row[-len(columns):]
+        for i, (trait, _) in enumerate(columns):
+            count = getattr(row, f"count_{i}")
+            if not count:
+                continue
+            cells[trait] = {
+                "mean": round(float(getattr(row, f"mean_{i}")), 2),
+                "latest": latest[i],
+                "count": count,
+            }
+    return result
+
+
+def trait_percentiles(candidate_ids):
+    """
+    Ranks candidates' mean trait scores against the whole candidate population.
+
+    Args:
+        candidate_ids (list): Candidates to return ranks for.
+
+    Returns:
+        dict: candidate_id -> trait -> percentile rank (0-100).
+    """
+    traits = list(BIG_FIVE_COLUMNS)
+    means = db.session.query(
+        AnswerScore.candidate_id.label("candidate_id"),
+        *(db.func.avg(getattr(AnswerScore, column)).label(f"mean_{i}")
+          for i, column in enumerate(BIG_FIVE_COLUMNS.values())),
+    ).group_by(AnswerScore.candidate_id).subquery()
+
+    # Candidates without a score for a trait are ranked among themselves in a separate partition and dropped
+    ranked = db.session.query(
+        means.c.candidate_id,
+        *(getattr(means.c, f"mean_{i}") for i in range(len(traits))),
+        *(db.func.percent_rank().over(
+            partition_by=getattr(means.c, f"mean_{i}").is_(None),
+            order_by=getattr(means.c, f"mean_{i}"),
+        ).label(f"rank_{i}") for i in range(len(traits))),
+    ).subquery()
+
+    rows = db.session.query(ranked).filter(ranked.c.candidate_id.in_(candidate_ids)).all()
+
+    result = {}
+    for row in rows:
+        for i, trait in enumerate(traits):
+            if getattr(row, f"mean_{i}") is not None:
+                result.setdefault(row.candidate_id, {})[trait] = round(float(getattr(row, f"rank_{i}")) * 100, 1)
+    return result
@@ -0,0 +1,129 @@
+import asyncio
+import concurrent.futures
+import contextvars
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+# One background event loop per worker process; request threads submit coroutines to it
+_loop = None
+_thread = None
+_pid = None
+_lock = threading.Lock()
+
+
+def _run_loop(loop):
+    asyncio.set_event_loop(loop)
+    loop.run_forever()
+
+
+def get_loop():
+    """
+    Returns the background event loop for this process, starting it on first use.
+
+    The loop lives on a daemon thread so many LLM calls from different request
+    threads can be in flight at once. It is recreated after a fork.
+
+    Returns:
+        asyncio.AbstractEventLoop: The running background loop.
+    """
+    global _loop, _thread, _pid
+    if _loop is not None and _pid == os.getpid() and _thread.is_alive():
+        return _loop
+    with _lock:
+        if _loop is None or _pid != os.getpid() or not _thread.is_alive():
+            _loop = asyncio.new_event_loop()
+            _thread = threading.Thread(
+                target=_run_loop, args=(_loop,), name="async-runner", daemon=True
+            )
+            _thread.start()
+            _pid = os.getpid()
+            logger.info("Started background event loop in process %s", _pid)
+    return _loop
+
+
+def _with_caller_context(coro):
+    """
+    Wraps a coroutine so it runs with the calling thread's context variables (e.g. per-request stats).
+    """
+    context = contextvars.copy_context()
+
+    async def run():
+        for var, value in context.items():
+            var.set(value)
+        return await coro
+
+    return run()
+
+
+def run_async(coro, timeout=None):
+    """
+    Runs a coroutine on the background loop and blocks the calling thread for its result.
+
+    Args:
+        coro (coroutine): The coroutine to execute.
+        timeout (float, optional): Seconds to wait before cancelling it.
+
+    Returns:
+        Any: The coroutine's return value.
+    """
+    future = asyncio.run_coroutine_threadsafe(_with_caller_context(coro), get_loop())
+    try:
+        return future.result(timeout)
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        raise
+
+
+async def _anext(agen):
+    return await agen.__anext__()
+
+
+def iterate_async(agen):
+    """
+    Iterates an async generator from a synchronous thread, one item at a time.
+
+    Each item is produced on the background loop, so a streaming Flask
+    response can relay upstream chunks as soon as they arrive.
+
+    Args:
+        agen (async generator): The async generator to consume.
+
+    Yields:
+        Any: Items produced by the generator.
+    """
+    loop = get_loop()
+    try:
+        while True:
+            try:
+                yield asyncio.run_coroutine_threadsafe(_with_caller_context(_anext(agen)), loop).result()
+            except StopAsyncIteration:
+                break
+    finally:
+        # Closes the upstream stream early if the client disconnects
+        asyncio.run_coroutine_threadsafe(agen.aclose(), loop).result()
+
+
+def shutdown(timeout=5):
+    """
+    Closes the pooled OpenRouter client on the background loop and stops the loop.
+
+    Args:
+        timeout (float): Seconds to wait for the client to close.
+    """
+    global _loop, _thread
+    if _loop is None or _pid != os.getpid() or not _loop.is_running():
+        return
+    from .openrouter_client import aclose_client
+    try:
+        asyncio.run_coroutine_threadsafe(aclose_client(), _loop).result(timeout)
+    except Exception as e:
+        logger.warning("Failed to close OpenRouter client cleanly: %s", e)
+    _loop.call_soon_threadsafe(_loop.stop)
+    _thread.join(timeout)
+    _loop.close()
+    _loop, _thread = None, None
+    logger.info("Stopped background event loop.")
+
@@ -0,0 +1,146 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from redis.exceptions import RedisError
+from . import metrics, redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class LRUCache:
+    """
+    Thread-safe in-process LRU cache with an optional per-entry TTL.
+    """
+
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Returns the cached value, or None if missing or expired.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        """
+        Stores a value, evicting the least recently used entry when full.
+        """
+        ttl = ttl if ttl is not None else self.ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class TieredCache:
+    """
+    Two-tier JSON cache: an in-process LRU in front of Redis.
+
+    Redis failures are logged and treated as misses so a cache outage never
+    fails the request. Hits and misses are counted per tier in app.metrics
+    under 'cache_requests' with the cache's namespace as a label.
+    """
+
+    def __init__(self, namespace, ttl, maxsize=1024, local_ttl=None):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.local = LRUCache(maxsize=maxsize, ttl=local_ttl or ttl)
+
+    def _redis_key(self, key):
+        return f"cache:{self.namespace}:{key}"
+
+    def get(self, key):
+        """
+        Looks a key up in the local tier, then Redis.
+
+        Args:
+            key (str): Cache key (without namespace).
+
+        Returns:
+            Any: The cached value, or None on a miss.
+        """
+        value = self.local.get(key)
+        if value is not None:
+            metrics.inc("cache_requests", cache=self.namespace, result="hit_local")
+            return value
+
+        try:
+            raw = redis_client.get(self._redis_key(key))
+        except RedisError as e:
+            logger.warning("Redis unavailable for cache '%s': %s", self.namespace, e)
+            raw = None
+
+        if raw is None:
+            metrics.inc("cache_requests", cache=self.namespace, result="miss")
+            return None
+
+        value = json.loads(raw)
+        self.local.set(key, value)
+        metrics.inc("cache_requests", cache=self.namespace, result="hit_redis")
+        return value
+
+    def set(self, key, value):
+        """
+        Writes a JSON-serializable value to both tiers.
+        """
+        self.local.set(key, value)
+        try:
+            redis_client.set(self._redis_key(key), json.dumps(value), ex=self.ttl)
+        except RedisError as e:
+            logger.warning("Redis unavailable for cache '%s': %s", self.namespace, e)
+
+    def delete(self, key):
+        """
+        Removes a key from both tiers.
+        """
+        self.local.delete(key)
+        try:
+            redis_client.delete(self._redis_key(key))
+        except RedisError as e:
+            logger.warning("Redis unavailable for cache '%s': %s", self.namespace, e)
+
+    def stats(self):
+        """
+        Returns hit/miss counts and hit rate for this cache.
+
+        Returns:
+            dict: Counts per tier, total lookups, hit rate and local size.
+        """
+        hits_local = metrics.get("cache_requests", cache=self.namespace, result="hit_local")
+        hits_redis = metrics.get("cache_requests", cache=self.namespace, result="hit_redis")
+        misses = metrics.get("cache_requests", cache=self.namespace, result="miss")
+        total = hits_local + hits_redis + misses
+        return {
+            "hits_local": hits_local,
+            "hits_redis": hits_redis,
+            "misses": misses,
+            "hit_rate": round((hits_local + hits_redis) / total, 4) if total else None,
+            "local_size": len(self.local),
+        }
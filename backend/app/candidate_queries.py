@@ -0,0 +1,125 @@
+import base64
+import logging
+from datetime import datetime
+from . import db
+from .models import AnswerScore, BIG_FIVE_COLUMNS, Candidate
+
+logger = logging.getLogger(__name__)
+
+# Only the columns the listing returns; the rolling context summary etc. are never loaded
+LISTING_COLUMNS = (Candidate.id, Candidate.name, Candidate.session_id, Candidate.created_at)
+
+
+class InvalidCursor(ValueError):
+    """
+    Raised when a pagination cursor cannot be decoded.
+    """
+
+
+def encode_cursor(created_at, candidate_id):
+    """
+    Encodes the (created_at, id) position of the last row on a page as an opaque cursor.
+    """
+    raw = f"{created_at.isoformat()}|{candidate_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """
+    Decodes a cursor produced by encode_cursor.
+
+    Returns:
+        tuple: (created_at, candidate_id)
+
+    Raises:
+        InvalidCursor: If the cursor is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, candidate_id = raw.split("|")
+        return datetime.fromisoformat(created_at), int(candidate_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursor(str(e)) from e
+
+
+def _filtered(query, cursor=None, name_prefix=None):
+    if name_prefix:
+        # Escape LIKE wildcards so the prefix is matched literally (and the name index is usable)
+        escaped = name_prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        query = query.filter(Candidate.name.like(f"{escaped}%", escape="\\"))
+    if cursor:
+        created_at, candidate_id = decode_cursor(cursor)
+        query = query.filter(db.or_(
+            Candidate.created_at > created_at,
+            db.and_(Candidate.created_at == created_at, Candidate.id > candidate_id),
+        ))
+    return query.order_by(Candidate.created_at, Candidate.id)
+
+
+def _row_dict(row):
+    return {
+        "id": row.id,
+        "name": row.name,
+        "session_id": row.session_id,
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+    }
+
+
+def candidate_page(limit, cursor=None, name_prefix=None, include_scores=False):
+    """
+    Returns one keyset-paginated page of candidates ordered by (created_at, id).
+
+    Args:
+        limit (int): Page size.
+        cursor (str, optional): Cursor from the previous page.
+        name_prefix (str, optional): Only candidates whose name starts with this.
+        include_scores (bool): Attach per-trait mean scores, fetched in the same query.
+
+    Returns:
+        tuple: (list of candidate dicts, next cursor or None)
+    """
+    # Fetch one extra row to learn whether another page follows
+    page = _filtered(db.session.query(*LISTING_COLUMNS), cursor, name_prefix).limit(limit + 1)
+
+    if not include_scores:
+        rows = page.all()
+        candidates = [_row_dict(r) for r in rows[:limit]]
+    else:
+        page = page.subquery()
+        traits = list(BIG_FIVE_COLUMNS)
+        joined = db.session.query(
+            page, *(db.func.avg(getattr(AnswerScore, column)) for column in BIG_FIVE_COLUMNS.values())
+        ).outerjoin(AnswerScore, AnswerScore.candidate_id == page.c.id) \
+            .group_by(*page.c) \
+            .order_by(page.c.created_at, page.c.id)
+        rows = []
+        for row in joined.all():
+            means = row[-len(traits):]
+            rows.append({**_row_dict(row), "scores": {
+                trait: round(float(mean), 2) for trait, mean in zip(traits, means) if mean is not None
+            }})
+        candidates = rows[:limit]
+
+    next_cursor = None
+    if len(rows) > limit:
+        last = candidates[-1]
+        created_at = last["created_at"]
+        next_cursor = encode_cursor(datetime.fromisoformat(created_at), last["id"])
+    return candidates, next_cursor
+
+
+def iter_candidates(name_prefix=None, batch_size=1000):
+    """
+    Streams every matching candidate without loading the table into memory.
+
+    Args:
+        name_prefix (str, optional): Only candidates whose name starts with this.
+        batch_size (int): Rows fetched per round trip.
+
+    Yields:
+        dict: One candidate per row, in (created_at, id) order.
+    """
+    query = _filtered(db.session.query(*LISTING_COLUMNS), name_prefix=name_prefix) \
+        .execution_options(yield_per=batch_size)
+    for row in query:
+        yield _row_dict(row)
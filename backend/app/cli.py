@@ -0,0 +1,286 @@
+import asyncio
+import logging
+import multiprocessing
+import signal
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import click
+from . import db
+from .async_runner import run_async
+from .candidate_queries import iter_candidates
+from .config import Config
+from .export import EXPORT_FORMATS, export_stream
+from .feedback import generate_feedback
+from .models import AnswerScore, BIG_FIVE_COLUMNS, Candidate, MBTI_COLUMNS, Response, TraitScore
+from .personality_engine import analyze_responses, similarity_scope
+from .profiles import cached_profile, profile_means, refresh_profile_cache
+from .question_bank import SEED_FILE, TOPICS, generate_bank_questions, import_questions, load_seed_file
+from .reports import render_report, report_key, report_store
+from .scoring import store_trait_scores
+from .similarity import add_to_index, evaluate
+from .trait_stats import answer_trait_scores, rebuild_trait_statistics, record_trait_scores
+
+logger = logging.getLogger(__name__)
+
+
+def register_cli(app):
+    """
+    Registers the backend's maintenance commands on the Flask CLI.
+
+    Args:
+        app (Flask): The application instance.
+    """
+
+    @app.cli.command("rescore")
+    @click.option("--candidate-id", "candidate_ids", type=int, multiple=True,
+                  help="Candidate to re-score (repeatable). Defaults to all candidates.")
+    @click.option("--group-size", type=int, default=None,
+                  help="Answers analyzed per round; defaults to 4x ANALYSIS_BATCH_SIZE.")
+    def rescore(candidate_ids, group_size):
+        """Re-analyze stored responses in batches and replace candidates' trait scores."""
+        group_size = group_size or Config.ANALYSIS_BATCH_SIZE * 4
+        query = db.session.query(Response.candidate_id, db.func.count(Response.id)) \
+            .group_by(Response.candidate_id).order_by(Response.candidate_id)
+        if candidate_ids:
+            query = query.filter(Response.candidate_id.in_(candidate_ids))
+
+        # Pack answers from several candidates into the same batch round
+        group, group_answers, rescored = [], 0, 0
+        for cid, answer_count in query.all():
+            group.append(cid)
+            group_answers += answer_count
+            if group_answers >= group_size:
+                rescored += _rescore_candidates(group)
+                group, group_answers = [], 0
+        if group:
+            rescored += _rescore_candidates(group)
+        click.echo(f"Re-scored {rescored} candidate(s).")
+
+    @app.cli.command("rebuild-trait-stats")
+    def rebuild_trait_stats():
+        """Rebuild the materialized trait statistics from all answer_score rows."""
+        rows = rebuild_trait_statistics()
+        click.echo(f"Rebuilt {rows} trait statistic row(s).")
+
+    @app.cli.command("jobs-worker")
+    @click.option("--concurrency", type=int, default=None,
+                  help="Jobs processed at once; defaults to JOB_WORKER_CONCURRENCY.")
+    @click.option("--metrics-port", type=int, default=None,
+                  help="Serve Prometheus metrics (job timings, PDF render times, LLM calls) on this port.")
+    def jobs_worker(concurrency, metrics_port):
+        """Process background jobs (scoring, reports, webhooks) from the Redis queue."""
+        from .jobs import Worker
+        if metrics_port:
+            from .instrumentation import serve_metrics
+            serve_metrics(metrics_port)
+        worker = Worker(app, concurrency=concurrency)
+        signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+        try:
+            asyncio.run(worker.run())
+        except KeyboardInterrupt:
+            worker.stop()
+        click.echo("Job worker stopped.")
+
+    @app.cli.command("render-reports")
+    @click.option("--candidate-id", "candidate_ids", type=int, multiple=True,
+                  help="Candidate to render (repeatable). Defaults to every candidate with scores.")
+    @click.option("--name-prefix", default=None, help="Only candidates whose name starts with this.")
+    @click.option("--processes", type=int, default=None,
+                  help="Render processes; defaults to REPORT_RENDER_PROCESSES.")
+    @click.option("--force", is_flag=True, help="Re-render reports that are already stored.")
+    def render_reports(candidate_ids, name_prefix, processes, force):
+        """Render feedback PDFs for a cohort of candidates in parallel processes."""
+        if candidate_ids:
+            cohort = db.session.query(Candidate.id, Candidate.name) \
+                .filter(Candidate.id.in_(candidate_ids)).all()
+        else:
+            cohort = [(c["id"], c["name"]) for c in iter_candidates(name_prefix=name_prefix)]
+
+        # Feedback comes from the LLM (I/O bound, run concurrently); rendering is CPU bound
+        todo = []
+        for cid, name in cohort:
+            profile = cached_profile(cid)
+            scores = profile_means(profile)
+            key = report_key(cid, profile)
+            if scores and (force or not report_store.exists(key)):
+                todo.append((cid, name, scores, key))
+        feedbacks = run_async(_gather_feedback([(cid, scores) for cid, _, scores, _ in todo]))
+
+        rendered, failed = 0, 0
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=processes or Config.REPORT_RENDER_PROCESSES,
+                                 mp_context=context) as pool:
+            futures = {
+                pool.submit(render_report, report_store.root, key, name, feedback, scores): cid
+                for (cid, name, scores, key), feedback in zip(todo, feedbacks)
+                if not isinstance(feedback, Exception)
+            }
+            failed += sum(isinstance(feedback, Exception) for feedback in feedbacks)
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                    rendered += 1
+                except Exception as e:
+                    failed += 1
+                    logger.error("Rendering report for candidate_id %s failed: %s", futures[future], e)
+        click.echo(f"Rendered {rendered} report(s), {failed} failed, "
+                   f"{len(cohort) - len(todo)} skipped (up to date or no scores).")
+
+    @app.cli.command("export")
+    @click.option("--format", "fmt", type=click.Choice(list(EXPORT_FORMATS)), default="csv")
+    @click.option("--since", type=click.DateTime(formats=["%Y-%m-%d"]), default=None,
+                  help="First answer day to include (YYYY-MM-DD).")
+    @click.option("--until", type=click.DateTime(formats=["%Y-%m-%d"]), default=None,
+                  help="Last answer day to include (YYYY-MM-DD).")
+    @click.option("--output", type=click.File("wb"), default="-",
+                  help="File to write; defaults to stdout.")
+    @click.option("--batch-size", type=int, default=None,
+                  help="Rows per batch; defaults to EXPORT_BATCH_SIZE.")
+    def export(fmt, since, until, output, batch_size):
+        """Stream all answers with candidates and trait scores as CSV, Parquet or Arrow."""
+        for chunk in export_stream(
+            fmt,
+            since.date() if since else None,
+            until.date() if until else None,
+            batch_size or Config.EXPORT_BATCH_SIZE,
+        ):
+            output.write(chunk)
+
+    @app.cli.command("question-bank-import")
+    @click.argument("path", type=click.Path(exists=True, dir_okay=False), default=SEED_FILE)
+    def question_bank_import(path):
+        """Load tagged questions from a JSON file (defaults to the bundled seed bank)."""
+        added = import_questions(load_seed_file(path), source="seed")
+        click.echo(f"Added {added} question(s) to the bank.")
+
+    @app.cli.command("question-bank-generate")
+    @click.option("--topic", "topics", type=click.Choice(TOPICS), multiple=True,
+                  help="Topic to generate for (repeatable). Defaults to every topic.")
+    @click.option("--count", type=int, default=10, show_default=True, help="Questions requested per topic.")
+    def question_bank_generate(topics, count):
+        """Pre-generate tagged questions with the LLM and add the new ones to the bank."""
+        topics = topics or TOPICS
+        batches = run_async(asyncio.gather(*(generate_bank_questions(t, count) for t in topics)))
+        added = import_questions([q for batch in batches for q in batch], source="llm")
+        click.echo(f"Added {added} generated question(s) to the bank.")
+
+    @app.cli.command("similarity-index")
+    def similarity_index():
+        """Index every scored answer for near-duplicate reuse (e.g. after a prompt or model change)."""
+        indexed = sum(add_to_index(scope, answer, analysis) for scope, answer, analysis in _scored_answers())
+        click.echo(f"Indexed {indexed} answer(s).")
+
+    @app.cli.command("similarity-eval")
+    @click.option("--threshold", "thresholds", type=float, multiple=True,
+                  help="Similarity threshold to evaluate (repeatable); defaults to a sweep around SIMILARITY_THRESHOLD.")
+    @click.option("--tolerance", type=float, default=10.0, show_default=True,
+                  help="Mean absolute score error (points) for a reuse to count as correct.")
+    def similarity_eval(thresholds, tolerance):
+        """Replay stored answers through the near-duplicate index and report precision/recall per threshold."""
+        thresholds = sorted(thresholds or {0.6, 0.7, 0.8, Config.SIMILARITY_THRESHOLD, 0.9, 0.95})
+        report = evaluate(_scored_answers(), thresholds, tolerance)
+        click.echo("threshold  queries  reusable  hits  hit_rate  precision  recall  mean_error")
+        for t, r in report.items():
+            click.echo(
+                f"{t:>9.2f}  {r['queries']:>7}  {r['reusable']:>8}  {r['hits']:>4}  "
+                f"{_fmt(r['hit_rate']):>8}  {_fmt(r['precision']):>9}  {_fmt(r['recall']):>6}  "
+                f"{_fmt(r['mean_error']):>10}"
+            )
+
+
+def _fmt(value):
+    return "-" if value is None else f"{value:.3f}"
+
+
+def _scored_answers():
+    """
+    Yields (similarity scope, answer, analysis) for every fully scored answer, oldest first.
+    """
+    blocks = (("BigFive", BIG_FIVE_COLUMNS), ("MBTI", MBTI_COLUMNS))
+    columns = [getattr(AnswerScore, column) for _, mapping in blocks for column in mapping.values()]
+    query = db.session.query(Response.question, Response.answer, *columns) \
+        .join(AnswerScore, AnswerScore.response_id == Response.id) \
+        .order_by(Response.id).execution_options(yield_per=Config.EXPORT_BATCH_SIZE)
+    for question, answer, *scores in query:
+        if not question or not answer or None in scores:
+            continue
+        values = iter(scores)
+        analysis = {block: {trait: next(values) for trait in mapping} for block, mapping in blocks}
+        yield similarity_scope(question), answer, analysis
+
+
+async def _gather_feedback(items):
+    """
+    Generates feedback for (candidate_id, scores) pairs with bounded concurrency.
+
+    Returns:
+        list: Feedback text or the raised exception, in input order.
+    """
+    semaphore = asyncio.Semaphore(Config.JOB_WORKER_CONCURRENCY)
+
+    async def one(candidate_id, scores):
+        async with semaphore:
+            return await generate_feedback(candidate_id, scores)
+
+    return await asyncio.gather(*(one(cid, scores) for cid, scores in items), return_exceptions=True)
+
+
+def _rescore_candidates(candidate_ids):
+    """
+    Re-analyzes all responses of the given candidates and replaces their trait scores.
+
+    Every answer goes to the LLM (cached and near-duplicate analyses are
+    bypassed). Only answers whose new analysis succeeded have their scores
+    replaced; a failed analysis leaves the answer's existing scores in place.
+
+    Args:
+        candidate_ids (list): Candidate ids to re-score.
+
+    Returns:
+        int: Number of candidates with at least one answer re-scored.
+    """
+    responses = Response.query.filter(Response.candidate_id.in_(candidate_ids)).all()
+    if not responses:
+        return 0
+
+    analyses = run_async(analyze_responses(
+        {r.id: r.answer or "" for r in responses}, {r.id: r.question for r in responses}, reuse=False,
+    ))
+    rescored = [r for r in responses if "error" not in analyses[r.id]]
+    partial = {r.candidate_id for r in responses if "error" in analyses[r.id]}
+    complete = [cid for cid in candidate_ids if cid not in partial]
+
+    # Old rows to replace: everything of candidates whose answers all re-scored; for the others,
+    # the rows of the answers that did. Legacy trait_score rows (still written while
+    # STORE_TRAIT_SCORE_ROWS is on) have no response_id and are matched to their answer_score row
+    # by (candidate_id, created_at), which store_trait_scores shares.
+    old_answers = AnswerScore.query.filter(db.or_(
+        AnswerScore.candidate_id.in_(complete),
+        AnswerScore.response_id.in_([r.id for r in rescored]),
+    ))
+    stamps = [
+        (cid, created_at) for cid, created_at in
+        old_answers.with_entities(AnswerScore.candidate_id, AnswerScore.created_at)
+        if cid in partial
+    ]
+    old_scores = TraitScore.query.filter(db.or_(
+        TraitScore.candidate_id.in_(complete),
+        db.tuple_(TraitScore.candidate_id, TraitScore.created_at).in_(stamps) if stamps else db.false(),
+    ))
+    record_trait_scores(
+        answer_trait_scores(old_answers.with_entities(
+            AnswerScore.created_at, *(getattr(AnswerScore, column) for column in BIG_FIVE_COLUMNS.values())
+        ).all()),
+        sign=-1,
+    )
+    old_scores.delete(synchronize_session=False)
+    old_answers.delete(synchronize_session=False)
+    for response in rescored:
+        store_trait_scores(response.candidate_id, analyses[response.id], response_id=response.id)
+    db.session.commit()
+    refresh_profile_cache(candidate_ids)
+
+    logger.info(
+        "Re-scored candidates %s: %d responses, %d failed analyses (scores kept)",
+        candidate_ids, len(responses), len(responses) - len(rescored),
+    )
+    return len({r.candidate_id for r in rescored})
@@ -0,0 +1,196 @@
+import csv
+import io
+import logging
+from datetime import datetime, time, timedelta
+from . import db
+from .models import AnswerScore, BIG_FIVE_COLUMNS, Candidate, MBTI_COLUMNS, Response
+
+logger = logging.getLogger(__name__)
+
+# Parquet/Arrow output needs the optional 'pyarrow' package; CSV works without it
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    ARROW_AVAILABLE = True
+except ImportError:
+    ARROW_AVAILABLE = False
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
+
+SCORE_COLUMNS = list(BIG_FIVE_COLUMNS.values()) + list(MBTI_COLUMNS.values())
+
+# One row per answer: candidate, response and the answer's score vector
+EXPORT_COLUMNS = [
+    "candidate_id", "candidate_name", "session_id", "candidate_created_at",
+    "response_id", "question", "answer", "answered_at",
+] + SCORE_COLUMNS
+
+
+def iter_export_rows(since=None, until=None, batch_size=5000):
+    """
+    Streams every answer joined with its candidate and scores.
+
+    Rows are fetched through a server-side cursor `batch_size` at a time, so
+    memory stays flat regardless of the export size.
+
+    Args:
+        since (date, optional): First answer day to include.
+        until (date, optional): Last answer day to include.
+        batch_size (int): Rows fetched per round trip.
+
+    Yields:
+        tuple: Values in EXPORT_COLUMNS order.
+    """
+    query = db.session.query(
+        Candidate.id, Candidate.name, Candidate.session_id, Candidate.created_at,
+        Response.id, Response.question, Response.answer, Response.timestamp,
+        *[getattr(AnswerScore, column) for column in SCORE_COLUMNS],
+    ).join(Response, Response.candidate_id == Candidate.id) \
+        .outerjoin(AnswerScore, AnswerScore.response_id == Response.id)
+    if since:
+        query = query.filter(Response.timestamp >= datetime.combine(since, time.min))
+    if until:
+        query = query.filter(Response.timestamp < datetime.combine(until + timedelta(days=1), time.min))
+    query = query.order_by(Candidate.id, Response.id).execution_options(yield_per=batch_size)
+    for row in query:
+        yield tuple(row)
+
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def iter_csv(rows, batch_size=5000):
+    """
+    Encodes rows as CSV, yielding one UTF-8 chunk per batch (header first).
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for batch in _batches(rows, batch_size):
+        writer.writerows(
+            [v.isoformat() if isinstance(v, datetime) else v for v in row] for row in batch
+        )
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _DrainableSink:
+    """
+    Write-only file object whose written bytes are taken out as the stream is produced.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _arrow_schema():
+    return pa.schema(
+        [
+            ("candidate_id", pa.int64()),
+            ("candidate_name", pa.string()),
+            ("session_id", pa.string()),
+            ("candidate_created_at", pa.timestamp("us")),
+            ("response_id", pa.int64()),
+            ("question", pa.string()),
+            ("answer", pa.string()),
+            ("answered_at", pa.timestamp("us")),
+        ]
+        + [(column, pa.float64()) for column in SCORE_COLUMNS]
+    )
+
+
+def iter_columnar(rows, fmt="parquet", batch_size=5000):
+    """
+    Encodes rows as Parquet (one row group per batch) or an Arrow IPC stream.
+
+    Bytes are yielded as each batch is written; only the current batch is
+    held in memory.
+
+    Args:
+        rows (iterable): Tuples in EXPORT_COLUMNS order.
+        fmt (str): "parquet" or "arrow".
+        batch_size (int): Rows per row group / record batch.
+
+    Yields:
+        bytes: Encoded output.
+
+    Raises:
+        RuntimeError: If pyarrow is not installed.
+    """
+    if not ARROW_AVAILABLE:
+        raise RuntimeError("Parquet/Arrow export requires the 'pyarrow' package")
+
+    schema = _arrow_schema()
+    sink = _DrainableSink()
+    if fmt == "parquet":
+        writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema)
+    else:
+        writer = pa.ipc.new_stream(pa.PythonFile(sink, mode="w"), schema)
+
+    for batch in _batches(rows, batch_size):
+        columns = list(zip(*batch))
+        writer.write_batch(pa.record_batch(
+            [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+            schema=schema,
+        ))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def export_stream(fmt="csv", since=None, until=None, batch_size=5000):
+    """
+    Streams the answer-level export in the requested format.
+
+    Args:
+        fmt (str): One of EXPORT_FORMATS.
+        since (date, optional): First answer day to include.
+        until (date, optional): Last answer day to include.
+        batch_size (int): Rows fetched and encoded per batch.
+
+    Yields:
+        bytes: Encoded output chunks.
+    """
+    rows = iter_export_rows(since, until, batch_size)
+    if fmt == "csv":
+        yield from iter_csv(rows, batch_size)
+    else:
+        yield from iter_columnar(rows, fmt, batch_size)
+    logger.info("Finished %s export (since=%s, until=%s)", fmt, since, until)
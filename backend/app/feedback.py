@@ -0,0 +1,98 @@
+import asyncio
+import hashlib
+import json
+import logging
+from . import metrics
+from .cache import TieredCache
+from .config import Config
+from .model_router import complete_with_model, primary_model
+from .personality_engine import FEEDBACK_PROMPT_VERSION, build_feedback_prompt
+
+logger = logging.getLogger(__name__)
+
+# Generated feedback summaries, keyed on candidate + score profile + prompt version + model
+feedback_cache = TieredCache(
+    "feedback",
+    ttl=Config.FEEDBACK_CACHE_TTL,
+    maxsize=Config.FEEDBACK_CACHE_SIZE,
+)
+
+# Generations in flight on the background loop, so concurrent requests share one completion
+_inflight = {}
+
+
+def feedback_cache_key(candidate_id, scores, model=None):
+    """
+    Builds the cache key for a candidate's feedback on a given score profile.
+
+    Any change in the scores yields a new key, so feedback is regenerated
+    exactly when the profile it describes changes.
+
+    Args:
+        candidate_id (int): The candidate's id.
+        scores (dict): Trait name -> score, as passed to build_feedback_prompt.
+        model (str, optional): Model name; defaults to the feedback route's primary model.
+
+    Returns:
+        str: The cache key.
+    """
+    material = "\0".join([
+        FEEDBACK_PROMPT_VERSION,
+        model or primary_model("feedback"),
+        json.dumps(scores, sort_keys=True),
+    ])
+    return f"{candidate_id}:{hashlib.sha256(material.encode('utf-8')).hexdigest()}"
+
+
+def cached_feedback(candidate_id, scores):
+    """
+    Returns stored feedback for this score profile, or None.
+    """
+    return feedback_cache.get(feedback_cache_key(candidate_id, scores))
+
+
+def store_feedback(candidate_id, scores, feedback, model=None):
+    """
+    Stores generated feedback for this score profile (empty text is not stored).
+
+    Feedback is keyed on the model that wrote it, so a fallback model's text is
+    never served as the primary model's.
+    """
+    if feedback:
+        feedback_cache.set(feedback_cache_key(candidate_id, scores, model), feedback)
+
+
+async def _generate(candidate_id, scores):
+    metrics.inc("feedback_generations")
+    feedback, model = await complete_with_model("feedback", build_feedback_prompt(scores))
+    feedback = feedback.strip()
+    await asyncio.to_thread(store_feedback, candidate_id, scores, feedback, model)
+    logger.info("Generated feedback for candidate_id %s", candidate_id)
+    return feedback
+
+
+async def generate_feedback(candidate_id, scores):
+    """
+    Returns the candidate's feedback summary, calling the LLM only when needed.
+
+    Stored feedback for the same score profile is reused; concurrent callers
+    for the same key await a single completion. Failures are not stored.
+
+    Args:
+        candidate_id (int): The candidate's id.
+        scores (dict): Trait name -> score.
+
+    Returns:
+        str: The feedback summary.
+    """
+    key = feedback_cache_key(candidate_id, scores)
+    cached = await asyncio.to_thread(feedback_cache.get, key)
+    if cached is not None:
+        return cached
+
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_generate(candidate_id, scores))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    return await asyncio.shield(task)
@@ -0,0 +1,195 @@
+import contextvars
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from . import metrics
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+# Buckets for per-request counts (queries, Redis round trips)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+
+# Where each request's time went; LLM calls report into it from the background loop,
+# which runs coroutines with the caller's context (see async_runner)
+_current = contextvars.ContextVar("request_stats", default=None)
+
+
+class RequestStats:
+    """
+    Per-request breakdown: call counts and seconds spent in the database, Redis and the LLM.
+    """
+
+    __slots__ = ("started", "db_queries", "db_seconds", "redis_calls", "redis_seconds",
+                 "llm_calls", "llm_seconds", "llm_tokens")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_queries = self.redis_calls = self.llm_calls = self.llm_tokens = 0
+        self.db_seconds = self.redis_seconds = self.llm_seconds = 0.0
+
+    def breakdown(self):
+        return {
+            "db_queries": self.db_queries,
+            "db_ms": round(self.db_seconds * 1000, 1),
+            "redis_calls": self.redis_calls,
+            "redis_ms": round(self.redis_seconds * 1000, 1),
+            "llm_calls": self.llm_calls,
+            "llm_ms": round(self.llm_seconds * 1000, 1),
+            "llm_tokens": self.llm_tokens,
+        }
+
+
+def record_llm_call(model, seconds, usage=None):
+    """
+    Records one upstream completion: latency, and token usage when the response reported it.
+
+    Args:
+        model (str): Model that served the call.
+        seconds (float): Wall time of the call including retries.
+        usage (dict, optional): OpenAI-style usage with prompt_tokens/completion_tokens.
+    """
+    metrics.observe_histogram("openrouter_call_seconds", seconds, model=model)
+    tokens = 0
+    for kind in ("prompt", "completion"):
+        count = (usage or {}).get(f"{kind}_tokens") or 0
+        if count:
+            metrics.inc("openrouter_tokens", count, model=model, kind=kind)
+            tokens += count
+    stats = _current.get()
+    if stats is not None:
+        stats.llm_calls += 1
+        stats.llm_seconds += seconds
+        stats.llm_tokens += tokens
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    stats = _current.get()
+    if stats is not None:
+        stats.db_queries += 1
+        stats.db_seconds += elapsed
+
+
+def _instrumented_connection(base):
+    """
+    Subclasses a redis-py connection class to count round trips and time spent on the wire.
+
+    A pipeline is sent in one write, so it counts as one round trip.
+    """
+
+    class InstrumentedConnection(base):
+        def send_packed_command(self, command, check_health=True):
+            started = time.perf_counter()
+            try:
+                return super().send_packed_command(command, check_health)
+            finally:
+                stats = _current.get()
+                if stats is not None:
+                    stats.redis_calls += 1
+                    stats.redis_seconds += time.perf_counter() - started
+
+        def read_response(self, *args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return super().read_response(*args, **kwargs)
+            finally:
+                stats = _current.get()
+                if stats is not None:
+                    stats.redis_seconds += time.perf_counter() - started
+
+    InstrumentedConnection.__name__ = f"Instrumented{base.__name__}"
+    return InstrumentedConnection
+
+
+def init_instrumentation(redis_client):
+    """
+    Hooks SQLAlchemy engine events and the Redis connection pool into per-request stats.
+
+    Args:
+        redis_client (redis.Redis): The process's shared client.
+    """
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    pool = getattr(redis_client, "connection_pool", None)
+    if pool is not None and not pool.connection_class.__name__.startswith("Instrumented"):
+        pool.connection_class = _instrumented_connection(pool.connection_class)
+
+
+def start_request():
+    """
+    Starts collecting stats for the current request.
+    """
+    return _current.set(RequestStats())
+
+
+def finish_request(route, method, status, token=None):
+    """
+    Records a finished request's timing and breakdown, and logs it when slow.
+
+    Args:
+        route (str): URL rule (e.g. /profile/<session_id>), keeping label cardinality low.
+        method (str): HTTP method.
+        status (int): Response status code.
+        token (contextvars.Token, optional): From start_request, to reset the context.
+
+    Returns:
+        float or None: Request duration in seconds, or None if the request was not instrumented.
+    """
+    stats = _current.get()
+    if token is not None:
+        _current.reset(token)
+    if stats is None:
+        return None
+    elapsed = time.perf_counter() - stats.started
+    labels = {"route": route, "method": method}
+    metrics.inc("http_requests", status=str(status), **labels)
+    metrics.observe_histogram("http_request_seconds", elapsed, **labels)
+    metrics.observe_histogram("http_request_db_queries", stats.db_queries, buckets=COUNT_BUCKETS, **labels)
+    metrics.observe_histogram("http_request_redis_calls", stats.redis_calls, buckets=COUNT_BUCKETS, **labels)
+    for component in ("db", "redis", "llm"):
+        metrics.inc("http_request_component_seconds", getattr(stats, f"{component}_seconds"),
+                    component=component, **labels)
+
+    if Config.SLOW_REQUEST_SECONDS and elapsed >= Config.SLOW_REQUEST_SECONDS:
+        breakdown = stats.breakdown()
+        logger.warning(
+            "Slow request %s %s -> %s in %.0fms: %s",
+            method, route, status, elapsed * 1000,
+            " ".join(f"{key}={value}" for key, value in breakdown.items()),
+        )
+    return elapsed
+
+
+def serve_metrics(port, host="0.0.0.0"):
+    """
+    Serves /metrics from a background thread, for processes without the Flask app (e.g. the job worker).
+
+    Returns:
+        ThreadingHTTPServer: The running server.
+    """
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = metrics.render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    logger.info("Serving metrics on %s:%s", host, port)
+    return server
@@ -0,0 +1,554 @@
+import asyncio
+import json
+import logging
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+import httpx
+from redis.exceptions import RedisError
+from . import db, metrics, redis_client
+from .config import Config
+from .openrouter_client import aclose_client
+from .feedback import generate_feedback
+from .personality_engine import analyze_response
+from .models import AnswerScore, Candidate
+from .profiles import cached_profile, profile_means, refresh_profile_cache
+from .question_context import needs_summary, pending_overflow, store_summary, summarize_overflow
+from .reports import render_report, report_key, report_store
+from .scoring import store_trait_scores
+from .upstream import UpstreamUnavailable
+
+logger = logging.getLogger(__name__)
+
+# Redis keys: ready queue (list), jobs claimed by a worker (list), retry schedule
+# (sorted set by due time), per-job hashes and the lease a worker holds while running a job
+QUEUE_KEY = "jobs:queue"
+PROCESSING_KEY = "jobs:processing"
+DELAYED_KEY = "jobs:delayed"
+JOB_KEY = "job:{}"
+LEASE_KEY = "job:lease:{}"
+# Marks a report version as queued for rendering, holding the job id
+REPORT_PENDING_KEY = "report:pending:{}"
+REPORT_PENDING_TTL = 600
+# Marks a candidate's context summary as queued for updating
+CONTEXT_PENDING_KEY = "context:pending:{}"
+CONTEXT_PENDING_TTL = 600
+
+# Registered job handlers: type -> async callable(app, payload) -> JSON-serializable result
+HANDLERS = {}
+
+
+class JobError(Exception):
+    """
+    Raised by a handler when a job attempt failed and may be retried.
+    """
+
+
+def job_handler(job_type):
+    """
+    Decorator registering an async handler for a job type.
+    """
+    def decorator(fn):
+        HANDLERS[job_type] = fn
+        return fn
+    return decorator
+
+
+class InvalidWebhook(ValueError):
+    """
+    Raised when a webhook URL is not https or its host is not in JOB_WEBHOOK_ALLOWED_HOSTS.
+    """
+
+
+def validate_webhook_url(url):
+    """
+    Checks a caller-supplied webhook URL against the configured allowlist.
+
+    Job results are POSTed from inside the deployment, so an arbitrary URL
+    would let any caller reach internal hosts; only allowlisted hosts are
+    accepted.
+
+    Args:
+        url (str): The URL to check.
+
+    Returns:
+        str: The URL, unchanged.
+
+    Raises:
+        InvalidWebhook: If the scheme or host is not allowed.
+    """
+    try:
+        parts = urlsplit(str(url))
+        host = (parts.hostname or "").lower()
+    except ValueError:
+        raise InvalidWebhook("Malformed webhook_url")
+    schemes = {"https", "http"} if Config.JOB_WEBHOOK_ALLOW_HTTP else {"https"}
+    if parts.scheme not in schemes or not host or parts.username or parts.password:
+        raise InvalidWebhook("webhook_url must be an https URL without credentials")
+    for allowed in Config.JOB_WEBHOOK_ALLOWED_HOSTS:
+        if host == allowed or (allowed.startswith("*.") and host.endswith(allowed[1:])):
+            return url
+    raise InvalidWebhook("webhook_url host is not allowed")
+
+
+def enqueue(job_type, payload, webhook_url=None, job_id=None):
+    """
+    Creates a job record and pushes it onto the ready queue.
+
+    Args:
+        job_type (str): Registered handler name.
+        payload (dict): JSON-serializable handler input.
+        webhook_url (str, optional): URL that receives the job result when it finishes;
+            must pass validate_webhook_url.
+        job_id (str, optional): Id to use, when the caller has already published it
+            (see request_report); a new one is generated by default.
+
+    Returns:
+        str: The new job id.
+    """
+    job_id = job_id or str(uuid.uuid4())
+    now = time.time()
+    record = {
+        "id": job_id,
+        "type": job_type,
+        "status": "queued",
+        "payload": json.dumps(payload),
+        "attempts": 0,
+        "created_at": now,
+        "updated_at": now,
+    }
+    if webhook_url:
+        record["webhook_url"] = validate_webhook_url(webhook_url)
+
+    pipe = redis_client.pipeline()
+    pipe.hset(JOB_KEY.format(job_id), mapping=record)
+    pipe.lpush(QUEUE_KEY, job_id)
+    pipe.execute()
+    metrics.inc("jobs_enqueued", type=job_type)
+    logger.info("Enqueued %s job %s", job_type, job_id)
+    return job_id
+
+
+def get_job(job_id):
+    """
+    Returns the public view of a job, or None if it does not exist (or has expired).
+
+    Args:
+        job_id (str): The job id returned by enqueue.
+
+    Returns:
+        dict or None: id, type, status, attempts, timestamps and result/error when finished.
+    """
+    raw = redis_client.hgetall(JOB_KEY.format(job_id))
+    if not raw:
+        return None
+    record = {k.decode(): v.decode() for k, v in raw.items()}
+    job = {
+        "id": record["id"],
+        "type": record["type"],
+        "status": record["status"],
+        "attempts": int(record["attempts"]),
+        "created_at": float(record["created_at"]),
+        "updated_at": float(record["updated_at"]),
+    }
+    if "result" in record:
+        job["result"] = json.loads(record["result"])
+    if "error" in record:
+        job["error"] = record["error"]
+    return job
+
+
+def _update(job_id, **fields):
+    fields["updated_at"] = time.time()
+    redis_client.hset(JOB_KEY.format(job_id), mapping=fields)
+
+
+def _backoff(attempt):
+    """
+    Exponential backoff with full jitter for the given (1-based) attempt number.
+    """
+    ceiling = min(Config.JOB_BACKOFF_MAX, Config.JOB_BACKOFF_BASE * 2 ** (attempt - 1))
+    return random.uniform(ceiling / 2, ceiling)
+
+
+def _call_in_app(app, fn, *args):
+    with app.app_context():
+        return fn(*args)
+
+
+async def run_in_app(app, fn, *args):
+    """
+    Runs blocking (database) work in a worker thread inside its own app context.
+
+    Args:
+        app (Flask): The application instance.
+        fn (callable): Function to call.
+        *args: Positional arguments for fn.
+
+    Returns:
+        Any: fn's return value.
+    """
+    return await asyncio.to_thread(_call_in_app, app, fn, *args)
+
+
+class Worker:
+    """
+    Processes queued jobs with bounded concurrency, retries and backoff.
+
+    Runs `concurrency` consumer coroutines on one event loop plus a scheduler
+    that moves due retries from the delayed set back onto the ready queue.
+    Claimed jobs sit in a processing list under a lease the worker keeps
+    renewing; a reaper puts jobs whose lease lapsed (their worker crashed)
+    back on the ready queue, so delivery is at least once.
+    """
+
+    def __init__(self, app, concurrency=None, poll_timeout=1):
+        self.app = app
+        self.concurrency = concurrency or Config.JOB_WORKER_CONCURRENCY
+        self.poll_timeout = poll_timeout
+        self._stopping = False
+        self._webhook_client = None
+        # Jobs seen in the processing list without a lease on the last reaper pass
+        self._unleased = set()
+
+    def stop(self):
+        self._stopping = True
+
+    async def run(self):
+        """
+        Runs the worker until stop() is called.
+        """
+        loop = asyncio.get_running_loop()
+        # Blocking Redis pops and DB writes need their own threads; size the pool to the concurrency
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=self.concurrency * 2 + 2))
+        logger.info("Job worker started with concurrency %d", self.concurrency)
+        try:
+            await asyncio.gather(
+                self._schedule_retries(),
+                self._reap_abandoned(),
+                *(self._consume() for _ in range(self.concurrency)),
+            )
+        finally:
+            if self._webhook_client is not None:
+                await self._webhook_client.aclose()
+            await aclose_client()
+            logger.info("Job worker stopped.")
+
+    async def _schedule_retries(self):
+        while not self._stopping:
+            try:
+                due = await asyncio.to_thread(
+                    redis_client.zrangebyscore, DELAYED_KEY, 0, time.time(), 0, 100
+                )
+                for job_id in due:
+                    # zrem succeeds for exactly one worker, so each retry is requeued once
+                    if await asyncio.to_thread(redis_client.zrem, DELAYED_KEY, job_id):
+                        await asyncio.to_thread(redis_client.lpush, QUEUE_KEY, job_id)
+            except RedisError as e:
+                logger.warning("Retry scheduler could not reach Redis: %s", e)
+            await asyncio.sleep(0.5)
+
+    async def _reap_abandoned(self):
+        """
+        Requeues claimed jobs whose worker stopped renewing their lease.
+
+        A job is only requeued once it has been seen without a lease on two
+        consecutive passes, which covers the moment between a worker claiming
+        a job and taking its lease.
+        """
+        while not self._stopping:
+            try:
+                claimed = [i.decode() for i in await asyncio.to_thread(redis_client.lrange, PROCESSING_KEY, 0, -1)]
+                pipe = redis_client.pipeline(transaction=False)
+                for job_id in claimed:
+                    pipe.exists(LEASE_KEY.format(job_id))
+                held = await asyncio.to_thread(pipe.execute) if claimed else []
+                unleased = {job_id for job_id, leased in zip(claimed, held) if not leased}
+                for job_id in unleased & self._unleased:
+                    # lrem succeeds for exactly one reaper, so each abandoned job is requeued once
+                    if await asyncio.to_thread(redis_client.lrem, PROCESSING_KEY, 1, job_id):
+                        await asyncio.to_thread(redis_client.lpush, QUEUE_KEY, job_id)
+                        logger.warning("Requeued job %s abandoned by its worker", job_id)
+                        metrics.inc("jobs_requeued")
+                self._unleased = unleased
+            except RedisError as e:
+                logger.warning("Job reaper could not reach Redis: %s", e)
+            await asyncio.sleep(Config.JOB_LEASE_TIMEOUT / 2)
+
+    async def _consume(self):
+        while not self._stopping:
+            try:
+                item = await asyncio.to_thread(
+                    redis_client.blmove, QUEUE_KEY, PROCESSING_KEY, self.poll_timeout, "RIGHT", "LEFT"
+                )
+            except RedisError as e:
+                logger.warning("Job worker could not reach Redis: %s", e)
+                await asyncio.sleep(self.poll_timeout)
+                continue
+            if not item:
+                continue
+            job_id = item.decode()
+            try:
+                await self._process(job_id)
+            except Exception:
+                # The job stays in the processing list; once its lease lapses the reaper requeues it
+                logger.exception("Job %s could not be processed", job_id)
+                metrics.inc("jobs_errored")
+
+    async def _renew_lease(self, job_id):
+        key = LEASE_KEY.format(job_id)
+        while True:
+            try:
+                await asyncio.to_thread(redis_client.set, key, "1", px=int(Config.JOB_LEASE_TIMEOUT * 1000))
+            except RedisError as e:
+                logger.warning("Could not renew lease of job %s: %s", job_id, e)
+            await asyncio.sleep(Config.JOB_LEASE_TIMEOUT / 3)
+
+    async def _release(self, job_id):
+        pipe = redis_client.pipeline()
+        pipe.lrem(PROCESSING_KEY, 1, job_id)
+        pipe.delete(LEASE_KEY.format(job_id))
+        await asyncio.to_thread(pipe.execute)
+
+    async def _process(self, job_id):
+        lease = asyncio.create_task(self._renew_lease(job_id))
+        try:
+            await self._run_job(job_id)
+        finally:
+            lease.cancel()
+        await self._release(job_id)
+
+    async def _run_job(self, job_id):
+        raw = await asyncio.to_thread(redis_client.hgetall, JOB_KEY.format(job_id))
+        if not raw:
+            logger.warning("Job %s disappeared before processing", job_id)
+            return
+        record = {k.decode(): v.decode() for k, v in raw.items()}
+        job_type = record["type"]
+        attempts = int(record["attempts"]) + 1
+        await asyncio.to_thread(_update, job_id, status="running", attempts=attempts)
+        if attempts > Config.JOB_MAX_ATTEMPTS:
+            # Every earlier attempt was abandoned mid-run (e.g. the job crashes its worker)
+            logger.error("Job %s abandoned after %d attempt(s)", job_id, attempts - 1)
+            await self._finish(job_id, record, status="failed", error="Job was abandoned by its worker")
+            metrics.inc("jobs_failed", type=job_type)
+            return
+
+        handler = HANDLERS.get(job_type)
+        started = time.perf_counter()
+        try:
+            if handler is None:
+                raise ValueError(f"Unknown job type '{job_type}'")
+            result = await handler(self.app, json.loads(record["payload"]))
+        except Exception as e:
+            retryable = isinstance(e, (JobError, UpstreamUnavailable)) and attempts < Config.JOB_MAX_ATTEMPTS
+            if retryable:
+                delay = _backoff(attempts)
+                if isinstance(e, UpstreamUnavailable):
+                    # Don't come back before the circuit or rate budget can admit the call
+                    delay = max(delay, e.retry_after or 0)
+                logger.warning("Job %s attempt %d failed (%s); retrying in %.1fs", job_id, attempts, e, delay)
+                await asyncio.to_thread(_update, job_id, status="retrying", error=str(e))
+                await asyncio.to_thread(redis_client.zadd, DELAYED_KEY, {job_id: time.time() + delay})
+                metrics.inc("jobs_retried", type=job_type)
+                return
+            logger.error("Job %s failed after %d attempt(s): %s", job_id, attempts, e)
+            await self._finish(job_id, record, status="failed", error=str(e))
+            metrics.inc("jobs_failed", type=job_type)
+            return
+
+        metrics.observe("job_duration_seconds", time.perf_counter() - started, type=job_type)
+        await self._finish(job_id, record, status="done", result=result)
+        metrics.inc("jobs_completed", type=job_type)
+
+    async def _finish(self, job_id, record, status, result=None, error=None):
+        fields = {"status": status}
+        if result is not None:
+            fields["result"] = json.dumps(result)
+        if error is not None:
+            fields["error"] = error
+        await asyncio.to_thread(_update, job_id, **fields)
+        if error is None:
+            # Drop the error left behind by earlier failed attempts
+            await asyncio.to_thread(redis_client.hdel, JOB_KEY.format(job_id), "error")
+        await asyncio.to_thread(redis_client.expire, JOB_KEY.format(job_id), Config.JOB_RESULT_TTL)
+
+        webhook_url = record.get("webhook_url")
+        if webhook_url:
+            await self._notify(webhook_url, {
+                "job_id": job_id, "type": record["type"], "status": status,
+                "result": result, "error": error,
+            })
+
+    async def _notify(self, url, body):
+        # Re-checked on delivery: the allowlist may have been narrowed since the job was queued
+        try:
+            validate_webhook_url(url)
+        except InvalidWebhook as e:
+            logger.warning("Skipping webhook for job %s: %s", body["job_id"], e)
+            return
+        if self._webhook_client is None:
+            # Separate from the OpenRouter client: no API credentials, no redirects, no proxy settings from the environment
+            self._webhook_client = httpx.AsyncClient(
+                timeout=Config.JOB_WEBHOOK_TIMEOUT, follow_redirects=False, trust_env=False,
+            )
+        try:
+            response = await self._webhook_client.post(url, json=body)
+            response.raise_for_status()
+        except Exception as e:
+            logger.warning("Webhook delivery to %s failed: %s", url, e)
+
+
+@job_handler("analyze")
+async def analyze_job(app, payload):
+    """
+    Scores one stored response and writes its trait scores.
+
+    Payload: {"candidate_id": int, "response_id": int, "answer": str, "question": str (optional)}
+    """
+    analysis = await analyze_response(payload["answer"], payload.get("question"))
+    if "error" in analysis:
+        raise JobError(analysis["error"])
+
+    def save():
+        # A job requeued after its worker died may already have stored these scores
+        if db.session.query(AnswerScore.id).filter_by(response_id=payload["response_id"]).first() is None:
+            store_trait_scores(payload["candidate_id"], analysis, response_id=payload["response_id"])
+            db.session.commit()
+        profiles = refresh_profile_cache([payload["candidate_id"]])
+        precompute_reports(profiles)
+
+    await run_in_app(app, save)
+    return {"analysis": analysis}
+
+
+@job_handler("report")
+async def report_job(app, payload):
+    """
+    Generates a candidate's feedback and renders their PDF report for the current profile version.
+
+    Payload: {"candidate_id": int}
+    """
+    candidate_id = payload["candidate_id"]
+
+    def load():
+        candidate = db.session.get(Candidate, candidate_id)
+        return candidate.name if candidate else None, cached_profile(candidate_id)
+
+    name, profile = await run_in_app(app, load)
+    scores = profile_means(profile)
+    if not scores:
+        raise JobError(f"No scores for candidate_id {candidate_id}")
+    key = report_key(candidate_id, profile)
+    try:
+        feedback = await generate_feedback(candidate_id, scores)
+        if not report_store.exists(key):
+            started = time.perf_counter()
+            await asyncio.to_thread(render_report, report_store.root, key, name, feedback, scores)
+            metrics.observe("report_render_seconds", time.perf_counter() - started)
+    finally:
+        await asyncio.to_thread(redis_client.delete, REPORT_PENDING_KEY.format(key))
+    return {"report": key, "feedback_summary": feedback, "scores": scores}
+
+
+@job_handler("context_summary")
+async def context_summary_job(app, payload):
+    """
+    Folds a candidate's answers that left the question-context window into their running summary.
+
+    Payload: {"candidate_id": int}
+    """
+    candidate_id = payload["candidate_id"]
+    folded = 0
+    try:
+        while True:
+            summary, upto, overflow = await run_in_app(app, pending_overflow, candidate_id)
+            if not overflow:
+                break
+            try:
+                summary = await summarize_overflow(summary, [answer for _, answer in overflow])
+            except Exception as e:
+                raise JobError(f"Summary update failed: {e}")
+            if not await run_in_app(app, store_summary, candidate_id, upto, summary, overflow[-1][0]):
+                # Another fold got there first; start again from what it stored
+                continue
+            folded += len(overflow)
+    finally:
+        await asyncio.to_thread(redis_client.delete, CONTEXT_PENDING_KEY.format(candidate_id))
+    return {"folded": folded}
+
+
+def request_context_summary(candidate_id):
+    """
+    Queues a context summary update when answers have left the raw window, one pending job per candidate.
+
+    Called after a candidate's answers are stored, so /generate-question finds
+    the summary current and never waits on the LLM for it. Redis errors only
+    delay the update to the next answer.
+
+    Args:
+        candidate_id (int): The candidate's id.
+
+    Returns:
+        str or None: Id of the queued job, or None if nothing was queued.
+    """
+    if not needs_summary(candidate_id):
+        return None
+    try:
+        if not redis_client.set(CONTEXT_PENDING_KEY.format(candidate_id), "1", nx=True, ex=CONTEXT_PENDING_TTL):
+            return None
+        return enqueue("context_summary", {"candidate_id": candidate_id})
+    except RedisError as e:
+        logger.warning("Could not queue context summary for candidate_id %s: %s", candidate_id, e)
+        return None
+
+
+def request_report(candidate_id, profile):
+    """
+    Queues rendering of a candidate's report unless a job for the same version is already pending.
+
+    Args:
+        candidate_id (int): The candidate's id.
+        profile (dict): The candidate's current profile.
+
+    Returns:
+        str: Id of the queued (or already pending) job.
+    """
+    pending_key = REPORT_PENDING_KEY.format(report_key(candidate_id, profile))
+    job_id = str(uuid.uuid4())
+    # Claim the version before queueing, so concurrent requests never queue a second job for it
+    while not redis_client.set(pending_key, job_id, nx=True, ex=REPORT_PENDING_TTL):
+        pending = redis_client.get(pending_key)
+        if pending:
+            return pending.decode()
+        # The pending job finished between the two calls; try the claim again
+    try:
+        return enqueue("report", {"candidate_id": candidate_id}, job_id=job_id)
+    except Exception:
+        redis_client.delete(pending_key)
+        raise
+
+
+def precompute_reports(profiles):
+    """
+    Queues feedback and report generation for candidates whose assessment is complete.
+
+    A candidate counts as complete once they have Config.FEEDBACK_PRECOMPUTE_AFTER
+    scored answers; the hook is off when that setting is 0.
+
+    Args:
+        profiles (dict): candidate_id -> profile, as returned by refresh_profile_cache.
+
+    Returns:
+        list: Ids of the queued jobs.
+    """
+    threshold = Config.FEEDBACK_PRECOMPUTE_AFTER
+    if not threshold:
+        return []
+    return [
+        request_report(candidate_id, profile)
+        for candidate_id, profile in profiles.items()
+        if profile["answers"] >= threshold
+    ]
@@ -0,0 +1,149 @@
+import atexit
+import hashlib
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from . import metrics
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+# The running listener, so configure_logging is a no-op after the first call in a process
+_listener = None
+_listener_lock = threading.Lock()
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s %(message)s"
+
+
+class Redacted:
+    """
+    Log argument standing in for candidate text (answers, raw LLM replies).
+
+    Renders as its length and a short digest, so related log lines can still be
+    matched up, unless LOG_INCLUDE_CONTENT is on. Nothing is hashed unless the
+    record is actually written.
+    """
+
+    __slots__ = ("text",)
+
+    def __init__(self, text):
+        self.text = text
+
+    def __str__(self):
+        text = "" if self.text is None else str(self.text)
+        if Config.LOG_INCLUDE_CONTENT:
+            return text
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+        return f"<redacted {len(text)} chars sha256:{digest}>"
+
+    __repr__ = __str__
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Thins out repeated sub-WARNING records per (logger, message template).
+
+    In each window the first `burst` records of a template pass, then one in
+    `every`; dropped records are counted in the log_records_sampled metric.
+    Warnings and errors always pass.
+    """
+
+    def __init__(self, burst, window, every):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self.every = every
+        self._seen = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or self.burst <= 0:
+            return True
+        # The unformatted template, so every "Stored response for %s" counts as one event
+        key = (record.name, record.msg if isinstance(record.msg, str) else type(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            started, count = self._seen.get(key, (now, 0))
+            if now - started >= self.window:
+                started, count = now, 0
+            count += 1
+            self._seen[key] = (started, count)
+        if count <= self.burst or (self.every and (count - self.burst) % self.every == 0):
+            return True
+        metrics.inc("log_records_sampled", logger=record.name)
+        return False
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Queue handler that leaves formatting to the listener thread.
+
+    The stock QueueHandler formats every record on the calling thread so it
+    can be pickled; records here never leave the process, so the request only
+    pays for creating the record and putting it on the queue.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line, for log shippers.
+    """
+
+    def format(self, record):
+        entry = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "process": record.process,
+            "thread": record.threadName,
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging():
+    """
+    Routes every log record through a queue to a background writer thread.
+
+    Call once per process (create_app does); later calls are no-ops. Records are
+    sampled and enqueued on the calling thread, then formatted and written to
+    stderr by a QueueListener, so a request never waits on terminal or file I/O.
+
+    Returns:
+        logging.handlers.QueueListener: The running listener.
+    """
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            return _listener
+
+        output = logging.StreamHandler(sys.stderr)
+        output.setFormatter(JsonFormatter() if Config.LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT))
+
+        records = queue.SimpleQueue()
+        handler = DeferredQueueHandler(records)
+        handler.addFilter(SamplingFilter(Config.LOG_SAMPLE_BURST, Config.LOG_SAMPLE_WINDOW, Config.LOG_SAMPLE_EVERY))
+
+        root = logging.getLogger()
+        for existing in list(root.handlers):
+            root.removeHandler(existing)
+        root.addHandler(handler)
+        root.setLevel(Config.LOG_LEVEL)
+        # httpx logs every upstream request at INFO; our own client logs cover what matters
+        logging.getLogger("httpx").setLevel(logging.WARNING)
+
+        _listener = QueueListener(records, output, respect_handler_level=True)
+        _listener.start()
+        # Flush what is still queued when the process exits
+        atexit.register(_listener.stop)
+        logger.info("Logging configured (level=%s, format=%s).", Config.LOG_LEVEL, Config.LOG_FORMAT)
+        return _listener
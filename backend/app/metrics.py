@@ -0,0 +1,202 @@
+import logging
+import threading
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+# In-process counters and timing summaries, keyed by (name, sorted label pairs)
+_lock = threading.Lock()
+_counters = defaultdict(float)
+_summaries = defaultdict(lambda: {"count": 0, "sum": 0.0})
+_histograms = {}
+
+# Default histogram bucket upper bounds, in seconds
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 3, 5, 8, 13, 20, 30, 60)
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def inc(name, value=1, **labels):
+    """
+    Increments a counter.
+
+    Args:
+        name (str): Counter name.
+        value (float): Amount to add.
+        **labels: Label values distinguishing the series.
+    """
+    with _lock:
+        _counters[_key(name, labels)] += value
+
+
+def observe(name, value, **labels):
+    """
+    Records one observation (e.g. a latency in seconds) in a count/sum summary.
+
+    Args:
+        name (str): Summary name.
+        value (float): Observed value.
+        **labels: Label values distinguishing the series.
+    """
+    with _lock:
+        summary = _summaries[_key(name, labels)]
+        summary["count"] += 1
+        summary["sum"] += value
+
+
+def observe_histogram(name, value, buckets=LATENCY_BUCKETS, **labels):
+    """
+    Records one observation in a fixed-bucket histogram.
+
+    Args:
+        name (str): Histogram name.
+        value (float): Observed value.
+        buckets (tuple): Ascending bucket upper bounds; values above the last go to +Inf.
+        **labels: Label values distinguishing the series.
+    """
+    with _lock:
+        histogram = _histograms.get(_key(name, labels))
+        if histogram is None:
+            histogram = _histograms[_key(name, labels)] = {
+                "buckets": tuple(buckets), "counts": [0] * (len(buckets) + 1), "count": 0, "sum": 0.0,
+            }
+        index = next((i for i, bound in enumerate(histogram["buckets"]) if value <= bound),
+                     len(histogram["buckets"]))
+        histogram["counts"][index] += 1
+        histogram["count"] += 1
+        histogram["sum"] += value
+
+
+def quantile(name, q, **labels):
+    """
+    Estimates a quantile of a histogram by interpolating within its buckets.
+
+    Args:
+        name (str): Histogram name.
+        q (float): Quantile in (0, 1], e.g. 0.95.
+        **labels: Label values of the series.
+
+    Returns:
+        tuple: (estimate or None when the series is empty, observation count)
+    """
+    with _lock:
+        histogram = _histograms.get(_key(name, labels))
+        if histogram is None or not histogram["count"]:
+            return None, 0
+        bounds, counts, total = histogram["buckets"], list(histogram["counts"]), histogram["count"]
+    rank = q * total
+    cumulative = 0
+    for i, count in enumerate(counts):
+        if count and cumulative + count >= rank:
+            lower = bounds[i - 1] if i > 0 else 0.0
+            if i == len(bounds):
+                # Beyond the last bound there is nothing to interpolate against
+                return bounds[-1], total
+            return lower + (bounds[i] - lower) * (rank - cumulative) / count, total
+        cumulative += count
+    return bounds[-1], total
+
+
+def get(name, **labels):
+    """
+    Returns the current value of a counter.
+    """
+    with _lock:
+        return _counters.get(_key(name, labels), 0)
+
+
+def snapshot():
+    """
+    Returns a JSON-friendly copy of all counters and summaries.
+
+    Returns:
+        dict: {"counters": [...], "summaries": [...], "histograms": [...]} with one entry per series.
+    """
+    with _lock:
+        counters = [
+            {"name": name, "labels": dict(labels), "value": value}
+            for (name, labels), value in _counters.items()
+        ]
+        summaries = [
+            {"name": name, "labels": dict(labels), **summary}
+            for (name, labels), summary in _summaries.items()
+        ]
+        histograms = [
+            {
+                "name": name,
+                "labels": dict(labels),
+                "buckets": dict(zip([str(b) for b in h["buckets"]] + ["+Inf"], h["counts"])),
+                "count": h["count"],
+                "sum": h["sum"],
+            }
+            for (name, labels), h in _histograms.items()
+        ]
+    return {"counters": counters, "summaries": summaries, "histograms": histograms}
+
+
+def _prometheus_name(name):
+    return "".join(ch if ch.isalnum() or ch == "_" else "_" for ch in name)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _prometheus_labels(labels, extra=None):
+    pairs = list(labels) + list((extra or {}).items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{_prometheus_name(k)}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def render_prometheus(prefix="app_"):
+    """
+    Renders every counter, summary and histogram in the Prometheus text exposition format.
+
+    Values are per process; with several workers, scrape each one (or sum in Prometheus).
+
+    Args:
+        prefix (str): Prepended to every metric name.
+
+    Returns:
+        str: The exposition text.
+    """
+    def order(item):
+        (name, labels), _ = item
+        return name, str(labels)
+
+    with _lock:
+        counters = sorted(_counters.items(), key=order)
+        summaries = sorted(((k, dict(v)) for k, v in _summaries.items()), key=order)
+        histograms = sorted(((k, {**h, "counts": list(h["counts"])}) for k, h in _histograms.items()), key=order)
+
+    lines = []
+    typed = set()
+
+    def declare(name, kind):
+        if name not in typed:
+            typed.add(name)
+            lines.append(f"# TYPE {name} {kind}")
+
+    for (name, labels), value in counters:
+        metric = prefix + _prometheus_name(name) + "_total"
+        declare(metric, "counter")
+        lines.append(f"{metric}{_prometheus_labels(labels)} {value:g}")
+    for (name, labels), summary in summaries:
+        metric = prefix + _prometheus_name(name)
+        declare(metric, "summary")
+        lines.append(f"{metric}_count{_prometheus_labels(labels)} {summary['count']}")
+        lines.append(f"{metric}_sum{_prometheus_labels(labels)} {summary['sum']:g}")
+    for (name, labels), histogram in histograms:
+        metric = prefix + _prometheus_name(name)
+        declare(metric, "histogram")
+        cumulative = 0
+        for bound, count in zip(list(histogram["buckets"]) + ["+Inf"], histogram["counts"]):
+            cumulative += count
+            le = bound if bound == "+Inf" else f"{bound:g}"
+            lines.append(f"{metric}_bucket{_prometheus_labels(labels, {'le': le})} {cumulative}")
+        lines.append(f"{metric}_count{_prometheus_labels(labels)} {histogram['count']}")
+        lines.append(f"{metric}_sum{_prometheus_labels(labels)} {histogram['sum']:g}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,205 @@
+import asyncio
+import logging
+import time
+from . import metrics
+from .config import Config
+from .openrouter_client import query_openrouter, stream_openrouter
+
+logger = logging.getLogger(__name__)
+
+# Output tokens assumed per completion when estimating a call's cost
+EXPECTED_OUTPUT_TOKENS = 400
+
+
+def get_route(task):
+    """
+    Returns the routing settings for a task (see Config.MODEL_ROUTES).
+
+    Raises:
+        KeyError: If the task has no route.
+    """
+    route = Config.MODEL_ROUTES[task]
+    return {
+        "models": list(route["models"]),
+        "timeout": float(route.get("timeout", Config.OPENROUTER_TIMEOUT)),
+        "hedge": bool(route.get("hedge", False)),
+        "max_cost": route.get("max_cost"),
+    }
+
+
+def primary_model(task):
+    """
+    Returns the preferred model for a task (used e.g. in cache keys).
+    """
+    return get_route(task)["models"][0]
+
+
+def estimate_cost(model, prompt):
+    """
+    Estimates the USD cost of one call from the prompt size and Config.MODEL_PRICES.
+
+    Returns:
+        float or None: Estimated cost, or None for models without a price.
+    """
+    price = Config.MODEL_PRICES.get(model)
+    if price is None:
+        return None
+    tokens = (len(prompt) + 3) // 4 + EXPECTED_OUTPUT_TOKENS
+    return tokens / 1000 * price
+
+
+def candidate_models(task, prompt):
+    """
+    Returns the task's models in preference order, minus those over its cost budget.
+
+    If every model is over budget the cheapest one is kept, so a call is never refused.
+    """
+    route = get_route(task)
+    models = route["models"]
+    if route["max_cost"] is None:
+        return models
+    within = [m for m in models if (estimate_cost(m, prompt) or 0) <= route["max_cost"]]
+    if within:
+        return within
+    return [min(models, key=lambda m: estimate_cost(m, prompt) or 0)]
+
+
+def hedge_delay(task, model, timeout):
+    """
+    Returns how long to wait for a model before hedging with the next one.
+
+    Uses the model's observed p95 latency for the task once it has enough
+    samples, and half the attempt timeout before that.
+    """
+    p95, samples = metrics.quantile("model_latency_seconds", 0.95, task=task, model=model)
+    if p95 is None or samples < Config.MODEL_HEDGE_MIN_SAMPLES:
+        return timeout / 2
+    return min(p95, timeout)
+
+
+async def _attempt(task, model, prompt, timeout):
+    started = time.perf_counter()
+    try:
+        result = await asyncio.wait_for(query_openrouter(prompt, model=model), timeout)
+    except asyncio.CancelledError:
+        metrics.inc("model_requests", task=task, model=model, outcome="cancelled")
+        raise
+    except asyncio.TimeoutError:
+        metrics.inc("model_requests", task=task, model=model, outcome="timeout")
+        raise
+    except Exception:
+        metrics.inc("model_requests", task=task, model=model, outcome="error")
+        raise
+    metrics.observe_histogram("model_latency_seconds", time.perf_counter() - started, task=task, model=model)
+    metrics.inc("model_requests", task=task, model=model, outcome="ok")
+    cost = estimate_cost(model, prompt)
+    if cost is not None:
+        metrics.inc("model_estimated_cost_usd", cost, task=task, model=model)
+    return result
+
+
+async def complete(task, prompt):
+    """
+    Runs a completion for a task through its model route and returns only the text.
+
+    See complete_with_model; use that when the result is cached or indexed per model.
+    """
+    text, _ = await complete_with_model(task, prompt)
+    return text
+
+
+async def complete_with_model(task, prompt):
+    """
+    Runs a completion for a task through its model route.
+
+    The first model is tried with the route's timeout. On an error or
+    timeout the next model is tried (fallback). With hedging enabled, the
+    next model is also started once the running one passes its p95 latency,
+    and whichever answers first wins; the other request is cancelled.
+
+    Args:
+        task (str): Task name in Config.MODEL_ROUTES ("analysis", "question", ...).
+        prompt (str): The prompt.
+
+    Returns:
+        tuple: (completion text, model that produced it)
+
+    Raises:
+        Exception: The last model's error if every model failed.
+    """
+    route = get_route(task)
+    models = candidate_models(task, prompt)
+    pending = {}
+    errors = []
+    next_index = 0
+
+    def launch(reason=None):
+        nonlocal next_index
+        model = models[next_index]
+        next_index += 1
+        if reason:
+            logger.info("Routing %s to %s (%s)", task, model, reason)
+            metrics.inc("model_routing", task=task, model=model, reason=reason)
+        pending[asyncio.ensure_future(_attempt(task, model, prompt, route["timeout"]))] = model
+
+    launch()
+    try:
+        while pending:
+            wait = None
+            if route["hedge"] and len(pending) == 1 and next_index < len(models):
+                wait = hedge_delay(task, next(iter(pending.values())), route["timeout"])
+            done, _ = await asyncio.wait(pending, timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                launch("hedge")
+                continue
+            for task_ in done:
+                model = pending.pop(task_)
+                if task_.exception() is None:
+                    return task_.result(), model
+                errors.append(task_.exception())
+                logger.warning("Model %s failed for %s: %r", model, task, task_.exception())
+            if not pending and next_index < len(models):
+                launch("fallback")
+    finally:
+        for task_ in pending:
+            task_.cancel()
+    raise errors[-1]
+
+
+async def stream(task, prompt, served=None):
+    """
+    Streams a completion for a task, falling back to the next model if one fails before its first chunk.
+
+    Args:
+        task (str): Task name in Config.MODEL_ROUTES.
+        prompt (str): The prompt.
+        served (dict, optional): Receives the producing model under "model" once its first chunk arrives.
+
+    Yields:
+        str: Content deltas.
+    """
+    models = candidate_models(task, prompt)
+    for index, model in enumerate(models):
+        started = time.perf_counter()
+        produced = False
+        try:
+            async for delta in stream_openrouter(prompt, model=model):
+                if not produced:
+                    # Time to first token is what the client waits on
+                    metrics.observe_histogram(
+                        "model_first_token_seconds", time.perf_counter() - started, task=task, model=model
+                    )
+                    produced = True
+                    if served is not None:
+                        served["model"] = model
+                yield delta
+        except Exception as e:
+            metrics.inc("model_requests", task=task, model=model, outcome="error")
+            if produced or index == len(models) - 1:
+                raise
+            logger.warning("Model %s failed to stream %s, falling back: %r", model, task, e)
+            metrics.inc("model_routing", task=task, model=models[index + 1], reason="fallback")
+            continue
+        metrics.observe_histogram("model_stream_seconds", time.perf_counter() - started, task=task, model=model)
+        metrics.inc("model_requests", task=task, model=model, outcome="ok")
+        return
@@ -1,30 +1,38 @@
 from . import db
 from datetime import datetime
-import logging
-
-# Configure logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
 
 class Candidate(db.Model):
     """
     Represents a candidate taking the personality assessment.
     """
+    __table_args__ = (
+        db.Index('ix_candidate_created_at_id', 'created_at', 'id'),
+        db.Index('ix_candidate_name', 'name', postgresql_ops={'name': 'varchar_pattern_ops'}),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(120))
     session_id = db.Column(db.String(256), unique=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Rolling summary of answers that fell out of the question-generation window
+    context_summary = db.Column(db.Text)
+    summarized_upto = db.Column(db.Integer)  # id of the last Response folded into the summary
+    # Bumped in the same transaction as every score write; versions the cached profile and report
+    scores_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Running token estimate of all the candidate's answers, i.e. what a full-history question prompt would carry
+    history_tokens = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     responses = db.relationship('Response', backref='candidate', lazy=True)
 
     def __init__(self, name, session_id):
         self.name = name
         self.session_id = session_id
-        logger.info(f"Created Candidate: name={name}, session_id={session_id}")
 
 class Response(db.Model):
     """
     Stores a candidate's response to a question.
     """
+    __table_args__ = (db.Index('ix_response_candidate_id_timestamp', 'candidate_id', 'timestamp'),)
+
     id = db.Column(db.Integer, primary_key=True)
     candidate_id = db.Column(db.Integer, db.ForeignKey('candidate.id'), nullable=False)
     question = db.Column(db.Text)
@@ -35,19 +43,124 @@ class Response(db.Model):
         self.candidate_id = candidate_id
         self.question = question
         self.answer = answer
-        logger.info(f"Response created for candidate_id={candidate_id}")
 
 class TraitScore(db.Model):
     """
     Stores the calculated trait score for a candidate.
     """
+    __table_args__ = (db.Index('ix_trait_score_candidate_id_trait', 'candidate_id', 'trait'),)
+
     id = db.Column(db.Integer, primary_key=True)
     candidate_id = db.Column(db.Integer, db.ForeignKey('candidate.id'), nullable=False)
     trait = db.Column(db.String(50))
     score = db.Column(db.Float)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     def __init__(self, candidate_id, trait, score):
         self.candidate_id = candidate_id
         self.trait = trait
         self.score = score
-        logger.info(f"TraitScore created: candidate_id={candidate_id}, trait={trait}, score={score}")
+
+# Analysis keys -> AnswerScore columns (MBTI columns are prefixed; both models have an Extraversion)
+BIG_FIVE_COLUMNS = {
+    "Openness": "openness",
+    "Conscientiousness": "conscientiousness",
+    "Extraversion": "extraversion",
+    "Agreeableness": "agreeableness",
+    "Neuroticism": "neuroticism",
+}
+MBTI_COLUMNS = {
+    "Introversion": "mbti_introversion",
+    "Extraversion": "mbti_extraversion",
+    "Sensing": "mbti_sensing",
+    "Intuition": "mbti_intuition",
+    "Thinking": "mbti_thinking",
+    "Feeling": "mbti_feeling",
+    "Judging": "mbti_judging",
+    "Perceiving": "mbti_perceiving",
+}
+
+class AnswerScore(db.Model):
+    """
+    Compact score row: every Big Five and MBTI value produced for one answer.
+    """
+    __table_args__ = (db.Index('ix_answer_score_candidate_id_id', 'candidate_id', 'id'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    candidate_id = db.Column(db.Integer, db.ForeignKey('candidate.id'), nullable=False)
+    response_id = db.Column(db.Integer, db.ForeignKey('response.id'), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    openness = db.Column(db.Float)
+    conscientiousness = db.Column(db.Float)
+    extraversion = db.Column(db.Float)
+    agreeableness = db.Column(db.Float)
+    neuroticism = db.Column(db.Float)
+
+    mbti_introversion = db.Column(db.Float)
+    mbti_extraversion = db.Column(db.Float)
+    mbti_sensing = db.Column(db.Float)
+    mbti_intuition = db.Column(db.Float)
+    mbti_thinking = db.Column(db.Float)
+    mbti_feeling = db.Column(db.Float)
+    mbti_judging = db.Column(db.Float)
+    mbti_perceiving = db.Column(db.Float)
+
+    @classmethod
+    def from_analysis(cls, candidate_id, analysis, response_id=None):
+        """
+        Builds a row from an analyze_response result.
+        """
+        row = cls(candidate_id=candidate_id, response_id=response_id)
+        for block, columns in (("BigFive", BIG_FIVE_COLUMNS), ("MBTI", MBTI_COLUMNS)):
+            scores = analysis.get(block, {})
+            for trait, column in columns.items():
+                setattr(row, column, scores.get(trait))
+        return row
+
+    def to_analysis(self):
+        """
+        Returns the scores in the analyze_response {"BigFive": ..., "MBTI": ...} shape.
+        """
+        return {
+            "BigFive": {trait: getattr(self, column) for trait, column in BIG_FIVE_COLUMNS.items()},
+            "MBTI": {trait: getattr(self, column) for trait, column in MBTI_COLUMNS.items()},
+        }
+
+class TraitStat(db.Model):
+    """
+    Running aggregate of trait scores per trait and day, maintained as scores are inserted.
+    """
+    __table_args__ = (db.UniqueConstraint('trait', 'day'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    trait = db.Column(db.String(50), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Float, nullable=False, default=0.0)
+    total_sq = db.Column(db.Float, nullable=False, default=0.0)
+
+class TraitHistogramBin(db.Model):
+    """
+    Count of trait scores per trait, day and 10-point score bin (0-9).
+    """
+    __table_args__ = (db.UniqueConstraint('trait', 'day', 'bin'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    trait = db.Column(db.String(50), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    bin = db.Column(db.Integer, nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+class BankQuestion(db.Model):
+    """
+    Pre-generated behavioral question, tagged with how strongly it discriminates each trait.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    text = db.Column(db.Text, nullable=False, unique=True)
+    topic = db.Column(db.String(50))
+    # {"BigFive": {trait: weight 0-1}, "MBTI": {trait: weight 0-1}}
+    traits = db.Column(db.JSON, nullable=False)
+    source = db.Column(db.String(20), default="seed")  # 'seed' (curated file) or 'llm' (generated offline)
+    active = db.Column(db.Boolean, nullable=False, default=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
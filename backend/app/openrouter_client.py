@@ -1,23 +1,84 @@
+import asyncio
 import httpx
+import json
 import os
 import logging
+import time
+from . import upstream
+from .instrumentation import record_llm_call
+from .config import Config
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Get the OpenRouter API key from environment variables
 API_KEY = os.getenv("OPENROUTER_API_KEY")
 
-async def query_openrouter(prompt):
+# HTTP/2 needs the optional 'h2' package; fall back to HTTP/1.1 keep-alive without it
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# One pooled client per (process, event loop); httpx connections are bound to the loop they were opened on
+_client = None
+_client_key = None
+
+
+def _build_client():
     """
-    Sends a prompt to the OpenRouter API and returns the response content.
+    Builds a pooled AsyncClient from the configured limits and timeouts.
 
-    Args:
-        prompt (str): The user's prompt to send to the API.
+    Returns:
+        httpx.AsyncClient: Client with keep-alive pooling (and HTTP/2 when available).
+    """
+    limits = httpx.Limits(
+        max_connections=Config.OPENROUTER_MAX_CONNECTIONS,
+        max_keepalive_connections=Config.OPENROUTER_MAX_KEEPALIVE,
+        keepalive_expiry=Config.OPENROUTER_KEEPALIVE_EXPIRY,
+    )
+    timeout = httpx.Timeout(
+        Config.OPENROUTER_TIMEOUT,
+        connect=Config.OPENROUTER_CONNECT_TIMEOUT,
+    )
+    http2 = Config.OPENROUTER_HTTP2 and HTTP2_AVAILABLE
+    logger.info(
+        "Creating pooled OpenRouter client (http2=%s, max_connections=%s)",
+        http2, Config.OPENROUTER_MAX_CONNECTIONS,
+    )
+    return httpx.AsyncClient(limits=limits, timeout=timeout, http2=http2)
+
+
+def get_client():
+    """
+    Returns the shared AsyncClient for the current process and event loop,
+    creating it on first use.
 
     Returns:
-        str: The content of the response from the API.
+        httpx.AsyncClient: The long-lived pooled client.
+    """
+    global _client, _client_key
+    key = (os.getpid(), id(asyncio.get_running_loop()))
+    if _client is None or _client.is_closed or _client_key != key:
+        _client = _build_client()
+        _client_key = key
+    return _client
+
+
+async def aclose_client():
+    """
+    Closes the shared client and its pooled connections, if one is open.
+    """
+    global _client, _client_key
+    client, _client, _client_key = _client, None, None
+    if client is not None and not client.is_closed:
+        await client.aclose()
+        logger.info("Closed pooled OpenRouter client.")
+
+
+def _build_request(prompt, model=None, stream=False):
+    """
+    Builds the headers and JSON payload for a chat completion request.
     """
     headers = {
         "Authorization": f"Bearer {API_KEY}",
@@ -25,28 +86,119 @@ async def query_openrouter(prompt):
     }
 
     payload = {
-        "model": "openai/gpt-4",
+        "model": model or Config.OPENROUTER_MODEL,
         "messages": [
             {"role": "system", "content": "You are a psychologist analyzing personality."},
             {"role": "user", "content": prompt}
         ]
     }
+    if stream:
+        payload["stream"] = True
+    return headers, payload
+
+
+async def query_openrouter(prompt, model=None):
+    """
+    Sends a prompt to the OpenRouter API and returns the response content.
 
-    logger.info("Sending request to OpenRouter API with prompt: %s", prompt)
+    Args:
+        prompt (str): The user's prompt to send to the API.
+        model (str, optional): Model to use; defaults to Config.OPENROUTER_MODEL.
+
+    Returns:
+        str: The content of the response from the API.
+    """
+    headers, payload = _build_request(prompt, model)
+    logger.debug("Sending request to OpenRouter API (model=%s, prompt_chars=%d).", payload["model"], len(prompt))
+    started = time.perf_counter()
 
-    async with httpx.AsyncClient() as client:
+    # Concurrency slot, shared rate limit, circuit breaker and retries on 429/5xx
+    async with upstream.slot():
         try:
-            response = await client.post(
-                "https://openrouter.ai/api/v1/chat/completions",
+            response = await upstream.call(lambda: get_client().post(
+                Config.OPENROUTER_API_URL,
                 json=payload,
                 headers=headers
-            )
-            response.raise_for_status()
-            logger.info("Received successful response from OpenRouter API.")
-            return response.json()["choices"][0]["message"]["content"]
+            ))
         except httpx.HTTPStatusError as e:
             logger.error("HTTP error occurred: %s", e)
             raise
         except Exception as e:
             logger.error("An error occurred: %s", e)
             raise
+    logger.debug("Received successful response from OpenRouter API.")
+    body = response.json()
+    record_llm_call(payload["model"], time.perf_counter() - started, body.get("usage"))
+    return body["choices"][0]["message"]["content"]
+
+
+# Returned by parse_sse_line when the stream signals completion
+SSE_DONE = object()
+
+
+def parse_sse_line(line):
+    """
+    Extracts the content delta from one server-sent-event line of a streamed completion.
+
+    Args:
+        line (str): A raw line from the event stream.
+
+    Returns:
+        str or None: The text delta; None for comments, keep-alives and empty
+            deltas; SSE_DONE once the stream's [DONE] sentinel is reached.
+    """
+    if not line.startswith("data:"):
+        # Blank separators and ': OPENROUTER PROCESSING' style comments carry no content
+        return None
+    data = line[len("data:"):].strip()
+    if data == "[DONE]":
+        return SSE_DONE
+    chunk = json.loads(data)
+    if "error" in chunk:
+        raise RuntimeError(f"OpenRouter stream error: {chunk['error']}")
+    choices = chunk.get("choices") or [{}]
+    return choices[0].get("delta", {}).get("content") or None
+
+
+async def stream_openrouter(prompt, model=None):
+    """
+    Sends a prompt to the OpenRouter API in streaming mode and yields content as it arrives.
+
+    Args:
+        prompt (str): The user's prompt to send to the API.
+        model (str, optional): Model to use; defaults to Config.OPENROUTER_MODEL.
+
+    Yields:
+        str: Successive content deltas of the completion.
+    """
+    headers, payload = _build_request(prompt, model, stream=True)
+    logger.debug("Sending streaming request to OpenRouter API (model=%s, prompt_chars=%d).", payload["model"], len(prompt))
+    started = time.perf_counter()
+
+    async def send():
+        client = get_client()
+        request = client.build_request("POST", Config.OPENROUTER_API_URL, json=payload, headers=headers)
+        return await client.send(request, stream=True)
+
+    # The slot is held for the whole stream; retries only happen before the first byte
+    async with upstream.slot():
+        try:
+            response = await upstream.call(send)
+        except httpx.HTTPStatusError as e:
+            logger.error("HTTP error occurred: %s", e)
+            raise
+        except Exception as e:
+            logger.error("An error occurred: %s", e)
+            raise
+        try:
+            async for line in response.aiter_lines():
+                delta = parse_sse_line(line)
+                if delta is SSE_DONE:
+                    break
+                if delta:
+                    yield delta
+        finally:
+            await response.aclose()
+    # Streamed responses carry no usage block, so only the latency is recorded
+    record_llm_call(payload["model"], time.perf_counter() - started)
+    logger.debug("Completed streaming response from OpenRouter API.")
@@ -1,67 +1,499 @@
-import json
+import asyncio
+import hashlib
 import logging
-from .openrouter_client import query_openrouter
+import re
+from . import metrics
+from .cache import TieredCache
+from .config import Config
+from .logging_config import Redacted
+from .model_router import complete, complete_with_model, primary_model
+from .similarity import add_to_index, blend, find_similar
+from .structured_output import coerce_score, extract_json
+from .upstream import UpstreamUnavailable
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-async def analyze_response(answer):
+BIG_FIVE_TRAITS = ["Openness", "Conscientiousness", "Extraversion", "Agreeableness", "Neuroticism"]
+MBTI_TRAITS = [
+    "Introversion", "Extraversion", "Sensing", "Intuition",
+    "Thinking", "Feeling", "Judging", "Perceiving",
+]
+
+# JSON structure the LLM must return for a single answer
+SCORE_SCHEMA = (
+    "{\n"
+    "  \"BigFive\": {\n"
+    + ",\n".join(f"    \"{t}\": <number between 0-100>" for t in BIG_FIVE_TRAITS) + "\n"
+    "  },\n"
+    "  \"MBTI\": {\n"
+    + ",\n".join(f"    \"{t}\": <number between 0-100>" for t in MBTI_TRAITS) + "\n"
+    "  }\n"
+    "}"
+)
+
+PROMPT_RULES = (
+    "IMPORTANT RULES:\n"
+    "- Respond with only valid JSON, no explanations, no markdown, no comments.\n"
+    "- Ensure all keys are present, even if you estimate or default.\n"
+    "- If uncertain, provide your best estimate (no nulls)."
+)
+
+# Bump whenever the analysis prompt changes so cached results from the old prompt are not reused
+PROMPT_VERSION = "1"
+
+# Cache of successful analyses, keyed on normalized answer + prompt version + model
+analysis_cache = TieredCache(
+    "analysis",
+    ttl=Config.ANALYSIS_CACHE_TTL,
+    maxsize=Config.ANALYSIS_CACHE_SIZE,
+)
+
+
+def normalize_answer(answer):
+    """
+    Normalizes an answer for cache lookups (case and whitespace insensitive).
+    """
+    return " ".join(answer.split()).casefold()
+
+
+def analysis_cache_key(answer, model=None):
+    """
+    Builds the content-addressed cache key for an answer.
+
+    Args:
+        answer (str): The candidate's answer.
+        model (str, optional): Model used for analysis; defaults to the analysis route's primary model.
+
+    Returns:
+        str: Hex SHA-256 digest of prompt version, model and normalized answer.
+    """
+    material = "\0".join([PROMPT_VERSION, model or primary_model("analysis"), normalize_answer(answer)])
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def similarity_scope(question, model=None):
+    """
+    Returns the near-duplicate index partition for a question.
+
+    Reuse is limited to answers to the same question, analyzed with the same
+    prompt version and model (by default the analysis route's primary model).
+    """
+    material = "\0".join([PROMPT_VERSION, model or primary_model("analysis"), normalize_answer(question)])
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()[:16]
+
+
+async def reuse_similar(answer, question):
+    """
+    Returns a blend of prior analyses of near-identical answers to the same question, or None.
+    """
+    if not question or not Config.SIMILARITY_ENABLED:
+        return None
+    matches = await asyncio.to_thread(find_similar, similarity_scope(question), answer)
+    if not matches:
+        return None
+    logger.info("Reusing %d similar analyses (best similarity %.2f).", len(matches), matches[0][0])
+    return blend(matches)
+
+
+async def remember_analysis(answer, question, analysis, model):
+    """
+    Caches an LLM analysis and, when the question is known, adds it to the near-duplicate index.
+
+    Both are keyed on the model that produced the analysis, so a fallback
+    model's output is never served as the primary model's.
+    """
+    await asyncio.to_thread(analysis_cache.set, analysis_cache_key(answer, model), analysis)
+    if question and Config.SIMILARITY_ENABLED:
+        await asyncio.to_thread(add_to_index, similarity_scope(question, model), answer, analysis)
+
+
+def is_valid_analysis(analysis):
+    """
+    Checks that an analysis has every Big Five and MBTI score as a number.
+
+    Args:
+        analysis (Any): Parsed LLM output for one answer.
+
+    Returns:
+        bool: True if all expected keys are present with numeric values.
+    """
+    if not isinstance(analysis, dict):
+        return False
+    for block, traits in (("BigFive", BIG_FIVE_TRAITS), ("MBTI", MBTI_TRAITS)):
+        scores = analysis.get(block)
+        if not isinstance(scores, dict):
+            return False
+        for trait in traits:
+            value = scores.get(trait)
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                return False
+    return True
+
+
+# Opposite MBTI poles; a missing pole is filled as 100 minus its partner
+MBTI_PAIRS = [("Introversion", "Extraversion"), ("Sensing", "Intuition"),
+              ("Thinking", "Feeling"), ("Judging", "Perceiving")]
+BLOCK_ALIASES = {
+    "BigFive": ("bigfive", "big5", "ocean", "bigfivetraits"),
+    "MBTI": ("mbti", "myersbriggs", "mbtitraits"),
+}
+
+
+def _norm(key):
+    return re.sub(r"[^a-z0-9]", "", str(key).lower())
+
+
+def repair_analysis(data):
+    """
+    Coerces a parsed LLM reply into the strict analysis shape.
+
+    Block and trait names are matched case/punctuation-insensitively, scores
+    are coerced to numbers and clamped to 0-100, and up to
+    Config.ANALYSIS_MAX_FILLED_SCORES missing scores are filled (from the
+    opposite MBTI pole where possible, else 50).
+
+    Args:
+        data (Any): Parsed reply for one answer.
+
+    Returns:
+        tuple: (analysis dict or None if unusable, number of changes made)
+    """
+    if not isinstance(data, dict):
+        return None, 0
+    blocks = {_norm(k): v for k, v in data.items()}
+    analysis, changes, filled = {}, 0, 0
+    for block, traits in (("BigFive", BIG_FIVE_TRAITS), ("MBTI", MBTI_TRAITS)):
+        raw = next((blocks[a] for a in BLOCK_ALIASES[block] if isinstance(blocks.get(a), dict)), {})
+        by_trait = {_norm(k): v for k, v in raw.items()}
+        scores = {}
+        for trait in traits:
+            value = by_trait.get(_norm(trait))
+            score = coerce_score(value)
+            if score is None:
+                continue
+            clamped = min(100.0, max(0.0, score))
+            if type(value) not in (int, float) or clamped != value or trait not in raw:
+                changes += 1
+            scores[trait] = int(clamped) if clamped.is_integer() else round(clamped, 2)
+        analysis[block] = scores
+
+    mbti = analysis["MBTI"]
+    for a, b in MBTI_PAIRS:
+        for trait, partner in ((a, b), (b, a)):
+            if trait not in mbti and partner in mbti:
+                mbti[trait] = 100 - mbti[partner]
+                filled += 1
+    for block, traits in (("BigFive", BIG_FIVE_TRAITS), ("MBTI", MBTI_TRAITS)):
+        for trait in traits:
+            if trait not in analysis[block]:
+                analysis[block][trait] = 50
+                filled += 1
+    if filled > Config.ANALYSIS_MAX_FILLED_SCORES:
+        return None, changes + filled
+    analysis["BigFive"] = {t: analysis["BigFive"][t] for t in BIG_FIVE_TRAITS}
+    analysis["MBTI"] = {t: analysis["MBTI"][t] for t in MBTI_TRAITS}
+    return analysis, changes + filled
+
+
+def parse_analysis(text):
+    """
+    Parses and validates an analysis reply, repairing it where possible.
+
+    Returns:
+        tuple: (analysis or None, outcome) where outcome is "clean" (strict
+            JSON in the exact schema), "repaired" or "failed".
+    """
+    data, strict = extract_json(text, accept=lambda parsed: repair_analysis(parsed)[0] is not None)
+    analysis, changes = repair_analysis(data)
+    if analysis is None or not is_valid_analysis(analysis):
+        return None, "failed"
+    return analysis, "clean" if strict and not changes else "repaired"
+
+
+def build_repair_prompt(reply):
+    """
+    Builds the cheap follow-up prompt that turns an unusable reply into the score JSON.
+
+    Only the broken reply is sent (not the candidate's answer), so this costs
+    far less than re-running the analysis.
+    """
+    return (
+        "The text below was meant to be a JSON object with this structure:\n\n"
+        f"{SCORE_SCHEMA}\n\n"
+        "Rewrite it as exactly that JSON object, keeping every score it contains "
+        "and estimating any that are missing.\n"
+        f"{PROMPT_RULES}\n\n"
+        "Text:\n"
+        f"{reply[:4000]}"
+    )
+
+
+async def _reask(reply):
+    try:
+        return parse_analysis(await complete("repair", build_repair_prompt(reply)))[0]
+    except UpstreamUnavailable:
+        raise
+    except Exception as e:
+        logger.error("Repair re-ask failed: %s", e)
+        return None
+
+
+def parse_stats():
+    """
+    Returns analysis parse outcomes and rates for monitoring.
+
+    `malformed_rate` is the share of replies that were not strict JSON in the
+    schema; `failure_rate` is the share that stayed unusable after repair
+    and the re-ask (the only ones that cost the client a retry).
+    """
+    counts = {
+        outcome: int(sum(
+            metrics.get("analysis_parse", outcome=outcome, mode=mode) for mode in ("single", "batch")
+        ))
+        for outcome in ("clean", "repaired", "reasked", "failed")
+    }
+    total = sum(counts.values())
+    return {
+        **counts,
+        "malformed_rate": round((total - counts["clean"]) / total, 4) if total else None,
+        "failure_rate": round(counts["failed"] / total, 4) if total else None,
+    }
+
+
+async def analyze_response(answer, question=None, reuse=True):
     """
     Analyze a candidate's answer using an LLM to estimate Big Five and MBTI scores.
 
     Args:
         answer (str): The candidate's answer to analyze.
+        question (str, optional): The question answered; enables reuse of
+            analyses of near-identical answers to it instead of an LLM call.
+        reuse (bool): Serve cached and near-duplicate analyses; False always
+            asks the LLM (and refreshes the cache with its answer).
 
     Returns:
         dict: Parsed analysis with Big Five and MBTI scores, or error message.
+
+    Raises:
+        UpstreamUnavailable: If OpenRouter calls are being shed (open circuit,
+            exhausted rate budget); callers answer 503 or retry later.
     """
+    if reuse:
+        # Serve repeated answers from the cache; Redis lookups run off the event loop
+        cached = await asyncio.to_thread(analysis_cache.get, analysis_cache_key(answer))
+        if cached is not None:
+            logger.debug("Analysis cache hit.")
+            return cached
+        reused = await reuse_similar(answer, question)
+        if reused is not None:
+            return reused
+
     # Construct the prompt for the LLM
     prompt = (
         "You are an expert personality assessor based on the Big Five and MBTI models. "
         "Given the following candidate answer, analyze it carefully and provide ONLY a strict JSON object "
         "with the following structure:\n\n"
-        "{\n"
-        "  \"BigFive\": {\n"
-        "    \"Openness\": <number between 0-100>,\n"
-        "    \"Conscientiousness\": <number between 0-100>,\n"
-        "    \"Extraversion\": <number between 0-100>,\n"
-        "    \"Agreeableness\": <number between 0-100>,\n"
-        "    \"Neuroticism\": <number between 0-100>\n"
-        "  },\n"
-        "  \"MBTI\": {\n"
-        "    \"Introversion\": <number between 0-100>,\n"
-        "    \"Extraversion\": <number between 0-100>,\n"
-        "    \"Sensing\": <number between 0-100>,\n"
-        "    \"Intuition\": <number between 0-100>,\n"
-        "    \"Thinking\": <number between 0-100>,\n"
-        "    \"Feeling\": <number between 0-100>,\n"
-        "    \"Judging\": <number between 0-100>,\n"
-        "    \"Perceiving\": <number between 0-100>\n"
-        "  }\n"
-        "}\n\n"
-        "IMPORTANT RULES:\n"
-        "- Respond with only valid JSON, no explanations, no markdown, no comments.\n"
-        "- Ensure all keys are present, even if you estimate or default.\n"
-        "- If uncertain, provide your best estimate (no nulls).\n\n"
+        f"{SCORE_SCHEMA}\n\n"
+        f"{PROMPT_RULES}\n\n"
         "Candidate Answer:\n"
         f"\"{answer}\""
     )
 
-    logger.info("Sending prompt to LLM for analysis.")
+    logger.debug("Sending prompt to LLM for analysis.")
     try:
         # Query the LLM with the constructed prompt
-        result = await query_openrouter(prompt)
-        logger.debug("LLM Raw Response: %s", result)
+        result, model = await complete_with_model("analysis", prompt)
+        logger.debug("LLM Raw Response: %s", Redacted(result))
+    except UpstreamUnavailable:
+        # Shed load surfaces as a 503 with Retry-After (or a job retry), not as a failed analysis
+        raise
     except Exception as e:
         logger.error("Error querying LLM: %s", e)
         return {"error": "Failed to query LLM"}
 
-    # Attempt to parse the LLM's response as JSON
-    try:
-        analysis = json.loads(result)
-        logger.info("Successfully parsed LLM response.")
-        return analysis
-    except json.JSONDecodeError as e:
-        logger.error("Failed to parse LLM response: %s", e)
+    # Parse tolerantly; only a reply that cannot be repaired costs one cheap re-ask
+    analysis, outcome = parse_analysis(result)
+    if analysis is None:
+        logger.warning("LLM response could not be repaired; re-asking.")
+        analysis = await _reask(result)
+        outcome = "reasked" if analysis is not None else "failed"
+    metrics.inc("analysis_parse", outcome=outcome, mode="single")
+    if analysis is None:
+        logger.error("Failed to parse LLM response.")
         return {"error": "Failed to parse LLM response"}
+    logger.debug("Parsed LLM response (%s).", outcome)
+
+    await remember_analysis(answer, question, analysis, model)
+    return analysis
+
+
+def build_batch_prompt(items):
+    """
+    Packs several answers into one analysis prompt with a keyed JSON output.
+
+    Args:
+        items (list): (answer_id, answer) pairs; ids are echoed back as JSON keys.
+
+    Returns:
+        str: The batch prompt.
+    """
+    answers = "\n".join(f"[{answer_id}] \"{answer}\"" for answer_id, answer in items)
+    ids = ", ".join(f"\"{answer_id}\"" for answer_id, _ in items)
+    return (
+        "You are an expert personality assessor based on the Big Five and MBTI models. "
+        "Analyze each of the following candidate answers independently and provide ONLY a strict JSON object "
+        f"whose keys are the answer ids ({ids}) and whose values each have the following structure:\n\n"
+        f"{SCORE_SCHEMA}\n\n"
+        f"{PROMPT_RULES}\n"
+        "- Include every answer id exactly once.\n\n"
+        "Candidate Answers:\n"
+        f"{answers}"
+    )
+
+
+async def _analyze_chunk(items):
+    """
+    Analyzes one chunk of answers with a single LLM call.
+
+    Args:
+        items (list): (answer_id, answer) pairs.
+
+    Returns:
+        tuple: (answer_id -> validated analysis, only for answers that parsed
+            (or were repaired); model that answered, or None if the call failed)
+    """
+    try:
+        result, model = await complete_with_model("analysis", build_batch_prompt(items))
+    except UpstreamUnavailable:
+        raise
+    except Exception as e:
+        logger.error("Error querying LLM for batch: %s", e)
+        return {}, None
+
+    parsed, strict = extract_json(
+        result, accept=lambda parsed: isinstance(parsed, dict) and any(aid in parsed for aid, _ in items)
+    )
+    if not isinstance(parsed, dict):
+        logger.error("Batch LLM response is not a JSON object.")
+        parsed = {}
+    analyses = {}
+    for answer_id, _ in items:
+        analysis, changes = repair_analysis(parsed.get(answer_id))
+        if analysis is None:
+            # Left to the single-answer path, which counts its own outcome
+            continue
+        analyses[answer_id] = analysis
+        outcome = "clean" if strict and not changes else "repaired"
+        metrics.inc("analysis_parse", outcome=outcome, mode="batch")
+    return analyses, model
+
+
+async def analyze_responses(answers, questions=None, reuse=True):
+    """
+    Analyze many answers (for one or many candidates) with as few LLM calls as possible.
+
+    Cached answers are served from the analysis cache; the rest are packed
+    into prompts of up to Config.ANALYSIS_BATCH_SIZE answers, after answers
+    close enough to earlier ones (when their questions are given) reuse those
+    analyses. Answers missing or malformed in a batch reply fall back to
+    individual analyze_response calls.
+
+    Args:
+        answers (dict or list): Mapping of caller key -> answer text, or a list
+            of answers (keyed by position).
+        questions (dict or list, optional): The matching questions, in the same shape.
+        reuse (bool): Serve cached and near-duplicate analyses; False sends
+            every answer to the LLM (e.g. when re-scoring).
+
+    Returns:
+        dict or list: Analyses in the same shape as the input; each value is
+            what analyze_response would return for that answer.
+    """
+    keyed = dict(answers) if isinstance(answers, dict) else dict(enumerate(answers))
+    asked = {}
+    if questions is not None:
+        asked = dict(questions) if isinstance(questions, dict) else dict(enumerate(questions))
+    results = {}
+
+    # Serve cached and near-duplicate answers first
+    pending = []
+    for key, answer in keyed.items():
+        if not reuse:
+            pending.append(key)
+            continue
+        cached = await asyncio.to_thread(analysis_cache.get, analysis_cache_key(answer))
+        if cached is None:
+            cached = await reuse_similar(answer, asked.get(key))
+        if cached is not None:
+            results[key] = cached
+        else:
+            pending.append(key)
+
+    # Short positional ids keep the prompt small and independent of caller keys
+    id_to_key = {f"a{i}": key for i, key in enumerate(pending, start=1)}
+    items = [(answer_id, keyed[key]) for answer_id, key in id_to_key.items()]
+    size = max(1, Config.ANALYSIS_BATCH_SIZE)
+    chunks = [items[i:i + size] for i in range(0, len(items), size)]
+    logger.info(
+        "Batch analysis: %d answers, %d cached or reused, %d LLM call(s).",
+        len(keyed), len(keyed) - len(pending), len(chunks),
+    )
+
+    for chunk_result, model in await asyncio.gather(*(_analyze_chunk(chunk) for chunk in chunks)):
+        for answer_id, analysis in chunk_result.items():
+            key = id_to_key[answer_id]
+            results[key] = analysis
+            await remember_analysis(keyed[key], asked.get(key), analysis, model)
+
+    # Fall back to one call per answer for anything the batch reply didn't cover
+    failed = [key for key in pending if key not in results]
+    if failed:
+        logger.warning("Batch analysis fell back to single calls for %d answer(s).", len(failed))
+        singles = await asyncio.gather(*(analyze_response(keyed[key], asked.get(key), reuse=reuse) for key in failed))
+        results.update(zip(failed, singles))
+
+    if isinstance(answers, dict):
+        return results
+    return [results[i] for i in range(len(keyed))]
+
+
+def build_question_prompt(past_answers, summary=None):
+    """
+    Builds the prompt asking for the next behavioral question.
+
+    Args:
+        past_answers (list): The candidate's previous (recent) answers, oldest first.
+        summary (str, optional): Running summary of older answers.
+
+    Returns:
+        str: The question-generation prompt.
+    """
+    context = " | ".join(past_answers)
+    earlier = f"Summary of the candidate's earlier responses: '{summary}'. " if summary else ""
+    return (
+        f"{earlier}"
+        f"Given the candidate's past responses: '{context}', "
+        f"generate the next best behavioral question to assess traits like leadership, teamwork, or conflict resolution. "
+        f"Respond ONLY with the question text, no explanations."
+    )
+
+
+# Bump whenever the feedback prompt changes so stored feedback from the old prompt is regenerated
+FEEDBACK_PROMPT_VERSION = "1"
+
+
+def build_feedback_prompt(scores):
+    """
+    Builds the prompt for the candidate's natural-language feedback summary.
+
+    Args:
+        scores (dict): Trait name -> score.
+
+    Returns:
+        str: The feedback prompt.
+    """
+    return (
+        f"Based on the following personality trait scores: {scores}, "
+        f"generate a short natural-language summary of the candidate's strengths, weaknesses, and career fit. "
+        f"Respond in 4-5 sentences."
+    )
@@ -0,0 +1,213 @@
+import json
+import logging
+import numpy as np
+from redis.exceptions import RedisError
+from . import db, metrics, redis_client
+from .config import Config
+from .models import AnswerScore, BIG_FIVE_COLUMNS, Candidate, MBTI_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+# v2: entries versioned by candidate.scores_version (v1 used score row ids, which are not comparable)
+PROFILE_KEY = "profile:v2:{}"
+
+# Writes the profile only if it is newer than the cached one, so the cache never goes backwards
+SET_IF_NEWER = redis_client.register_script("""
+local current = redis.call('GET', KEYS[1])
+if current then
+    local cached_version = tonumber(cjson.decode(current)['version'])
+    if cached_version and cached_version >= tonumber(ARGV[1]) then
+        return 0
+    end
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+return 1
+""")
+
+# Matrix column order: Big Five first, then MBTI
+PROFILE_COLUMNS = [("BigFive", trait, column) for trait, column in BIG_FIVE_COLUMNS.items()] + \
+    [("MBTI", trait, column) for trait, column in MBTI_COLUMNS.items()]
+
+
+def score_matrix(candidate_id):
+    """
+    Loads a candidate's per-answer score vectors as an (answers x traits) matrix.
+
+    Rows come from answer_score, oldest first (scores stored before the
+    compact rows existed were backfilled into it by migration 8b3e1f7c2a95).
+
+    Args:
+        candidate_id (int): The candidate's id.
+
+    Returns:
+        tuple: (np.ndarray of shape (answers, len(PROFILE_COLUMNS)) with NaN
+            for missing values, the candidate's scores_version)
+    """
+    # Read before the scores: the rows loaded are then at least as new as the version they are cached under
+    version = db.session.query(Candidate.scores_version).filter(Candidate.id == candidate_id).scalar() or 0
+    columns = [getattr(AnswerScore, column) for _, _, column in PROFILE_COLUMNS]
+    rows = db.session.query(AnswerScore.id, *columns) \
+        .filter(AnswerScore.candidate_id == candidate_id) \
+        .order_by(AnswerScore.id).all()
+    if not rows:
+        return np.empty((0, len(PROFILE_COLUMNS))), version
+    return np.array([row[1:] for row in rows], dtype=float), version
+
+
+def compute_profile(matrix, decay=None):
+    """
+    Computes a candidate profile from the score matrix in one vectorized pass.
+
+    Answers are weighted by recency (weight decay**age, newest answer = 1).
+    Missing values are ignored per trait.
+
+    Args:
+        matrix (np.ndarray): (answers x traits) scores, NaN where missing.
+        decay (float, optional): Recency decay; defaults to Config.PROFILE_RECENCY_DECAY.
+
+    Returns:
+        dict: {"BigFive": {trait: stats}, "MBTI": {trait: stats}} where stats has
+            mean, variance, std, confidence (0-1) and count; traits without
+            any score are omitted.
+    """
+    decay = Config.PROFILE_RECENCY_DECAY if decay is None else decay
+    n = matrix.shape[0]
+    profile = {"BigFive": {}, "MBTI": {}}
+    if n == 0:
+        return profile
+
+    present = ~np.isnan(matrix)
+    values = np.where(present, matrix, 0.0)
+    weights = (decay ** np.arange(n - 1, -1, -1, dtype=float))[:, None] * present
+
+    weight_sum = weights.sum(axis=0)
+    counts = present.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = (weights * values).sum(axis=0) / weight_sum
+        variances = (weights * (values - means) ** 2).sum(axis=0) / weight_sum
+        # Kish effective sample size, so heavily decayed answers count for less
+        n_eff = weight_sum ** 2 / (weights ** 2).sum(axis=0)
+        std_err = np.sqrt(variances / n_eff)
+    # Confidence shrinks with dispersion and grows with (effective) answers
+    confidence = np.clip(1 - std_err / 25.0, 0, 1) * (n_eff / (n_eff + 1))
+
+    for i, (block, trait, _) in enumerate(PROFILE_COLUMNS):
+        if counts[i] == 0:
+            continue
+        profile[block][trait] = {
+            "mean": round(float(means[i]), 2),
+            "variance": round(float(variances[i]), 2),
+            "std": round(float(np.sqrt(variances[i])), 2),
+            "confidence": round(float(confidence[i]), 3),
+            "count": int(counts[i]),
+        }
+    return profile
+
+
+def candidate_profile(candidate_id):
+    """
+    Builds the aggregated profile for a candidate from their stored scores.
+
+    Args:
+        candidate_id (int): The candidate's id.
+
+    Returns:
+        dict: compute_profile output plus "version" and "answers".
+    """
+    matrix, version = score_matrix(candidate_id)
+    profile = compute_profile(matrix)
+    profile["version"] = version
+    profile["answers"] = int(matrix.shape[0])
+    return profile
+
+
+def profile_means(profile, block="BigFive"):
+    """
+    Flattens one block of a profile to {trait: mean}, e.g. for feedback prompts.
+    """
+    return {trait: stats["mean"] for trait, stats in profile[block].items()}
+
+
+def profile_entries(profile, include_mbti=False):
+    """
+    Flattens a profile to the list-of-traits shape served by /profile.
+    """
+    blocks = ["BigFive", "MBTI"] if include_mbti else ["BigFive"]
+    return [
+        {"model": block, "trait": trait, "score": stats["mean"], **stats}
+        for block in blocks
+        for trait, stats in profile[block].items()
+    ]
+
+
+def _store(candidate_id, profile):
+    key = PROFILE_KEY.format(candidate_id)
+    try:
+        SET_IF_NEWER(keys=[key], args=[profile["version"], json.dumps(profile), Config.PROFILE_CACHE_TTL])
+    except RedisError as e:
+        logger.warning("Could not cache profile for candidate_id %s: %s", candidate_id, e)
+        # Never leave an older profile behind; the next read recomputes it
+        try:
+            redis_client.delete(key)
+        except RedisError:
+            logger.error("Could not drop stale cached profile for candidate_id %s", candidate_id)
+
+
+def cached_profile(candidate_id):
+    """
+    Returns the candidate's profile, served by a single Redis GET when cached.
+
+    On a miss the profile is computed from the database and cached. Entries
+    carry the candidate's scores_version, which every score write bumps, and
+    are only ever replaced by newer versions.
+
+    Args:
+        candidate_id (int): The candidate's id.
+
+    Returns:
+        dict: The candidate_profile output.
+    """
+    try:
+        raw = redis_client.get(PROFILE_KEY.format(candidate_id))
+    except RedisError as e:
+        logger.warning("Profile cache unavailable: %s", e)
+        raw = None
+    if raw is not None:
+        metrics.inc("cache_requests", cache="profile", result="hit_redis")
+        return json.loads(raw)
+
+    metrics.inc("cache_requests", cache="profile", result="miss")
+    profile = candidate_profile(candidate_id)
+    _store(candidate_id, profile)
+    return profile
+
+
+def refresh_profile_cache(candidate_ids):
+    """
+    Write-through hook: recomputes and caches profiles after their scores were committed.
+
+    Args:
+        candidate_ids (iterable): Candidates whose scores changed.
+
+    Returns:
+        dict: candidate_id -> fresh profile.
+    """
+    profiles = {}
+    for candidate_id in set(candidate_ids):
+        profiles[candidate_id] = candidate_profile(candidate_id)
+        _store(candidate_id, profiles[candidate_id])
+    return profiles
+
+
+def profile_cache_stats():
+    """
+    Returns hit/miss counts and hit rate for the profile cache.
+    """
+    hits = metrics.get("cache_requests", cache="profile", result="hit_redis")
+    misses = metrics.get("cache_requests", cache="profile", result="miss")
+    total = hits + misses
+    return {
+        "hits_redis": hits,
+        "misses": misses,
+        "hit_rate": round(hits / total, 4) if total else None,
+    }
@@ -0,0 +1,214 @@
+import json
+import logging
+import os
+import threading
+import time
+import numpy as np
+from . import db, metrics
+from .cache import LRUCache
+from .config import Config
+from .model_router import complete
+from .models import BankQuestion, Response
+from .personality_engine import BIG_FIVE_TRAITS, MBTI_TRAITS, normalize_answer
+from .profiles import PROFILE_COLUMNS, cached_profile
+from .structured_output import extract_json
+
+logger = logging.getLogger(__name__)
+
+# Curated questions loaded by `flask question-bank-import` when no file is given
+SEED_FILE = os.path.join(os.path.dirname(__file__), "data", "question_bank.json")
+
+TOPICS = ["leadership", "teamwork", "conflict", "adaptability", "problem_solving", "pressure"]
+KNOWN_TRAITS = {"BigFive": set(BIG_FIVE_TRAITS), "MBTI": set(MBTI_TRAITS)}
+
+# In-process snapshot of the active bank, so selection needs no query for the questions themselves
+_snapshot = LRUCache(maxsize=1)
+_snapshot_lock = threading.Lock()
+
+
+def trait_vector(traits):
+    """
+    Converts a {"BigFive": {...}, "MBTI": {...}} weight mapping to a vector in PROFILE_COLUMNS order.
+    """
+    return np.array(
+        [float(traits.get(block, {}).get(trait, 0.0)) for block, trait, _ in PROFILE_COLUMNS]
+    )
+
+
+def load_bank():
+    """
+    Returns the active question bank, reloading it at most every QUESTION_BANK_REFRESH seconds.
+
+    Returns:
+        dict: {"ids", "texts", "topics": lists, "index": normalized text -> row,
+            "weights": (questions x PROFILE_COLUMNS) matrix}
+    """
+    bank = _snapshot.get("bank")
+    if bank is not None:
+        return bank
+    with _snapshot_lock:
+        bank = _snapshot.get("bank")
+        if bank is not None:
+            return bank
+        rows = BankQuestion.query.filter_by(active=True).order_by(BankQuestion.id).all()
+        bank = {
+            "ids": [row.id for row in rows],
+            "texts": [row.text for row in rows],
+            "topics": [row.topic for row in rows],
+            "index": {normalize_answer(row.text): i for i, row in enumerate(rows)},
+            "weights": np.array([trait_vector(row.traits) for row in rows]).reshape(len(rows), len(PROFILE_COLUMNS)),
+        }
+        _snapshot.set("bank", bank, ttl=Config.QUESTION_BANK_REFRESH)
+        logger.info("Loaded question bank with %d question(s).", len(rows))
+        return bank
+
+
+def invalidate_bank():
+    """
+    Drops this process's bank snapshot (other processes pick up changes within QUESTION_BANK_REFRESH).
+    """
+    _snapshot.clear()
+
+
+def uncertainty(profile):
+    """
+    Returns 1 - confidence per PROFILE_COLUMNS trait; traits without any score are fully uncertain.
+    """
+    return np.array([
+        1.0 - profile.get(block, {}).get(trait, {}).get("confidence", 0.0)
+        for block, trait, _ in PROFILE_COLUMNS
+    ])
+
+
+def select_question(candidate_id):
+    """
+    Picks the bank question expected to tell us most about the candidate.
+
+    Each unasked question is scored by the sum of its trait weights times the
+    current uncertainty of those traits in the candidate's profile, so the
+    least-confident traits are probed first. A question on the same topic
+    as the previous one is discounted by QUESTION_BANK_TOPIC_PENALTY.
+
+    Args:
+        candidate_id (int): The candidate's id.
+
+    Returns:
+        dict or None: {"id", "text", "topic"}, or None when the bank is empty
+            or the candidate has answered every question in it.
+    """
+    bank = load_bank()
+    if not bank["ids"]:
+        return None
+
+    asked = [
+        bank["index"].get(normalize_answer(question or ""))
+        for (question,) in db.session.query(Response.question)
+        .filter(Response.candidate_id == candidate_id).order_by(Response.id)
+    ]
+    scores = bank["weights"] @ uncertainty(cached_profile(candidate_id))
+    last = next((i for i in reversed(asked) if i is not None), None)
+    if last is not None:
+        same_topic = np.array([topic == bank["topics"][last] for topic in bank["topics"]])
+        scores = np.where(same_topic, scores * Config.QUESTION_BANK_TOPIC_PENALTY, scores)
+    seen = [i for i in asked if i is not None]
+    if seen:
+        scores[seen] = -np.inf
+    best = int(np.argmax(scores))
+    if not np.isfinite(scores[best]):
+        return None
+    return {"id": bank["ids"][best], "text": bank["texts"][best], "topic": bank["topics"][best]}
+
+
+def clean_traits(traits):
+    """
+    Keeps known trait names with weights clamped to 0-1; returns None if no weight is left.
+    """
+    if not isinstance(traits, dict):
+        return None
+    cleaned = {}
+    for block, known in KNOWN_TRAITS.items():
+        weights = traits.get(block) if isinstance(traits.get(block), dict) else {}
+        cleaned[block] = {
+            trait: round(min(1.0, max(0.0, float(weight))), 2)
+            for trait, weight in weights.items()
+            if trait in known and isinstance(weight, (int, float)) and not isinstance(weight, bool)
+        }
+    return cleaned if any(cleaned.values()) else None
+
+
+def import_questions(items, source="seed"):
+    """
+    Adds questions to the bank, skipping ones already present (case/whitespace-insensitive).
+
+    Args:
+        items (iterable): {"text", "topic", "traits"} dicts.
+        source (str): Recorded origin, "seed" or "llm".
+
+    Returns:
+        int: Number of questions added.
+    """
+    existing = {normalize_answer(text) for (text,) in db.session.query(BankQuestion.text)}
+    added = 0
+    for item in items:
+        text = " ".join(str(item.get("text", "")).split())
+        traits = clean_traits(item.get("traits"))
+        if not text or traits is None or normalize_answer(text) in existing:
+            continue
+        db.session.add(BankQuestion(text=text, topic=item.get("topic"), traits=traits, source=source))
+        existing.add(normalize_answer(text))
+        added += 1
+    db.session.commit()
+    invalidate_bank()
+    return added
+
+
+def load_seed_file(path=SEED_FILE):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def build_bank_prompt(topic, count):
+    """
+    Builds the offline prompt that generates tagged bank questions for one topic.
+    """
+    return (
+        f"Write {count} distinct behavioral interview questions about {topic.replace('_', ' ')}. "
+        "For each, rate from 0 to 1 how strongly an answer to it would reveal each personality trait "
+        f"(Big Five: {', '.join(BIG_FIVE_TRAITS)}; MBTI: {', '.join(MBTI_TRAITS)}); omit traits it says little about. "
+        "Respond ONLY with a JSON object of the form "
+        '{"questions": [{"text": "...", "traits": {"BigFive": {"Openness": 0.7}, "MBTI": {"Thinking": 0.5}}}]}'
+    )
+
+
+async def generate_bank_questions(topic, count):
+    """
+    Asks the LLM for tagged questions on a topic.
+
+    Returns:
+        list: {"text", "topic", "traits"} dicts (unvalidated; see import_questions).
+    """
+    data, _ = extract_json(
+        await complete("question", build_bank_prompt(topic, count)),
+        accept=lambda parsed: isinstance(parsed, dict) and isinstance(parsed.get("questions"), list),
+    )
+    questions = data.get("questions") if isinstance(data, dict) else None
+    if not isinstance(questions, list):
+        logger.error("Question bank generation for %s returned no question list.", topic)
+        return []
+    return [{**q, "topic": topic} for q in questions if isinstance(q, dict)]
+
+
+def next_bank_question(candidate_id):
+    """
+    Serves the next question from the bank, counting where questions come from.
+
+    Returns:
+        dict or None: select_question output, or None if the caller should fall back.
+    """
+    if not Config.QUESTION_BANK_ENABLED:
+        return None
+    started = time.perf_counter()
+    picked = select_question(candidate_id)
+    metrics.observe("question_bank_select_seconds", time.perf_counter() - started)
+    metrics.inc("question_source", source="bank" if picked else "exhausted")
+    return picked
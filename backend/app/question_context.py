@@ -0,0 +1,181 @@
+import logging
+from . import db, metrics
+from .config import Config
+from .models import Candidate, Response
+from .model_router import complete
+
+logger = logging.getLogger(__name__)
+
+# Cap on answers folded per LLM call, so a long unsummarized backlog catches up over several calls
+MAX_FOLD_ANSWERS = 20
+
+
+def estimate_tokens(text):
+    """
+    Rough token estimate (about four characters per token for English text).
+    """
+    return (len(text) + 3) // 4
+
+
+def truncate_to_tokens(text, budget):
+    """
+    Cuts text down to roughly `budget` tokens, keeping the beginning.
+    """
+    limit = max(0, budget) * 4
+    if len(text) <= limit:
+        return text
+    return text[:max(0, limit - 3)].rstrip() + "..."
+
+
+def build_summary_prompt(summary, answers):
+    """
+    Builds the prompt that folds newly aged-out answers into the running summary.
+
+    Args:
+        summary (str or None): The current running summary.
+        answers (list): Answers to fold in, oldest first (empty answers are skipped).
+
+    Returns:
+        str: The summarization prompt.
+    """
+    joined = " | ".join(str(a) for a in answers if a)
+    return (
+        f"Current summary of the candidate's earlier interview responses: '{summary or 'none'}'. "
+        f"New responses to incorporate: '{joined}'. "
+        f"Update the summary so it captures the behaviours, experiences and personality signals shown so far "
+        f"in at most {Config.CONTEXT_SUMMARY_WORDS} words. Respond ONLY with the updated summary."
+    )
+
+
+def add_history_tokens(candidate_id, answers):
+    """
+    Adds stored answers to the candidate's running full-history token total.
+
+    An atomic in-database increment, so question_context can report what the
+    full history would cost without reading it. The caller is responsible for
+    committing.
+    """
+    tokens = sum(estimate_tokens(answer) for answer in answers if isinstance(answer, str))
+    if tokens:
+        db.session.query(Candidate).filter(Candidate.id == candidate_id) \
+            .update({Candidate.history_tokens: Candidate.history_tokens + tokens}, synchronize_session=False)
+
+
+def needs_summary(candidate_id):
+    """
+    Returns True if some of the candidate's answers have left the raw window without being summarized.
+
+    One indexed query: more than QUESTION_CONTEXT_ANSWERS answers newer than
+    `summarized_upto` means the oldest of them are outside the window.
+    """
+    return db.session.query(Response.id) \
+        .join(Candidate, Candidate.id == Response.candidate_id) \
+        .filter(Response.candidate_id == candidate_id,
+                Response.id > db.func.coalesce(Candidate.summarized_upto, 0)) \
+        .order_by(Response.id.desc()) \
+        .offset(Config.QUESTION_CONTEXT_ANSWERS).limit(1).scalar() is not None
+
+
+def pending_overflow(candidate_id):
+    """
+    Loads the answers that left the raw window and are not in the running summary yet.
+
+    Returns:
+        tuple: (current summary or None, summarized_upto, list of (response id, answer), oldest first,
+            at most MAX_FOLD_ANSWERS)
+    """
+    candidate = db.session.get(Candidate, candidate_id)
+    if candidate is None:
+        return None, None, []
+    # Oldest answer still inside the raw window
+    boundary = db.session.query(Response.id) \
+        .filter(Response.candidate_id == candidate_id) \
+        .order_by(Response.id.desc()) \
+        .offset(max(0, Config.QUESTION_CONTEXT_ANSWERS - 1)).limit(1).scalar()
+    if boundary is None:
+        return candidate.context_summary, candidate.summarized_upto, []
+    query = db.session.query(Response.id, Response.answer) \
+        .filter(Response.candidate_id == candidate_id, Response.id < boundary)
+    if candidate.summarized_upto is not None:
+        query = query.filter(Response.id > candidate.summarized_upto)
+    overflow = query.order_by(Response.id).limit(MAX_FOLD_ANSWERS).all()
+    return candidate.context_summary, candidate.summarized_upto, [tuple(row) for row in overflow]
+
+
+async def summarize_overflow(summary, answers):
+    """
+    Asks the LLM to fold answers into the running summary, trimmed to half the context budget.
+    """
+    updated = (await complete("summary", build_summary_prompt(summary, answers))).strip()
+    return truncate_to_tokens(updated, Config.QUESTION_CONTEXT_TOKENS // 2)
+
+
+def store_summary(candidate_id, expected_upto, summary, upto):
+    """
+    Saves a new running summary covering answers up to response id `upto`.
+
+    The update is conditional on `summarized_upto` still being `expected_upto`,
+    so two concurrent folds cannot fold the same answers twice.
+
+    Returns:
+        bool: True if this fold was stored.
+    """
+    updated = Candidate.query \
+        .filter(Candidate.id == candidate_id) \
+        .filter(Candidate.summarized_upto.is_(None) if expected_upto is None
+                else Candidate.summarized_upto == expected_upto) \
+        .update({"context_summary": summary, "summarized_upto": upto}, synchronize_session=False)
+    db.session.commit()
+    if updated:
+        metrics.inc("context_summary_updates")
+        logger.info("Context summary for candidate_id %s now covers answers up to %s", candidate_id, upto)
+    return bool(updated)
+
+
+def question_context(candidate_id):
+    """
+    Returns a bounded context for generating the candidate's next question.
+
+    Keeps the last Config.QUESTION_CONTEXT_ANSWERS answers verbatim plus the
+    stored running summary of older ones, trimmed to
+    Config.QUESTION_CONTEXT_TOKENS. The summary is kept up to date as answers
+    arrive (see jobs.request_context_summary), so this makes no LLM call and
+    reads only the window. The bounded size and the full-history size (kept
+    at submit time, see add_history_tokens) are both recorded as
+    question_context_tokens, so the saving stays visible.
+
+    Args:
+        candidate_id (int): The candidate's id.
+
+    Returns:
+        tuple: (summary or None, list of recent answers, oldest first)
+    """
+    summary, full = db.session.query(Candidate.context_summary, Candidate.history_tokens) \
+        .filter(Candidate.id == candidate_id).one_or_none() or (None, 0)
+    recent = [
+        answer for (answer,) in db.session.query(Response.answer)
+        .filter(Response.candidate_id == candidate_id)
+        .order_by(Response.id.desc()).limit(Config.QUESTION_CONTEXT_ANSWERS)
+        if answer
+    ][::-1]
+
+    # Enforce the hard budget: summary first, then the newest answers that still fit
+    budget = Config.QUESTION_CONTEXT_TOKENS
+    if summary:
+        summary = truncate_to_tokens(summary, budget // 2)
+        budget -= estimate_tokens(summary)
+    answers = []
+    for answer in reversed(recent):
+        cost = estimate_tokens(answer) + 1
+        if cost > budget:
+            if not answers:
+                answers.append(truncate_to_tokens(answer, budget))
+            break
+        answers.append(answer)
+        budget -= cost
+    answers.reverse()
+
+    used = estimate_tokens(summary or "") + sum(estimate_tokens(a) for a in answers)
+    metrics.observe("question_context_tokens", used, kind="bounded")
+    metrics.observe("question_context_tokens", full or 0, kind="full_history")
+    return summary, answers
@@ -0,0 +1,104 @@
+import hashlib
+import logging
+import os
+import tempfile
+import time
+from . import metrics
+from .config import Config
+from .personality_engine import FEEDBACK_PROMPT_VERSION
+from .utils import generate_feedback_pdf
+
+logger = logging.getLogger(__name__)
+
+
+class LocalReportStore:
+    """
+    Stores rendered reports as files under a root directory.
+
+    Keys are object-store style paths ("feedback/<candidate_id>/<name>.pdf"),
+    so the store can be swapped for a bucket-backed one with the same methods.
+    Writes go to a temporary file that is renamed into place, so readers never
+    see a partially written report.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, key):
+        """
+        Returns the filesystem path of a key.
+        """
+        return os.path.join(self.root, *key.split("/"))
+
+    def exists(self, key):
+        return os.path.isfile(self.path(key))
+
+    def put(self, key, data):
+        """
+        Atomically writes bytes under a key.
+        """
+        path = self.path(key)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def delete(self, key):
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+
+report_store = LocalReportStore(Config.REPORT_STORAGE_DIR)
+
+
+def report_key(candidate_id, profile):
+    """
+    Returns the storage key of a candidate's feedback report for one profile version.
+
+    Args:
+        candidate_id (int): The candidate's id.
+        profile (dict): The candidate's profile (see profiles.candidate_profile).
+
+    Returns:
+        str: The storage key.
+    """
+    # "s" for scores_version; earlier "v" keys used score row ids and must not be mistaken for these
+    return f"feedback/{candidate_id}/s{profile['version']}-p{FEEDBACK_PROMPT_VERSION}.pdf"
+
+
+def report_etag(key):
+    """
+    Returns a strong ETag for a stored report; keys are immutable, so the key identifies the content.
+    """
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+
+def render_report(store_root, key, candidate_name, feedback, scores):
+    """
+    Renders a feedback PDF and writes it to the store.
+
+    Takes only plain arguments so it can run in a separate process.
+
+    Args:
+        store_root (str): Root directory of the LocalReportStore.
+        key (str): Storage key from report_key.
+        candidate_name (str): Name printed on the report.
+        feedback (str): Feedback summary text.
+        scores (dict): Trait name -> score.
+
+    Returns:
+        int: Size of the rendered PDF in bytes.
+    """
+    started = time.perf_counter()
+    data = generate_feedback_pdf(candidate_name, feedback, scores).getvalue()
+    metrics.observe_histogram("pdf_render_seconds", time.perf_counter() - started)
+    LocalReportStore(store_root).put(key, data)
+    return len(data)
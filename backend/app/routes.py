@@ -1,22 +1,116 @@
 import logging
-from flask import Blueprint, request, jsonify, send_file
-from . import db, redis_client
+from flask import Blueprint, Response as FlaskResponse, g, request, jsonify, send_file, stream_with_context, url_for
+from . import db
 from .models import Candidate, Response, TraitScore
 from .schemas import CandidateSchema, ResponseSchema, TraitScoreSchema
-from .personality_engine import analyze_response
+from .personality_engine import (
+    analyze_response, analyze_responses, analysis_cache, parse_stats,
+    build_feedback_prompt, build_question_prompt,
+)
+from .analytics import trait_percentiles, trait_score_aggregates
+from .candidate_queries import InvalidCursor, candidate_page, iter_candidates
+from .export import ARROW_AVAILABLE, EXPORT_FORMATS, export_stream
+from .profiles import (
+    cached_profile, profile_cache_stats, profile_entries, profile_means, refresh_profile_cache,
+)
+from .question_bank import next_bank_question
+from .question_context import add_history_tokens, question_context
+from .trait_stats import trait_statistics
+from .scoring import store_trait_scores
+from .sessions import register_session, resolve_session, resolve_sessions
+from .similarity import similarity_stats
+from .upstream import UpstreamUnavailable, upstream_state
+from .instrumentation import finish_request, start_request
+from .jobs import (
+    InvalidWebhook, enqueue, get_job, precompute_reports, request_context_summary, request_report,
+    validate_webhook_url,
+)
+from .feedback import cached_feedback, feedback_cache, generate_feedback, store_feedback
+from .config import Config
+from . import metrics
+import json
+import math
+import time
 import uuid
-import asyncio
-from .openrouter_client import query_openrouter
+from datetime import date
+from .async_runner import iterate_async, run_async
+from .model_router import complete, stream as stream_completion
 from .utils import *
 from flask_jwt_extended import jwt_required, get_jwt
-from .utils import generate_feedback_pdf
+from .reports import report_etag, report_key, report_store
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 main = Blueprint('main', __name__)
 
+def sse_response(task, prompt, done_key, on_done=None):
+    """
+    Streams an LLM completion to the client as server-sent events.
+
+    Emits one `data: {"delta": ...}` event per upstream chunk, then a `done`
+    event carrying the full stripped text under `done_key`, or an `error` event.
+
+    Args:
+        task (str): Model route to use (see Config.MODEL_ROUTES).
+        prompt (str): Prompt to stream a completion for.
+        done_key (str): Key for the full text in the final event.
+        on_done (callable, optional): Called with the full stripped text and the
+            model that produced it after a successful stream.
+
+    Returns:
+        flask.Response: A text/event-stream response.
+    """
+    def events():
+        parts = []
+        served = {}
+        try:
+            for delta in iterate_async(stream_completion(task, prompt, served)):
+                parts.append(delta)
+                yield f"data: {json.dumps({'delta': delta})}\n\n"
+        except Exception as e:
+            logger.error("Streaming completion failed: %s", e)
+            yield f"event: error\ndata: {json.dumps({'error': 'Failed to query LLM'})}\n\n"
+            return
+        text = ''.join(parts).strip()
+        if on_done:
+            on_done(text, served.get("model"))
+        yield f"event: done\ndata: {json.dumps({done_key: text})}\n\n"
+
+    return FlaskResponse(events(), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+
+def sse_text(done_key, text, **extra):
+    """
+    Answers an SSE request with text that is already known, as a single `done` event.
+    """
+    body = f"event: done\ndata: {json.dumps({done_key: text, **extra})}\n\n"
+    return FlaskResponse(body, mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@main.before_request
+def instrument_request():
+    g.request_stats_token = start_request()
+
+@main.after_request
+def record_request(response):
+    """
+    Records the request's duration and DB/Redis/LLM breakdown (streamed bodies count until headers are sent).
+    """
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    finish_request(route, request.method, response.status_code, g.pop("request_stats_token", None))
+    return response
+
+@main.errorhandler(UpstreamUnavailable)
+def upstream_unavailable(e):
+    """
+    Answers 503 when OpenRouter calls are being shed (open circuit, exhausted rate budget).
+    """
+    logger.warning("Upstream unavailable: %s", e)
+    response = jsonify({"error": "The assessment service is busy, please retry shortly"})
+    response.headers["Retry-After"] = str(max(1, math.ceil(e.retry_after or 1)))
+    return response, 503
+
 @main.route("/start", methods=["POST"])
 def start_assessment():
     """
@@ -27,64 +121,166 @@ def start_assessment():
     candidate = Candidate(name=data["name"], session_id=session_id)
     db.session.add(candidate)
     db.session.commit()
-    redis_client.set(session_id, candidate.id)
-    logger.info(f"Started assessment for candidate '{data['name']}' with session_id '{session_id}'")
+    register_session(session_id, candidate.id)
+    logger.info("Started assessment for candidate_id %s", candidate.id)
     return jsonify({"session_id": session_id})
 
 @main.route("/submit", methods=["POST"])
 def submit_response():
     """
     Submits a candidate's response and analyzes it for personality traits.
+
+    By default scoring is queued and the request answers 202 with the job id
+    and its status URL (the job result holds the analysis). Send `"async": false`
+    (or set SUBMIT_ASYNC=false) to score inside the request.
     """
     data = request.json
     session_id = data["session_id"]
     question = data["question"]
     answer = data["answer"]
-    candidate_id = redis_client.get(session_id)
+    candidate_id = resolve_session(session_id)
 
     if not candidate_id:
-        logger.warning(f"Invalid session_id '{session_id}' in submit_response")
+        logger.warning("Invalid session_id '%s' in submit_response", session_id)
         return jsonify({"error": "Invalid session"}), 404
 
+    webhook_url = data.get("webhook_url")
+    if webhook_url:
+        try:
+            validate_webhook_url(webhook_url)
+        except InvalidWebhook as e:
+            return jsonify({"error": str(e)}), 400
+
     response = Response(
-        candidate_id=int(candidate_id),
+        candidate_id=candidate_id,
         question=question,
         answer=answer
     )
     db.session.add(response)
+    add_history_tokens(candidate_id, [answer])
     db.session.commit()
-    logger.info(f"Stored response for candidate_id '{candidate_id}'")
-
-    # Analyze response asynchronously
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    analysis = loop.run_until_complete(analyze_response(answer))
+    logger.info("Stored response for candidate_id '%s'", candidate_id)
+    request_context_summary(candidate_id)
+
+    # Hand scoring to the job queue and return immediately unless synchronous scoring was asked for
+    if data.get("async", Config.SUBMIT_ASYNC):
+        job_id = enqueue(
+            "analyze",
+            {"candidate_id": candidate_id, "response_id": response.id, "answer": answer, "question": question},
+            webhook_url=webhook_url,
+        )
+        return jsonify({
+            "job_id": job_id,
+            "status": "queued",
+            "status_url": url_for("main.job_status", job_id=job_id)
+        }), 202
+
+    # Analyze response on the shared background event loop
+    analysis = run_async(analyze_response(answer, question))
 
     if "error" not in analysis:
-        for trait, score in analysis.get("BigFive", {}).items():
-            ts = TraitScore(candidate_id=int(candidate_id), trait=trait, score=score)
-            db.session.add(ts)
+        store_trait_scores(candidate_id, analysis, response_id=response.id)
         db.session.commit()
-        logger.info(f"Stored trait scores for candidate_id '{candidate_id}'")
+        precompute_reports(refresh_profile_cache([candidate_id]))
+        logger.info("Stored trait scores for candidate_id '%s'", candidate_id)
     else:
-        logger.error(f"Analysis error: {analysis['error']}")
+        logger.error("Analysis error: %s", analysis['error'])
 
     return jsonify({"analysis": analysis})
 
+@main.route("/submit-batch", methods=["POST"])
+def submit_batch():
+    """
+    Submits a whole questionnaire at once and analyzes all answers in batched LLM calls.
+    """
+    data = request.json
+    session_id = data["session_id"]
+    items = data["responses"]  # list of {"question": ..., "answer": ...}
+    candidate_id = resolve_session(session_id)
+
+    if not candidate_id:
+        logger.warning("Invalid session_id '%s' in submit_batch", session_id)
+        return jsonify({"error": "Invalid session"}), 404
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "responses must be a non-empty list"}), 400
+    if len(items) > Config.SUBMIT_BATCH_MAX_RESPONSES:
+        return jsonify({"error": f"At most {Config.SUBMIT_BATCH_MAX_RESPONSES} responses can be submitted at once"}), 400
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or not all(isinstance(item.get(key), str) for key in ("question", "answer")):
+            return jsonify({"error": f"responses[{index}] must have string question and answer fields"}), 400
+
+    responses = [
+        Response(candidate_id=candidate_id, question=item["question"], answer=item["answer"])
+        for item in items
+    ]
+    db.session.add_all(responses)
+    add_history_tokens(candidate_id, [r.answer for r in responses])
+    db.session.commit()
+    logger.info("Stored %s responses for candidate_id '%s'", len(responses), candidate_id)
+    request_context_summary(candidate_id)
+
+    analyses = run_async(analyze_responses(
+        [r.answer for r in responses], questions=[r.question for r in responses]
+    ))
+
+    for response, analysis in zip(responses, analyses):
+        if "error" in analysis:
+            logger.error("Analysis error: %s", analysis['error'])
+        store_trait_scores(candidate_id, analysis, response_id=response.id)
+    db.session.commit()
+    precompute_reports(refresh_profile_cache([candidate_id]))
+    logger.info("Stored batch trait scores for candidate_id '%s'", candidate_id)
+
+    return jsonify({"analyses": analyses})
+
+@main.route("/complete", methods=["POST"])
+def complete_assessment():
+    """
+    Marks an assessment as finished and queues background generation of its feedback and PDF report.
+    """
+    data = request.json
+    session_id = data["session_id"]
+    candidate_id = resolve_session(session_id)
+
+    if not candidate_id:
+        logger.warning("Invalid session_id '%s' in complete_assessment", session_id)
+        return jsonify({"error": "Invalid session"}), 404
+
+    job_id = request_report(candidate_id, cached_profile(candidate_id))
+    logger.info("Queued report precompute for candidate_id '%s'", candidate_id)
+    return jsonify({
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": url_for("main.job_status", job_id=job_id)
+    }), 202
+
+@main.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    """
+    Returns the status (and result, once finished) of a background job.
+    """
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
+
 @main.route("/profile/<session_id>", methods=["GET"])
 def get_profile(session_id):
     """
     Retrieves the personality profile for a candidate.
+
+    Returns one entry per trait with the recency-weighted mean as `score`,
+    plus variance, std, confidence and answer count; `include_mbti=1` adds
+    the MBTI dimensions.
     """
-    candidate_id = redis_client.get(session_id)
+    candidate_id = resolve_session(session_id)
     if not candidate_id:
-        logger.warning(f"Invalid session_id '{session_id}' in get_profile")
+        logger.warning("Invalid session_id '%s' in get_profile", session_id)
         return jsonify({"error": "Invalid session"}), 404
 
-    scores = TraitScore.query.filter_by(candidate_id=int(candidate_id)).all()
-    schema = TraitScoreSchema(many=True)
-    logger.info(f"Fetched profile for candidate_id '{candidate_id}'")
-    return jsonify(schema.dump(scores))
+    profile = cached_profile(candidate_id)
+    logger.info("Fetched profile for candidate_id '%s'", candidate_id)
+    return jsonify(profile_entries(profile, include_mbti=bool(request.args.get("include_mbti"))))
 
 @main.route("/generate-question", methods=["POST"])
 def generate_question():
@@ -93,76 +289,211 @@ def generate_question():
     """
     data = request.json
     session_id = data["session_id"]
-    candidate_id = redis_client.get(session_id)
+    candidate_id = resolve_session(session_id)
 
     if not candidate_id:
-        logger.warning(f"Invalid session_id '{session_id}' in generate_question")
+        logger.warning("Invalid session_id '%s' in generate_question", session_id)
         return jsonify({"error": "Invalid session"}), 404
 
-    past_responses = Response.query.filter_by(candidate_id=int(candidate_id)).all()
-    context = " | ".join([r.answer for r in past_responses])
+    # Serve from the precomputed bank; the LLM is only a fallback once it is exhausted
+    picked = next_bank_question(candidate_id)
+    if picked:
+        logger.info("Served bank question %s to candidate_id '%s'", picked['id'], candidate_id)
+        return jsonify({"next_question": picked["text"], "question_id": picked["id"], "source": "bank"})
+    if Config.QUESTION_BANK_ENABLED and not Config.QUESTION_BANK_LLM_FALLBACK:
+        return jsonify({"next_question": None, "source": "bank", "exhausted": True})
 
-    prompt = (
-        f"Given the candidate's past responses: '{context}', "
-        f"generate the next best behavioral question to assess traits like leadership, teamwork, or conflict resolution. "
-        f"Respond ONLY with the question text, no explanations."
-    )
+    summary, recent_answers = question_context(candidate_id)
+    prompt = build_question_prompt(recent_answers, summary)
+
+    next_question = run_async(complete("question", prompt))
+    metrics.inc("question_source", source="llm")
+
+    logger.info("Generated question for candidate_id '%s'", candidate_id)
+    return jsonify({"next_question": next_question.strip(), "source": "llm"})
 
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    next_question = loop.run_until_complete(query_openrouter(prompt))
+@main.route("/generate-question/stream", methods=["POST"])
+def generate_question_stream():
+    """
+    Streams the next behavioral question for a candidate as server-sent events.
+    """
+    data = request.json
+    session_id = data["session_id"]
+    candidate_id = resolve_session(session_id)
+
+    if not candidate_id:
+        logger.warning("Invalid session_id '%s' in generate_question_stream", session_id)
+        return jsonify({"error": "Invalid session"}), 404
 
-    logger.info(f"Generated question for candidate_id '{candidate_id}'")
-    return jsonify({"next_question": next_question.strip()})
+    picked = next_bank_question(candidate_id)
+    if picked:
+        return sse_text("next_question", picked["text"], question_id=picked["id"], source="bank")
+    if Config.QUESTION_BANK_ENABLED and not Config.QUESTION_BANK_LLM_FALLBACK:
+        return sse_text("next_question", None, source="bank", exhausted=True)
+
+    summary, recent_answers = question_context(candidate_id)
+    prompt = build_question_prompt(recent_answers, summary)
+
+    logger.info("Streaming question for candidate_id '%s'", candidate_id)
+    metrics.inc("question_source", source="llm")
+    return sse_response("question", prompt, "next_question")
 
 @main.route("/recruiter/candidates", methods=["GET"])
 @jwt_required()
 def list_candidates():
     """
-    Lists all candidates for recruiters.
+    Lists candidates for recruiters, one keyset-paginated page at a time.
+
+    Query parameters: `limit`, `cursor` (from the X-Next-Cursor header),
+    `q` (name prefix), `include_scores=1` (per-trait means) and
+    `format=ndjson` (stream all matching candidates for export).
     """
     claims = get_jwt()
     if claims.get("role") != "recruiter":
         logger.warning("Unauthorized access attempt to list_candidates")
         return jsonify({"error": "Unauthorized"}), 403
 
-    candidates = Candidate.query.all()
-    schema = CandidateSchema(many=True)
+    name_prefix = request.args.get("q") or None
+
+    # Export mode: stream every matching candidate as newline-delimited JSON
+    if request.args.get("format") == "ndjson":
+        rows = (json.dumps(row) + "\n" for row in iter_candidates(name_prefix))
+        logger.info("Recruiter exported candidate list")
+        return FlaskResponse(stream_with_context(rows), mimetype="application/x-ndjson")
+
+    try:
+        limit = min(max(1, int(request.args.get("limit", Config.CANDIDATES_PAGE_SIZE))),
+                    Config.CANDIDATES_MAX_PAGE_SIZE)
+        candidates, next_cursor = candidate_page(
+            limit,
+            cursor=request.args.get("cursor"),
+            name_prefix=name_prefix,
+            include_scores=bool(request.args.get("include_scores")),
+        )
+    except (ValueError, InvalidCursor):
+        return jsonify({"error": "Invalid limit or cursor"}), 400
+
     logger.info("Recruiter fetched candidate list")
-    return jsonify(schema.dump(candidates))
+    response = jsonify(candidates)
+    # The body stays a plain list; the next page is advertised in headers
+    if next_cursor:
+        args = {**request.args.to_dict(), "cursor": next_cursor}
+        response.headers["X-Next-Cursor"] = next_cursor
+        response.headers["Link"] = f'<{url_for("main.list_candidates", **args)}>; rel="next"'
+    return response
+
+@main.route("/recruiter/export", methods=["GET"])
+@jwt_required()
+def export_cohort():
+    """
+    Streams every answer with its candidate and trait scores as a file download.
+
+    Query parameters: `format` (csv, parquet or arrow; default csv) and
+    optional `since` / `until` (YYYY-MM-DD) on the answer date.
+    """
+    claims = get_jwt()
+    if claims.get("role") != "recruiter":
+        logger.warning("Unauthorized access attempt to export_cohort")
+        return jsonify({"error": "Unauthorized"}), 403
+
+    fmt = request.args.get("format", "csv")
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"error": f"format must be one of {', '.join(EXPORT_FORMATS)}"}), 400
+    if fmt != "csv" and not ARROW_AVAILABLE:
+        return jsonify({"error": f"{fmt} export is not available on this server"}), 400
+    try:
+        since = date.fromisoformat(request.args["since"]) if request.args.get("since") else None
+        until = date.fromisoformat(request.args["until"]) if request.args.get("until") else None
+    except ValueError:
+        return jsonify({"error": "since/until must be dates in YYYY-MM-DD format"}), 400
+
+    mimetype, extension = EXPORT_FORMATS[fmt]
+    logger.info("Recruiter started %s export (since=%s, until=%s)", fmt, since, until)
+    return FlaskResponse(
+        stream_with_context(export_stream(fmt, since, until, Config.EXPORT_BATCH_SIZE)),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename=export.{extension}"}
+    )
 
 @main.route("/recruiter/compare", methods=["POST"])
+@jwt_required()
 def compare_candidates():
     """
-    Compares trait scores for a list of candidate IDs.
-    """
-    data = request.json
-    candidate_ids = data["candidate_ids"]  # list of IDs
+    Compares trait scores for a list of candidate IDs (or session IDs).
 
-    comparison = {}
-    for cid in candidate_ids:
-        scores = TraitScore.query.filter_by(candidate_id=cid).all()
-        score_dict = {s.trait: s.score for s in scores}
-        comparison[cid] = score_dict
+    Returns a paginated candidate x trait matrix with the mean, latest score
+    and row count per cell, plus population percentile ranks on request.
+    """
+    claims = get_jwt()
+    if claims.get("role") != "recruiter":
+        logger.warning("Unauthorized access attempt to compare_candidates")
+        return jsonify({"error": "Unauthorized"}), 403
 
-    logger.info(f"Compared candidates: {candidate_ids}")
-    return jsonify(comparison)
+    data = request.json
+    try:
+        ids = data.get("candidate_ids")
+        if ids is None:
+            # Candidates may also be named by session id, resolved in one pipelined lookup
+            session_ids = [str(sid) for sid in data["session_ids"]]
+            if len(session_ids) > Config.COMPARE_MAX_IDS:
+                return jsonify({"error": f"At most {Config.COMPARE_MAX_IDS} candidate IDs can be compared"}), 400
+            resolved = resolve_sessions(session_ids)
+            ids = [resolved[sid] for sid in session_ids if sid in resolved]
+        # Deduplicate while keeping the caller's order
+        candidate_ids = list(dict.fromkeys(int(cid) for cid in ids))
+        page = max(1, int(data.get("page", 1)))
+        per_page = min(max(1, int(data.get("per_page", 50))), Config.COMPARE_MAX_PAGE_SIZE)
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"error": "candidate_ids must be a list of integer IDs (or pass session_ids)"}), 400
+    if len(candidate_ids) > Config.COMPARE_MAX_IDS:
+        return jsonify({"error": f"At most {Config.COMPARE_MAX_IDS} candidate IDs can be compared"}), 400
+
+    page_ids = candidate_ids[(page - 1) * per_page:page * per_page]
+    aggregates = trait_score_aggregates(page_ids) if page_ids else {}
+    percentiles = trait_percentiles(page_ids) if page_ids and data.get("include_percentiles") else None
+
+    traits = sorted({trait for cells in aggregates.values() for trait in cells})
+    matrix = {}
+    for cid in page_ids:
+        cells = aggregates.get(cid, {})
+        if percentiles is not None:
+            for trait, cell in cells.items():
+                cell["percentile"] = percentiles.get(cid, {}).get(trait)
+        matrix[cid] = cells
+
+    logger.info("Compared %s candidates (page %s)", len(page_ids), page)
+    return jsonify({
+        "traits": traits,
+        "candidate_ids": page_ids,
+        "matrix": matrix,
+        "page": page,
+        "per_page": per_page,
+        "total": len(candidate_ids),
+        "pages": (len(candidate_ids) + per_page - 1) // per_page
+    })
 
 @main.route("/recruiter/trends", methods=["GET"])
 def trends():
     """
     Shows average trait scores across all candidates.
-    """
-    traits = ["Openness", "Conscientiousness", "Extraversion", "Agreeableness", "Neuroticism"]
-    trends = {}
 
-    for trait in traits:
-        avg = db.session.query(db.func.avg(TraitScore.score)) \
-            .filter(TraitScore.trait == trait).scalar()
-        trends[trait] = round(avg, 2) if avg else None
+    Served from the materialized trait statistics. Optional `since` / `until`
+    (YYYY-MM-DD) restrict the time window; `detail=1` returns count, mean,
+    standard deviation and a 10-bin histogram per trait instead of plain averages.
+    """
+    try:
+        since = date.fromisoformat(request.args["since"]) if request.args.get("since") else None
+        until = date.fromisoformat(request.args["until"]) if request.args.get("until") else None
+    except ValueError:
+        return jsonify({"error": "since/until must be dates in YYYY-MM-DD format"}), 400
 
+    stats = trait_statistics(since, until)
     logger.info("Fetched trait trends")
-    return jsonify(trends)
+    if request.args.get("detail"):
+        return jsonify(stats)
+
+    traits = ["Openness", "Conscientiousness", "Extraversion", "Agreeableness", "Neuroticism"]
+    return jsonify({trait: stats[trait]["mean"] if trait in stats else None for trait in traits})
 
 @main.route("/candidate/feedback/<session_id>", methods=["GET"])
 @jwt_required()
@@ -174,58 +505,149 @@ def candidate_feedback(session_id):
     if claims.get("role") != "candidate":
         logger.warning("Unauthorized access attempt to candidate_feedback")
         return jsonify({"error": "Unauthorized"}), 403    
-    candidate_id = redis_client.get(session_id)
+    candidate_id = resolve_session(session_id)
     if not candidate_id:
-        logger.warning(f"Invalid session_id '{session_id}' in candidate_feedback")
+        logger.warning("Invalid session_id '%s' in candidate_feedback", session_id)
         return jsonify({"error": "Invalid session"}), 404
 
-    scores = TraitScore.query.filter_by(candidate_id=int(candidate_id)).all()
-    summary_input = {s.trait: s.score for s in scores}
+    summary_input = profile_means(cached_profile(candidate_id))
 
-    prompt = (
-        f"Based on the following personality trait scores: {summary_input}, "
-        f"generate a short natural-language summary of the candidate's strengths, weaknesses, and career fit. "
-        f"Respond in 4-5 sentences."
-    )
-
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    feedback = loop.run_until_complete(query_openrouter(prompt))
+    # Reuses stored feedback for this score profile; only a changed profile costs a completion
+    feedback = run_async(generate_feedback(candidate_id, summary_input))
 
-    logger.info(f"Generated feedback for candidate_id '{candidate_id}'")
+    logger.info("Served feedback for candidate_id '%s'", candidate_id)
     return jsonify({
-        "feedback_summary": feedback.strip(),
+        "feedback_summary": feedback,
         "scores": summary_input
     })
 
+@main.route("/candidate/feedback/<session_id>/stream", methods=["GET"])
+@jwt_required()
+def candidate_feedback_stream(session_id):
+    """
+    Streams the feedback summary for a candidate as server-sent events.
+    """
+    claims = get_jwt()
+    if claims.get("role") != "candidate":
+        logger.warning("Unauthorized access attempt to candidate_feedback_stream")
+        return jsonify({"error": "Unauthorized"}), 403
+    candidate_id = resolve_session(session_id)
+    if not candidate_id:
+        logger.warning("Invalid session_id '%s' in candidate_feedback_stream", session_id)
+        return jsonify({"error": "Invalid session"}), 404
+
+    scores = profile_means(cached_profile(candidate_id))
+    feedback = cached_feedback(candidate_id, scores)
+    if feedback is not None:
+        logger.info("Serving stored feedback for candidate_id '%s' as a stream", candidate_id)
+        return FlaskResponse(
+            f"event: done\ndata: {json.dumps({'feedback_summary': feedback})}\n\n",
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache"}
+        )
+
+    logger.info("Streaming feedback for candidate_id '%s'", candidate_id)
+    return sse_response(
+        "feedback",
+        build_feedback_prompt(scores),
+        "feedback_summary",
+        on_done=lambda text, model: store_feedback(candidate_id, scores, text, model)
+    )
+
 @main.route("/candidate/feedback-pdf/<session_id>", methods=["GET"])
 def download_feedback_pdf(session_id):
     """
-    Generates and downloads a PDF feedback report for a candidate.
+    Downloads the PDF feedback report for a candidate.
+
+    Reports are rendered by the job worker once per profile version and
+    served from the report store with an ETag, so conditional and range
+    requests are answered without re-rendering. A missing report is queued
+    and waited for up to REPORT_WAIT_SECONDS; after that the client gets a
+    202 with the job's status URL.
     """
-    candidate_id = redis_client.get(session_id)
+    candidate_id = resolve_session(session_id)
     if not candidate_id:
-        logger.warning(f"Invalid session_id '{session_id}' in download_feedback_pdf")
+        logger.warning("Invalid session_id '%s' in download_feedback_pdf", session_id)
         return jsonify({"error": "Invalid session"}), 404
 
-    candidate = Candidate.query.get(int(candidate_id))
-    scores = TraitScore.query.filter_by(candidate_id=int(candidate_id)).all()
-    score_dict = {s.trait: s.score for s in scores}
-
-    prompt = (
-        f"Based on the following personality trait scores: {score_dict}, "
-        f"generate a short natural-language summary of the candidate's strengths, weaknesses, and career fit. "
-        f"Respond in 4-5 sentences."
+    profile = cached_profile(candidate_id)
+    if not profile_means(profile):
+        return jsonify({"error": "No scores yet"}), 404
+
+    key = report_key(candidate_id, profile)
+    if not report_store.exists(key):
+        job_id = request_report(candidate_id, profile)
+        if not wait_for_report(key, job_id, Config.REPORT_WAIT_SECONDS):
+            logger.info("Report for candidate_id '%s' still rendering", candidate_id)
+            response = jsonify({
+                "job_id": job_id,
+                "status": "rendering",
+                "status_url": url_for("main.job_status", job_id=job_id)
+            })
+            response.headers["Retry-After"] = "2"
+            return response, 202
+
+    logger.info("Serving PDF feedback for candidate_id '%s'", candidate_id)
+    response = send_file(
+        report_store.path(key),
+        as_attachment=True,
+        download_name="feedback_report.pdf",
+        mimetype='application/pdf',
+        etag=report_etag(key),
+        conditional=True,
+        max_age=0
     )
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+def wait_for_report(key, job_id, timeout):
+    """
+    Polls the report store until a queued report appears, its job fails, or the timeout passes.
 
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    feedback = loop.run_until_complete(query_openrouter(prompt))
+    Returns:
+        bool: True if the report is available.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if report_store.exists(key):
+            return True
+        job = get_job(job_id)
+        if job and job["status"] == "failed":
+            return False
+        time.sleep(0.2)
+    return report_store.exists(key)
+
+@main.route("/recruiter/metrics", methods=["GET"])
+@jwt_required()
+def recruiter_metrics():
+    """
+    Returns in-process counters and cache statistics for monitoring.
+    """
+    claims = get_jwt()
+    if claims.get("role") != "recruiter":
+        logger.warning("Unauthorized access attempt to recruiter_metrics")
+        return jsonify({"error": "Unauthorized"}), 403
 
-    pdf_buffer = generate_feedback_pdf(candidate.name, feedback.strip(), score_dict)
+    return jsonify({
+        "caches": {
+            "analysis": analysis_cache.stats(),
+            "profile": profile_cache_stats(),
+            "feedback": feedback_cache.stats(),
+        },
+        "upstream": upstream_state(),
+        "analysis_parsing": parse_stats(),
+        "similarity_reuse": similarity_stats(),
+        **metrics.snapshot()
+    })
 
-    logger.info(f"Generated PDF feedback for candidate_id '{candidate_id}'")
-    return send_file(pdf_buffer, as_attachment=True, download_name="feedback_report.pdf", mimetype='application/pdf')
+@main.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    """
+    Exposes this process's counters, timings and cache statistics in the Prometheus text format.
+    """
+    if Config.METRICS_TOKEN and request.headers.get("Authorization") != f"Bearer {Config.METRICS_TOKEN}":
+        return jsonify({"error": "Unauthorized"}), 401
+    return FlaskResponse(metrics.render_prometheus(), mimetype="text/plain; version=0.0.4")
 
 @main.route("/login", methods=["POST"])
 def login():
@@ -243,8 +665,8 @@ def login():
     elif username == "candidate" and password == "candidatepass" and role == "candidate":
         token = generate_token(identity=username, role=role)
     else:
-        logger.warning(f"Failed login attempt for username '{username}' and role '{role}'")
+        logger.warning("Failed login attempt for username '%s' and role '%s'", username, role)
         return jsonify({"error": "Invalid credentials"}), 401
 
-    logger.info(f"User '{username}' logged in as '{role}'")
+    logger.info("User '%s' logged in as '%s'", username, role)
     return jsonify({"access_token": token})
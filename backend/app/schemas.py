@@ -1,11 +1,6 @@
-import logging
 from marshmallow_sqlalchemy import SQLAlchemyAutoSchema
 from .models import Candidate, Response, TraitScore
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
-
 class CandidateSchema(SQLAlchemyAutoSchema):
     """
     Marshmallow schema for serializing and deserializing Candidate model instances.
@@ -14,10 +9,6 @@ class CandidateSchema(SQLAlchemyAutoSchema):
         model = Candidate
         load_instance = True
 
-    def __init__(self, *args, **kwargs):
-        logger.info("Initializing CandidateSchema")
-        super().__init__(*args, **kwargs)
-
 class ResponseSchema(SQLAlchemyAutoSchema):
     """
     Marshmallow schema for serializing and deserializing Response model instances.
@@ -26,10 +17,6 @@ class ResponseSchema(SQLAlchemyAutoSchema):
         model = Response
         load_instance = True
 
-    def __init__(self, *args, **kwargs):
-        logger.info("Initializing ResponseSchema")
-        super().__init__(*args, **kwargs)
-
 class TraitScoreSchema(SQLAlchemyAutoSchema):
     """
     Marshmallow schema for serializing and deserializing TraitScore model instances.
@@ -37,7 +24,3 @@ class TraitScoreSchema(SQLAlchemyAutoSchema):
     class Meta:
         model = TraitScore
         load_instance = True
-
-    def __init__(self, *args, **kwargs):
-        logger.info("Initializing TraitScoreSchema")
-        super().__init__(*args, **kwargs)
@@ -0,0 +1,60 @@
+import logging
+from datetime import datetime
+from . import db
+from .config import Config
+from .models import AnswerScore, Candidate, TraitScore
+from .trait_stats import record_trait_scores
+
+logger = logging.getLogger(__name__)
+
+
+def store_trait_scores(candidate_id, analysis, response_id=None):
+    """
+    Stores the scores of one analysis and updates the materialized trait statistics.
+
+    Writes a single compact AnswerScore row holding every Big Five and MBTI
+    value; every score reader uses these rows. The legacy per-trait TraitScore
+    rows are written as well only while Config.STORE_TRAIT_SCORE_ROWS is
+    enabled. The candidate's scores_version is bumped. The caller is
+    responsible for committing.
+
+    Args:
+        candidate_id (int): The candidate the analysis belongs to.
+        analysis (dict): Output of analyze_response / analyze_responses.
+        response_id (int, optional): The Response the analysis was produced from.
+
+    Returns:
+        AnswerScore or None: The compact row added, None if the analysis is an error.
+    """
+    if "error" in analysis:
+        return None
+    now = datetime.utcnow()
+    answer_score = AnswerScore.from_analysis(candidate_id, analysis, response_id=response_id)
+    answer_score.created_at = now
+    db.session.add(answer_score)
+
+    big_five = list(analysis.get("BigFive", {}).items())
+    if Config.STORE_TRAIT_SCORE_ROWS:
+        rows = [
+            TraitScore(candidate_id=candidate_id, trait=trait, score=score)
+            for trait, score in big_five
+        ]
+        for row in rows:
+            row.created_at = now
+        db.session.add_all(rows)
+    # Keep the materialized trend aggregates in step, in the same transaction
+    record_trait_scores((trait, score, now) for trait, score in big_five)
+    bump_scores_version([candidate_id])
+    return answer_score
+
+
+def bump_scores_version(candidate_ids):
+    """
+    Marks the candidates' scores as changed, so cached profiles and reports of earlier versions are superseded.
+
+    An atomic in-database increment: concurrent writers each get their own
+    version, and the version never goes backwards, even when scores are deleted.
+    The caller is responsible for committing.
+    """
+    db.session.query(Candidate).filter(Candidate.id.in_(list(candidate_ids))) \
+        .update({Candidate.scores_version: Candidate.scores_version + 1}, synchronize_session=False)
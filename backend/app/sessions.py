@@ -0,0 +1,118 @@
+import logging
+from redis.exceptions import RedisError
+from . import db, metrics, redis_client
+from .cache import LRUCache
+from .config import Config
+from .models import Candidate
+
+logger = logging.getLogger(__name__)
+
+SESSION_KEY = "session:{}"
+
+# Hot sessions resolved without a Redis round trip; entries are immutable (a session never changes owner)
+_local = LRUCache(maxsize=Config.SESSION_LOCAL_SIZE, ttl=Config.SESSION_LOCAL_TTL)
+
+
+def register_session(session_id, candidate_id):
+    """
+    Stores a new session -> candidate mapping with the session TTL.
+
+    Args:
+        session_id (str): The session id handed to the client.
+        candidate_id (int): The candidate's id.
+    """
+    _local.set(session_id, candidate_id)
+    try:
+        redis_client.set(SESSION_KEY.format(session_id), candidate_id, ex=Config.SESSION_TTL)
+    except RedisError as e:
+        # The candidate row is the source of truth; the session is rehydrated on first use
+        logger.warning("Could not store session in Redis: %s", e)
+
+
+def _from_db(session_ids):
+    rows = db.session.query(Candidate.session_id, Candidate.id) \
+        .filter(Candidate.session_id.in_(session_ids)).all()
+    return dict(rows)
+
+
+def _rehydrate(found):
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for session_id, candidate_id in found.items():
+            pipe.set(SESSION_KEY.format(session_id), candidate_id, ex=Config.SESSION_TTL)
+        pipe.execute()
+    except RedisError as e:
+        logger.warning("Could not rehydrate sessions in Redis: %s", e)
+
+
+def resolve_session(session_id):
+    """
+    Resolves a session id to its candidate id.
+
+    Looks in the in-process cache, then Redis (refreshing the key's TTL), then
+    the candidate table; sessions found only in the database are written back
+    to Redis.
+
+    Args:
+        session_id (str): The session id sent by the client.
+
+    Returns:
+        int: The candidate id, or None for an unknown session.
+    """
+    return resolve_sessions([session_id]).get(session_id)
+
+
+def resolve_sessions(session_ids):
+    """
+    Resolves many session ids with one pipelined Redis round trip and at most one query.
+
+    Args:
+        session_ids (iterable): Session ids.
+
+    Returns:
+        dict: session_id -> candidate id for every known session.
+    """
+    resolved = {}
+    pending = []
+    for session_id in dict.fromkeys(session_ids):
+        if not session_id:
+            continue
+        candidate_id = _local.get(session_id)
+        if candidate_id is not None:
+            resolved[session_id] = candidate_id
+        else:
+            pending.append(session_id)
+    metrics.inc("session_lookups", len(resolved), source="local")
+    if not pending:
+        return resolved
+
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for session_id in pending:
+            # Sliding expiry: active sessions stay alive, abandoned ones age out
+            pipe.getex(SESSION_KEY.format(session_id), ex=Config.SESSION_TTL)
+        values = pipe.execute()
+    except RedisError as e:
+        logger.warning("Session lookup falling back to the database: %s", e)
+        values = [None] * len(pending)
+
+    missing = []
+    for session_id, value in zip(pending, values):
+        if value is None:
+            missing.append(session_id)
+            continue
+        resolved[session_id] = int(value)
+        _local.set(session_id, int(value))
+    metrics.inc("session_lookups", len(pending) - len(missing), source="redis")
+    if not missing:
+        return resolved
+
+    found = _from_db(missing)
+    for session_id, candidate_id in found.items():
+        resolved[session_id] = candidate_id
+        _local.set(session_id, candidate_id)
+    if found:
+        _rehydrate(found)
+    metrics.inc("session_lookups", len(found), source="db")
+    metrics.inc("session_lookups", len(missing) - len(found), source="unknown")
+    return resolved
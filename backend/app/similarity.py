@@ -0,0 +1,274 @@
+import hashlib
+import json
+import logging
+import re
+import zlib
+import numpy as np
+from redis.exceptions import RedisError
+from . import metrics, redis_client
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+INDEX_PREFIX = "simidx"
+NON_WORD_RE = re.compile(r"[^\w\s]")
+
+# Universal hash family h(x) = ((a * x + b) mod p) & 0xffffffff; fixed seed so every
+# process (and every rebuild) produces the same signatures
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_rng = np.random.default_rng(1)
+_A = _rng.integers(1, 1 << 32, size=Config.SIMILARITY_PERMUTATIONS, dtype=np.uint64)
+_B = _rng.integers(0, 1 << 32, size=Config.SIMILARITY_PERMUTATIONS, dtype=np.uint64)
+
+TRAIT_BLOCKS = ("BigFive", "MBTI")
+
+
+def shingles(text, size=None):
+    """
+    Returns the set of character n-grams of an answer after case, punctuation and whitespace normalization.
+    """
+    size = size or Config.SIMILARITY_SHINGLE_SIZE
+    text = " ".join(NON_WORD_RE.sub(" ", text.casefold()).split())
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def signature(text):
+    """
+    Computes the MinHash signature of an answer.
+
+    Args:
+        text (str): The answer.
+
+    Returns:
+        np.ndarray or None: uint32 array of Config.SIMILARITY_PERMUTATIONS
+            minima, or None if the answer is shorter than SIMILARITY_MIN_CHARS.
+    """
+    if len(text.strip()) < Config.SIMILARITY_MIN_CHARS:
+        return None
+    grams = shingles(text)
+    if not grams:
+        return None
+    hashes = np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+    permuted = (_A[:, None] * hashes[None, :] + _B[:, None]) % MERSENNE_PRIME
+    return (permuted & np.uint64(0xFFFFFFFF)).min(axis=1).astype(np.uint32)
+
+
+def estimate_similarity(sig_a, sig_b):
+    """
+    Estimates the Jaccard similarity of two answers from their signatures.
+    """
+    return float(np.mean(sig_a == sig_b))
+
+
+def bands(sig):
+    """
+    Splits a signature into Config.SIMILARITY_BANDS LSH band digests.
+
+    Two answers become candidates if any band matches; with b bands of r rows
+    the match probability passes 50% near similarity (1/b)^(1/r).
+    """
+    rows = len(sig) // Config.SIMILARITY_BANDS
+    return [sig[i * rows:(i + 1) * rows].tobytes().hex() for i in range(Config.SIMILARITY_BANDS)]
+
+
+def _entry_id(text):
+    normalized = " ".join(NON_WORD_RE.sub(" ", text.casefold()).split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+def _entry_key(scope, entry_id):
+    return f"{INDEX_PREFIX}:{scope}:e:{entry_id}"
+
+
+def _band_key(scope, band, digest):
+    return f"{INDEX_PREFIX}:{scope}:b:{band}:{digest}"
+
+
+def add_to_index(scope, answer, analysis):
+    """
+    Records an LLM-produced analysis so near-identical answers in the same scope can reuse it.
+
+    Args:
+        scope (str): Index partition, e.g. one question under one prompt version.
+        answer (str): The analyzed answer.
+        analysis (dict): Its validated analysis.
+
+    Returns:
+        bool: True if the answer was indexed (it may be too short to index).
+    """
+    sig = signature(answer)
+    if sig is None:
+        return False
+    entry_id = _entry_id(answer)
+    ttl = Config.SIMILARITY_TTL
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.set(_entry_key(scope, entry_id), json.dumps({"sig": sig.tobytes().hex(), "analysis": analysis}), ex=ttl)
+        for band, digest in enumerate(bands(sig)):
+            key = _band_key(scope, band, digest)
+            pipe.sadd(key, entry_id)
+            pipe.expire(key, ttl)
+        pipe.execute()
+    except RedisError as e:
+        logger.warning("Could not index answer for similarity reuse: %s", e)
+        return False
+    return True
+
+
+def find_similar(scope, answer, threshold=None):
+    """
+    Looks up prior analyses of answers similar to this one in the same scope.
+
+    Args:
+        scope (str): Index partition (see add_to_index).
+        answer (str): The new answer.
+        threshold (float, optional): Minimum estimated Jaccard similarity;
+            defaults to Config.SIMILARITY_THRESHOLD.
+
+    Returns:
+        list: Up to Config.SIMILARITY_TOP_K (similarity, analysis) pairs, most similar first.
+    """
+    threshold = Config.SIMILARITY_THRESHOLD if threshold is None else threshold
+    sig = signature(answer)
+    if sig is None:
+        metrics.inc("similarity_lookups", result="skipped")
+        return []
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for band, digest in enumerate(bands(sig)):
+            pipe.srandmember(_band_key(scope, band, digest), Config.SIMILARITY_MAX_CANDIDATES)
+        ids = sorted({i.decode() if isinstance(i, bytes) else i for found in pipe.execute() for i in found})
+        entries = redis_client.mget([_entry_key(scope, i) for i in ids]) if ids else []
+    except RedisError as e:
+        logger.warning("Similarity index unavailable: %s", e)
+        metrics.inc("similarity_lookups", result="error")
+        return []
+
+    matches = []
+    for raw in entries:
+        if raw is None:
+            continue
+        entry = json.loads(raw)
+        other = np.frombuffer(bytes.fromhex(entry["sig"]), dtype=np.uint32)
+        if len(other) != len(sig):
+            continue
+        score = estimate_similarity(sig, other)
+        if score >= threshold:
+            matches.append((score, entry["analysis"]))
+    matches.sort(key=lambda match: match[0], reverse=True)
+    metrics.inc("similarity_lookups", result="hit" if matches else "miss")
+    return matches[:Config.SIMILARITY_TOP_K]
+
+
+def blend(matches):
+    """
+    Combines the analyses of similar answers into one, weighting each by its similarity.
+
+    Args:
+        matches (list): (similarity, analysis) pairs from find_similar.
+
+    Returns:
+        dict: Analysis in the analyze_response shape.
+    """
+    total = sum(weight for weight, _ in matches)
+    return {
+        block: {
+            trait: round(sum(w * a[block][trait] for w, a in matches) / total, 1)
+            for trait in matches[0][1][block]
+        }
+        for block in TRAIT_BLOCKS
+    }
+
+
+def _error(predicted, actual):
+    """
+    Mean absolute score difference between two analyses over every trait.
+    """
+    diffs = [
+        abs(predicted[block][trait] - actual[block][trait])
+        for block in TRAIT_BLOCKS for trait in actual[block]
+    ]
+    return sum(diffs) / len(diffs)
+
+
+def evaluate(samples, thresholds, tolerance=10.0):
+    """
+    Replays stored answers through the index offline to tune the reuse threshold.
+
+    Answers are indexed in order within their scope; each one is looked up
+    against the answers before it (exact repeats are left to the analysis
+    cache and not counted). A reuse is correct when the blended scores are
+    within `tolerance` points (mean absolute error) of the answer's own
+    LLM scores; an answer is reusable when some earlier answer's scores were
+    that close, whatever its text.
+
+    Args:
+        samples (iterable): (scope, answer, analysis) tuples, oldest first.
+        thresholds (list): Similarity thresholds to report on.
+        tolerance (float): Allowed mean absolute score error.
+
+    Returns:
+        dict: threshold -> {queries, reusable, hits, hit_rate, precision,
+            recall, mean_error}.
+    """
+    stats = {t: {"hits": 0, "correct": 0, "error": 0.0} for t in thresholds}
+    queries = reusable = 0
+    seen = {}
+
+    for scope, answer, analysis in samples:
+        sig = signature(answer)
+        if sig is None:
+            continue
+        index = seen.setdefault(scope, {"ids": set(), "entries": [], "bands": {}})
+        entry_id = _entry_id(answer)
+        if entry_id in index["ids"]:
+            continue
+
+        queries += 1
+        reusable += any(_error(prior, analysis) <= tolerance for _, prior in index["entries"])
+        candidates = {j for band in enumerate(bands(sig)) for j in index["bands"].get(band, ())}
+        scored = sorted(
+            ((estimate_similarity(sig, index["entries"][j][0]), index["entries"][j][1]) for j in candidates),
+            key=lambda match: match[0], reverse=True,
+        )
+        for t in thresholds:
+            matches = [m for m in scored if m[0] >= t][:Config.SIMILARITY_TOP_K]
+            if matches:
+                error = _error(blend(matches), analysis)
+                stats[t]["hits"] += 1
+                stats[t]["correct"] += error <= tolerance
+                stats[t]["error"] += error
+
+        index["ids"].add(entry_id)
+        for band in enumerate(bands(sig)):
+            index["bands"].setdefault(band, []).append(len(index["entries"]))
+        index["entries"].append((sig, analysis))
+
+    return {
+        t: {
+            "queries": queries,
+            "reusable": reusable,
+            "hits": s["hits"],
+            "hit_rate": round(s["hits"] / queries, 4) if queries else None,
+            "precision": round(s["correct"] / s["hits"], 4) if s["hits"] else None,
+            "recall": round(s["correct"] / reusable, 4) if reusable else None,
+            "mean_error": round(s["error"] / s["hits"], 2) if s["hits"] else None,
+        }
+        for t, s in stats.items()
+    }
+
+
+def similarity_stats():
+    """
+    Returns live lookup counts and the share of index lookups that skipped an LLM call.
+    """
+    counts = {
+        result: int(metrics.get("similarity_lookups", result=result))
+        for result in ("hit", "miss", "skipped", "error")
+    }
+    total = sum(counts.values())
+    return {
+        **counts,
+        "threshold": Config.SIMILARITY_THRESHOLD,
+        "hit_rate": round(counts["hit"] / total, 4) if total else None,
+    }
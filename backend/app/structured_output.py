@@ -0,0 +1,143 @@
+import json
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+FENCE_RE = re.compile(r"```[a-zA-Z]*\s*(.*?)```", re.S)
+TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+LINE_COMMENT_RE = re.compile(r"^\s*//.*$", re.M)
+PY_LITERALS = {"True": "true", "False": "false", "None": "null"}
+NUMBER_RE = re.compile(r"-?\d+(?:\.\d+)?")
+RATIO_RE = re.compile(r"(-?\d+(?:\.\d+)?)\s*/\s*(\d+(?:\.\d+)?)")
+# Object starts tried per reply before giving up, bounding the work on long prose
+MAX_OBJECT_STARTS = 20
+
+
+def outermost_object(text, start=0):
+    """
+    Returns the balanced {...} span beginning at the first '{' at or after `start`, ignoring braces inside strings.
+
+    A reply cut off mid-object is closed with the missing braces.
+
+    Returns:
+        str or None: The object text, or None if there is no '{' from `start` on.
+    """
+    start = text.find("{", start)
+    if start == -1:
+        return None
+    depth, in_string, escaped = 0, False, False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    tail = text[start:].rstrip().rstrip(",")
+    return tail + ('"' if in_string else "") + "}" * depth
+
+
+def _repairs(candidate):
+    """
+    Yields progressively more aggressive rewrites of almost-JSON text.
+    """
+    yield candidate
+    text = candidate.replace("“", '"').replace("”", '"').replace("’", "'")
+    text = LINE_COMMENT_RE.sub("", text)
+    text = TRAILING_COMMA_RE.sub(r"\1", text)
+    text = re.sub(r"\b(True|False|None)\b", lambda m: PY_LITERALS[m.group(1)], text)
+    yield text
+    if '"' not in text:
+        # Python-style dict with single quotes
+        yield text.replace("'", '"')
+    # Unquoted keys
+    yield re.sub(r"([{,]\s*)([A-Za-z_][\w ]*?)\s*:", r'\1"\2":', text)
+
+
+def _parse_candidate(candidate, accept):
+    for attempt in _repairs(candidate):
+        try:
+            parsed = json.loads(attempt)
+        except json.JSONDecodeError:
+            continue
+        if accept(parsed):
+            return parsed
+    return None
+
+
+def extract_json(text, accept=None):
+    """
+    Extracts a JSON object from an LLM reply, tolerating common formatting slips.
+
+    Handles markdown fences, prose around the object (including stray braces
+    before it), trailing commas, comments, smart quotes, Python literals,
+    single quotes and truncated trailing braces. Each '{' is tried in turn
+    until an object parses and has the expected shape.
+
+    Args:
+        text (str): The raw reply.
+        accept (callable, optional): Predicate for the expected shape; defaults
+            to any JSON object.
+
+    Returns:
+        tuple: (parsed object or None, True if the reply was already strict JSON)
+    """
+    if not isinstance(text, str):
+        return None, False
+    try:
+        return json.loads(text), True
+    except json.JSONDecodeError:
+        pass
+
+    accept = accept or (lambda parsed: isinstance(parsed, dict))
+    fenced = FENCE_RE.search(text)
+    bodies = [fenced.group(1), text] if fenced else [text]
+    for body in bodies:
+        start = body.find("{")
+        for _ in range(MAX_OBJECT_STARTS):
+            if start == -1:
+                break
+            candidate = outermost_object(body, start)
+            parsed = _parse_candidate(candidate, accept)
+            if parsed is not None:
+                return parsed, False
+            start = body.find("{", start + 1)
+    return None, False
+
+
+def coerce_score(value):
+    """
+    Converts a score-like value to a float: numbers, numeric strings,
+    percentages ("72%") and ratios ("7/10" -> 70).
+
+    Returns:
+        float or None: The score, or None if the value is not numeric.
+    """
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        ratio = RATIO_RE.search(value)
+        if ratio and float(ratio.group(2)):
+            return float(ratio.group(1)) / float(ratio.group(2)) * 100
+        number = NUMBER_RE.search(value)
+        if number:
+            return float(number.group())
+    if isinstance(value, dict):
+        # e.g. {"score": 72, "reason": "..."}
+        for key in ("score", "value"):
+            if key in value:
+                return coerce_score(value[key])
+    return None
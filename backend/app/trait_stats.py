@@ -0,0 +1,167 @@
+import logging
+import math
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy.dialects import postgresql, sqlite
+from . import db
+from .models import AnswerScore, BIG_FIVE_COLUMNS, Candidate, TraitHistogramBin, TraitStat
+
+logger = logging.getLogger(__name__)
+
+HISTOGRAM_BINS = 10
+
+
+def score_bin(score):
+    """
+    Maps a 0-100 score to its 10-point histogram bin (0-9; 100 falls in bin 9).
+    """
+    return min(HISTOGRAM_BINS - 1, max(0, int(score // 10)))
+
+
+def _upsert(model, keys, increments):
+    """
+    Inserts a row or adds the increments to the existing row with the same keys.
+    """
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = insert(model).values(**keys, **increments)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={col: getattr(model, col) + stmt.excluded[col] for col in increments},
+        )
+        db.session.execute(stmt)
+        return
+
+    # Portable fallback for other backends
+    updated = model.query.filter_by(**keys).update(
+        {col: getattr(model, col) + value for col, value in increments.items()},
+        synchronize_session=False,
+    )
+    if not updated:
+        db.session.add(model(**keys, **increments))
+
+
+def _accumulate(scores, sign=1):
+    """
+    Sums (trait, score, created_at) tuples into per-day stat and histogram deltas.
+    """
+    stats = defaultdict(lambda: [0, 0.0, 0.0])
+    bins = defaultdict(int)
+    for trait, score, created_at in scores:
+        if trait is None or score is None:
+            continue
+        day = (created_at or datetime.utcnow()).date()
+        stat = stats[(trait, day)]
+        stat[0] += sign
+        stat[1] += sign * score
+        stat[2] += sign * score * score
+        bins[(trait, day, score_bin(score))] += sign
+    return stats, bins
+
+
+def answer_trait_scores(rows):
+    """
+    Unpacks (created_at, *Big Five values) answer_score rows into (trait, score, created_at) tuples.
+
+    The Big Five values must be in BIG_FIVE_COLUMNS order.
+    """
+    for created_at, *scores in rows:
+        for trait, score in zip(BIG_FIVE_COLUMNS, scores):
+            yield trait, score, created_at
+
+
+def record_trait_scores(scores, sign=1):
+    """
+    Folds trait scores into the materialized per-day aggregates.
+
+    Runs in the caller's transaction so aggregates commit together with the scores.
+
+    Args:
+        scores (iterable): (trait, score, created_at) tuples.
+        sign (int): 1 when scores are inserted, -1 when they are deleted.
+    """
+    stats, bins = _accumulate(scores, sign)
+    for (trait, day), (count, total, total_sq) in stats.items():
+        _upsert(TraitStat, {"trait": trait, "day": day},
+                {"count": count, "total": total, "total_sq": total_sq})
+    for (trait, day, bin_), count in bins.items():
+        _upsert(TraitHistogramBin, {"trait": trait, "day": day, "bin": bin_}, {"count": count})
+
+
+def trait_statistics(since=None, until=None):
+    """
+    Serves trait statistics from the materialized aggregates.
+
+    Args:
+        since (date, optional): First day to include.
+        until (date, optional): Last day to include.
+
+    Returns:
+        dict: trait -> {"count", "mean", "std", "histogram"} (histogram has 10 bin counts).
+    """
+    stat_query = db.session.query(
+        TraitStat.trait,
+        db.func.sum(TraitStat.count),
+        db.func.sum(TraitStat.total),
+        db.func.sum(TraitStat.total_sq),
+    ).group_by(TraitStat.trait)
+    bin_query = db.session.query(
+        TraitHistogramBin.trait, TraitHistogramBin.bin, db.func.sum(TraitHistogramBin.count)
+    ).group_by(TraitHistogramBin.trait, TraitHistogramBin.bin)
+    if since:
+        stat_query = stat_query.filter(TraitStat.day >= since)
+        bin_query = bin_query.filter(TraitHistogramBin.day >= since)
+    if until:
+        stat_query = stat_query.filter(TraitStat.day <= until)
+        bin_query = bin_query.filter(TraitHistogramBin.day <= until)
+
+    result = {}
+    for trait, count, total, total_sq in stat_query.all():
+        if not count:
+            continue
+        mean = total / count
+        variance = max(0.0, total_sq / count - mean * mean)
+        result[trait] = {
+            "count": int(count),
+            "mean": round(mean, 2),
+            "std": round(math.sqrt(variance), 2),
+            "histogram": [0] * HISTOGRAM_BINS,
+        }
+    for trait, bin_, count in bin_query.all():
+        if trait in result:
+            result[trait]["histogram"][bin_] = int(count)
+    return result
+
+
+def rebuild_trait_statistics(batch_size=10000):
+    """
+    Recomputes all aggregates from the existing answer_score rows.
+
+    Rows are streamed in batches, so memory is bounded by the number of
+    (trait, day, bin) buckets rather than by the table size. Rows without a
+    timestamp are bucketed on their candidate's creation day.
+
+    Returns:
+        int: Number of trait_stat rows written.
+    """
+    rows = db.session.query(
+        db.func.coalesce(AnswerScore.created_at, Candidate.created_at),
+        *(getattr(AnswerScore, column) for column in BIG_FIVE_COLUMNS.values()),
+    ).join(Candidate, Candidate.id == AnswerScore.candidate_id) \
+        .execution_options(yield_per=batch_size)
+    stats, bins = _accumulate(answer_trait_scores(rows))
+
+    TraitHistogramBin.query.delete()
+    TraitStat.query.delete()
+    db.session.bulk_insert_mappings(TraitStat, [
+        {"trait": trait, "day": day, "count": count, "total": total, "total_sq": total_sq}
+        for (trait, day), (count, total, total_sq) in stats.items()
+    ])
+    db.session.bulk_insert_mappings(TraitHistogramBin, [
+        {"trait": trait, "day": day, "bin": bin_, "count": count}
+        for (trait, day, bin_), count in bins.items()
+    ])
+    db.session.commit()
+    logger.info("Rebuilt trait statistics: %d stat rows, %d histogram rows", len(stats), len(bins))
+    return len(stats)
@@ -0,0 +1,327 @@
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import httpx
+from redis.exceptions import RedisError
+from . import metrics, redis_client
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+# Upstream statuses worth retrying: rate limited or temporarily failing
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+RATE_LIMIT_KEY = "ratelimit:openrouter"
+
+# Token bucket shared by every worker: refills at ARGV[1] tokens/s up to ARGV[2].
+# Takes one token and returns "0", or returns the seconds until a token is available.
+TAKE_TOKEN = redis_client.register_script("""
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(wait)
+""")
+
+
+class UpstreamUnavailable(Exception):
+    """
+    Raised without contacting OpenRouter when the circuit is open or no capacity frees up in time.
+    """
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Per-process circuit breaker for the upstream API.
+
+    Opens after `threshold` consecutive failures (5xx or transport errors) and
+    rejects calls for `cooldown` seconds; then lets a single probe through
+    (half-open) and closes again if it succeeds. A probe that never reports
+    back is given up on after `probe_timeout` seconds and another one is let
+    through.
+    """
+
+    def __init__(self, threshold, cooldown, probe_timeout=None):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.probe_timeout = cooldown if probe_timeout is None else probe_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._probe_started = None
+        self._lock = threading.Lock()
+
+    def _transition(self, state):
+        if state != self.state:
+            logger.warning("OpenRouter circuit %s -> %s", self.state, state)
+            metrics.inc("openrouter_circuit_transitions", state=state)
+            self.state = state
+
+    def allow(self):
+        """
+        Returns True if a call may be attempted now.
+        """
+        with self._lock:
+            if self.state == "open":
+                if time.monotonic() - self.opened_at < self.cooldown:
+                    return False
+                self._transition("half_open")
+            if self.state == "half_open":
+                if self._probing and time.monotonic() - self._probe_started < self.probe_timeout:
+                    return False
+                self._probing = True
+                self._probe_started = time.monotonic()
+            return True
+
+    def release_probe(self):
+        """
+        Frees the half-open probe slot when a call ends without an upstream verdict (e.g. it was cancelled).
+        """
+        with self._lock:
+            self._probing = False
+
+    def retry_after(self):
+        """
+        Seconds until the breaker will let a call (or the next probe) through.
+        """
+        with self._lock:
+            if self.state == "open":
+                return max(0.0, self.cooldown - (time.monotonic() - self.opened_at))
+            if self.state == "half_open" and self._probing:
+                # The probe's outcome decides; at the latest its slot is reclaimed after probe_timeout
+                return max(1.0, self.probe_timeout - (time.monotonic() - self._probe_started))
+            return 0
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._probing = False
+            # A late success from a call admitted before the circuit opened does not close it
+            if self.state != "open":
+                self._transition("closed")
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == "half_open" or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+                self._transition("open")
+
+    def snapshot(self):
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "retry_after": round(self.retry_after(), 2),
+        }
+
+
+breaker = CircuitBreaker(
+    Config.OPENROUTER_BREAKER_THRESHOLD,
+    Config.OPENROUTER_BREAKER_COOLDOWN,
+    # A probe is one attempt, so it has reported back by the request timeout
+    probe_timeout=Config.OPENROUTER_TIMEOUT,
+)
+
+# Per-process concurrency limit, one semaphore per event loop (asyncio primitives are loop-bound)
+_semaphore = None
+_semaphore_key = None
+_in_flight = 0
+
+
+def _get_semaphore():
+    global _semaphore, _semaphore_key
+    key = (os.getpid(), id(asyncio.get_running_loop()))
+    if _semaphore is None or _semaphore_key != key:
+        _semaphore = asyncio.Semaphore(Config.OPENROUTER_CONCURRENCY)
+        _semaphore_key = key
+    return _semaphore
+
+
+@asynccontextmanager
+async def slot():
+    """
+    Holds one of the process's OPENROUTER_CONCURRENCY upstream slots.
+
+    Raises:
+        UpstreamUnavailable: If no slot frees up within OPENROUTER_QUEUE_TIMEOUT.
+    """
+    global _in_flight
+    semaphore = _get_semaphore()
+    try:
+        await asyncio.wait_for(semaphore.acquire(), Config.OPENROUTER_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        metrics.inc("openrouter_requests", outcome="rejected_queue")
+        raise UpstreamUnavailable("Too many concurrent OpenRouter requests", retry_after=1)
+    _in_flight += 1
+    try:
+        yield
+    finally:
+        _in_flight -= 1
+        semaphore.release()
+
+
+async def take_token():
+    """
+    Waits for a token from the shared Redis bucket.
+
+    A Redis outage disables the limiter rather than failing requests.
+
+    Raises:
+        UpstreamUnavailable: If waiting would exceed OPENROUTER_RATE_MAX_WAIT.
+    """
+    if Config.OPENROUTER_RATE_LIMIT <= 0:
+        return
+    deadline = time.monotonic() + Config.OPENROUTER_RATE_MAX_WAIT
+    waited = 0.0
+    while True:
+        try:
+            wait = float(await asyncio.to_thread(
+                TAKE_TOKEN,
+                keys=[RATE_LIMIT_KEY],
+                args=[Config.OPENROUTER_RATE_LIMIT, Config.OPENROUTER_RATE_BURST],
+            ))
+        except RedisError as e:
+            logger.warning("Rate limiter unavailable, continuing without it: %s", e)
+            return
+        if wait <= 0:
+            if waited:
+                metrics.observe("openrouter_rate_limit_wait_seconds", waited)
+            return
+        if time.monotonic() + wait > deadline:
+            metrics.inc("openrouter_requests", outcome="rejected_rate")
+            raise UpstreamUnavailable("OpenRouter rate limit budget exhausted", retry_after=wait)
+        await asyncio.sleep(wait)
+        waited += wait
+
+
+def retry_delay(attempt, response=None):
+    """
+    Returns the delay before retry number `attempt` (0-based).
+
+    Honors a Retry-After header (seconds or HTTP date) when the upstream sent
+    one; otherwise uses full-jitter exponential backoff. Capped at
+    OPENROUTER_RETRY_MAX either way.
+    """
+    header = response.headers.get("Retry-After") if response is not None else None
+    if header:
+        try:
+            delay = float(header)
+        except ValueError:
+            try:
+                delay = (parsedate_to_datetime(header) - datetime.now(timezone.utc)).total_seconds()
+            except (TypeError, ValueError):
+                delay = None
+        if delay is not None:
+            return min(max(0.0, delay), Config.OPENROUTER_RETRY_MAX)
+    ceiling = min(Config.OPENROUTER_RETRY_MAX, Config.OPENROUTER_RETRY_BASE * 2 ** attempt)
+    return random.uniform(0, ceiling)
+
+
+async def call(send):
+    """
+    Sends an upstream request through the circuit breaker, rate limiter and retry policy.
+
+    Retries 429/5xx responses and transport errors (timeouts, connection
+    failures) up to OPENROUTER_MAX_RETRIES times. Other 4xx responses are
+    raised immediately.
+
+    Args:
+        send (callable): Coroutine function returning an httpx response;
+            called once per attempt.
+
+    Returns:
+        httpx.Response: The first successful response (for streamed requests,
+            the caller must close it).
+
+    Raises:
+        UpstreamUnavailable: If the circuit is open or the rate limit wait is too long.
+        httpx.HTTPStatusError: On a non-retryable status or once retries are exhausted.
+        httpx.TransportError: If the last attempt failed at the transport level.
+    """
+    attempts = Config.OPENROUTER_MAX_RETRIES + 1
+    for attempt in range(attempts):
+        # Token first: a half-open probe must not be stranded waiting on the limiter
+        await take_token()
+        if not breaker.allow():
+            metrics.inc("openrouter_requests", outcome="rejected_circuit")
+            raise UpstreamUnavailable("OpenRouter circuit is open", retry_after=breaker.retry_after())
+
+        response, error = None, None
+        try:
+            response = await send()
+        except httpx.TransportError as e:
+            error = e
+            breaker.record_failure()
+            metrics.inc("openrouter_attempts", status="transport_error")
+        except Exception:
+            breaker.record_failure()
+            metrics.inc("openrouter_attempts", status="error")
+            raise
+        except BaseException:
+            # Cancelled by a timeout or a winning hedge: no verdict on the upstream, but a probe must not stay claimed
+            breaker.release_probe()
+            raise
+        else:
+            if response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            metrics.inc("openrouter_attempts", status=str(response.status_code))
+
+        if response is not None and response.status_code not in RETRY_STATUSES:
+            if response.is_error:
+                await response.aclose()
+                metrics.inc("openrouter_requests", outcome="http_error")
+                response.raise_for_status()
+            metrics.inc("openrouter_requests", outcome="ok")
+            return response
+
+        if response is not None:
+            await response.aclose()
+        if attempt == attempts - 1:
+            metrics.inc("openrouter_requests", outcome="exhausted")
+            if error is not None:
+                raise error
+            response.raise_for_status()
+
+        delay = retry_delay(attempt, response)
+        reason = str(response.status_code) if response is not None else type(error).__name__
+        logger.warning("OpenRouter attempt %d failed (%s); retrying in %.2fs", attempt + 1, reason, delay)
+        metrics.inc("openrouter_retries", reason=reason)
+        await asyncio.sleep(delay)
+
+
+def upstream_state():
+    """
+    Returns the limiter, concurrency and circuit state of this process for monitoring.
+    """
+    return {
+        "circuit": breaker.snapshot(),
+        "in_flight": _in_flight,
+        "concurrency": Config.OPENROUTER_CONCURRENCY,
+        "rate_limit": {"rate": Config.OPENROUTER_RATE_LIMIT, "burst": Config.OPENROUTER_RATE_BURST},
+    }
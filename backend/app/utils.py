@@ -4,8 +4,6 @@ import io
 from flask_jwt_extended import create_access_token
 from datetime import timedelta
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 def generate_feedback_pdf(candidate_name, feedback_summary, scores):
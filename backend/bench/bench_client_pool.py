@@ -0,0 +1,70 @@
+"""
+Benchmark: a fresh httpx.AsyncClient per prompt vs the shared pooled client.
+
+Runs sequential prompts against the local fake OpenRouter server and
+reports per-request latency for both strategies.
+
+    python -m bench.bench_client_pool --requests 500
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from app.config import Config
+from app import openrouter_client
+from bench.fake_openrouter import start_server
+
+
+async def fresh_client_call(prompt):
+    # Mirrors the previous behaviour: one client (and TCP connection) per prompt
+    async with httpx.AsyncClient() as client:
+        response = await client.post(
+            Config.OPENROUTER_API_URL,
+            json={"model": Config.OPENROUTER_MODEL, "messages": [{"role": "user", "content": prompt}]},
+        )
+        response.raise_for_status()
+        return response.json()["choices"][0]["message"]["content"]
+
+
+async def time_calls(call, n):
+    samples = []
+    for i in range(n):
+        start = time.perf_counter()
+        await call(f"benchmark prompt {i}")
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def summarize(label, samples):
+    ordered = sorted(samples)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    print(f"{label:<14} mean={statistics.mean(samples):7.3f}ms "
+          f"p50={statistics.median(samples):7.3f}ms p95={p95:7.3f}ms")
+    return statistics.mean(samples)
+
+
+async def main(n):
+    server, url = start_server()
+    Config.OPENROUTER_API_URL = url
+    try:
+        # Warm up both paths once so imports and first-connection costs don't skew results
+        await fresh_client_call("warmup")
+        await openrouter_client.query_openrouter("warmup")
+
+        fresh = summarize("fresh client", await time_calls(fresh_client_call, n))
+        pooled = summarize("pooled client", await time_calls(openrouter_client.query_openrouter, n))
+        print(f"saved per request: {fresh - pooled:.3f}ms ({(1 - pooled / fresh) * 100:.1f}%) "
+              f"over {n} requests, plain TCP; TLS handshakes to OpenRouter widen the gap")
+    finally:
+        await openrouter_client.aclose_client()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=300)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
@@ -0,0 +1,124 @@
+"""
+Benchmark: logging cost of one /submit, before and after the queued pipeline.
+
+Replays the log calls a scored answer used to make (model and schema
+constructor logs, the full prompt at INFO, f-string messages, a synchronous
+StreamHandler from basicConfig) and the calls it makes now (three lazy
+%-style calls, one of them at DEBUG, through app.logging_config's queue handler, with the
+writer on a background thread). Both write to a real file so the old path
+pays for actual I/O, and reports the time the request thread spends logging.
+Sampling is off unless --sample is given, since it would drop most of the
+repeated records in a tight loop and flatter the new path.
+
+    python -m bench.bench_logging --requests 5000 [--sample]
+"""
+import argparse
+import logging
+import os
+import queue
+import statistics
+import tempfile
+import time
+from logging.handlers import QueueListener
+
+from app.logging_config import TEXT_FORMAT, DeferredQueueHandler, SamplingFilter
+
+PROMPT = "You are an expert personality assessor based on the Big Five and MBTI models. " * 20
+ANSWER = "In my last role I led a small team through a difficult migration and kept everyone informed."
+
+
+def old_submit(logger, i):
+    # Mirrors the previous per-answer log calls, formatted eagerly on the request thread
+    logger.info(f"Response created for candidate_id={i}")
+    logger.info(f"Stored response for candidate_id '{i}'")
+    logger.info("Sending prompt to LLM for analysis.")
+    logger.info("Sending request to OpenRouter API with prompt: %s", f"{PROMPT}\"{ANSWER}\"")
+    logger.info("HTTP Request: POST https://openrouter.ai/api/v1/chat/completions \"HTTP/1.1 200 OK\"")
+    logger.info("Received successful response from OpenRouter API.")
+    logger.info("Parsed LLM response (strict).")
+    for trait in ("Openness", "Conscientiousness", "Extraversion", "Agreeableness", "Neuroticism"):
+        logger.info(f"TraitScore created: candidate_id={i}, trait={trait}, score=50")
+    logger.info(f"Stored trait scores for candidate_id '{i}'")
+
+
+def new_submit(logger, i):
+    logger.info("Stored response for candidate_id '%s'", i)
+    logger.debug("Sending request to OpenRouter API (model=%s, prompt_chars=%d).", "openai/gpt-4o", len(PROMPT))
+    logger.info("Stored trait scores for candidate_id '%s'", i)
+
+
+def time_requests(submit, logger, n):
+    samples = []
+    for i in range(n):
+        start = time.perf_counter()
+        submit(logger, i)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return samples
+
+
+def summarize(label, samples, records):
+    ordered = sorted(samples)
+    p99 = ordered[int(len(ordered) * 0.99) - 1]
+    print(f"{label:<10} records/request={records:>3} mean={statistics.mean(samples):8.1f}us "
+          f"p50={statistics.median(samples):8.1f}us p99={p99:8.1f}us")
+    return statistics.mean(samples)
+
+
+def counted(handler):
+    count = [0]
+
+    def count_record(record):
+        count[0] += 1
+        return True
+
+    handler.addFilter(count_record)
+    return count
+
+
+def main(n, sample):
+    with tempfile.TemporaryDirectory() as tmp:
+        # Before: basicConfig's synchronous handler on the root logger
+        old_logger = logging.getLogger("bench.old")
+        old_logger.propagate = False
+        old_logger.setLevel(logging.INFO)
+        old_handler = logging.FileHandler(os.path.join(tmp, "old.log"))
+        old_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+        old_count = counted(old_handler)
+        old_logger.addHandler(old_handler)
+
+        # After: queue handler (sampled with --sample), records formatted and written by a listener thread
+        records = queue.SimpleQueue()
+        new_logger = logging.getLogger("bench.new")
+        new_logger.propagate = False
+        new_logger.setLevel(logging.INFO)
+        new_handler = DeferredQueueHandler(records)
+        if sample:
+            new_handler.addFilter(SamplingFilter(burst=50, window=10, every=100))
+        new_count = counted(new_handler)
+        new_logger.addHandler(new_handler)
+        writer = logging.FileHandler(os.path.join(tmp, "new.log"))
+        writer.setFormatter(logging.Formatter(TEXT_FORMAT))
+        listener = QueueListener(records, writer)
+        listener.start()
+
+        try:
+            # Warm up both paths so file creation and first-call costs don't skew results
+            old_submit(old_logger, 0)
+            new_submit(new_logger, 0)
+            old_count[0] = new_count[0] = 0
+
+            old = summarize("before", time_requests(old_submit, old_logger, n), old_count[0] / n)
+            new = summarize("after", time_requests(new_submit, new_logger, n), new_count[0] / n)
+            print(f"saved per request: {old - new:.1f}us ({(1 - new / old) * 100:.1f}%) over {n} requests")
+        finally:
+            listener.stop()
+            old_handler.close()
+            writer.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--sample", action="store_true", help="Apply the default sampling to the new path.")
+    args = parser.parse_args()
+    main(args.requests, args.sample)
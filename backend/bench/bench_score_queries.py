@@ -0,0 +1,154 @@
+"""
+Benchmark: score lookups with and without the candidate_id indexes.
+
+Seeds a database with --rows trait_score rows (plus the matching response
+and compact answer_score rows), times the queries the profile, compare and
+question routes run, then adds the indexes from migration f9a16ebf35fc and
+times them again.
+
+    python -m bench.bench_score_queries --rows 1000000
+
+Uses a throwaway SQLite file by default; pass --database-url to benchmark
+PostgreSQL (the target tables are dropped and recreated).
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+BIG_FIVE = ["Openness", "Conscientiousness", "Extraversion", "Agreeableness", "Neuroticism"]
+INDEXES = [
+    ("ix_trait_score_candidate_id_trait", "trait_score", "candidate_id, trait"),
+    ("ix_response_candidate_id_timestamp", "response", "candidate_id, timestamp"),
+    ("ix_answer_score_candidate_id_id", "answer_score", "candidate_id, id"),
+]
+
+
+def seed(db, rows, answers_per_candidate, batch=50000):
+    from app.models import AnswerScore, Candidate, Response, TraitScore
+
+    answers = rows // len(BIG_FIVE)
+    candidates = max(1, answers // answers_per_candidate)
+    start = datetime(2025, 1, 1)
+    rng = random.Random(42)
+
+    db.session.execute(Candidate.__table__.insert(), [
+        {"id": i, "name": f"Candidate {i}", "session_id": f"bench-{i}",
+         "created_at": start + timedelta(minutes=i)}
+        for i in range(1, candidates + 1)
+    ])
+    for offset in range(0, answers, batch):
+        ids = range(offset + 1, min(answers, offset + batch) + 1)
+        # Interleave candidates so each candidate's rows are spread across the table
+        owners = {i: (i - 1) % candidates + 1 for i in ids}
+        db.session.execute(Response.__table__.insert(), [
+            {"id": i, "candidate_id": owners[i], "question": "q", "answer": "a",
+             "timestamp": start + timedelta(seconds=i)}
+            for i in ids
+        ])
+        db.session.execute(TraitScore.__table__.insert(), [
+            {"candidate_id": owners[i], "trait": trait, "score": rng.uniform(0, 100),
+             "created_at": start + timedelta(seconds=i)}
+            for i in ids for trait in BIG_FIVE
+        ])
+        db.session.execute(AnswerScore.__table__.insert(), [
+            {"candidate_id": owners[i], "response_id": i, "openness": rng.uniform(0, 100),
+             "conscientiousness": rng.uniform(0, 100), "extraversion": rng.uniform(0, 100),
+             "agreeableness": rng.uniform(0, 100), "neuroticism": rng.uniform(0, 100)}
+            for i in ids
+        ])
+        db.session.commit()
+    return candidates
+
+
+def queries(db, candidates, rng):
+    from app.models import AnswerScore, Response, TraitScore
+
+    def profile():
+        cid = rng.randint(1, candidates)
+        TraitScore.query.filter_by(candidate_id=cid).all()
+
+    def compare():
+        ids = [rng.randint(1, candidates) for _ in range(100)]
+        db.session.query(TraitScore.candidate_id, TraitScore.trait, db.func.avg(TraitScore.score)) \
+            .filter(TraitScore.candidate_id.in_(ids)) \
+            .group_by(TraitScore.candidate_id, TraitScore.trait).all()
+
+    def recent_answers():
+        cid = rng.randint(1, candidates)
+        Response.query.filter_by(candidate_id=cid).order_by(Response.timestamp.desc()).limit(4).all()
+
+    def compact_profile():
+        cid = rng.randint(1, candidates)
+        AnswerScore.query.filter_by(candidate_id=cid).all()
+
+    return {
+        "profile (trait_score)": profile,
+        "compare 100 ids": compare,
+        "recent answers": recent_answers,
+        "profile (answer_score)": compact_profile,
+    }
+
+
+def time_queries(db, named, repeat):
+    results = {}
+    for name, fn in named.items():
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - start) * 1000)
+            db.session.rollback()
+        results[name] = statistics.median(samples)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="trait_score rows to seed")
+    parser.add_argument("--answers-per-candidate", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--database-url", default="sqlite:////tmp/bench_score_queries.db")
+    args = parser.parse_args()
+
+    if args.database_url.startswith("sqlite:////"):
+        path = args.database_url[len("sqlite:///"):]
+        if os.path.exists(path):
+            os.remove(path)
+    os.environ["DATABASE_URL"] = args.database_url
+
+    from app import create_app, db
+    from app.models import AnswerScore, Response, TraitScore
+
+    app = create_app()
+    with app.app_context():
+        tables = [AnswerScore.__table__, TraitScore.__table__, Response.__table__]
+        db.metadata.drop_all(db.engine, tables=tables)
+        db.create_all()
+        for name, _, _ in INDEXES:
+            db.session.execute(db.text(f"DROP INDEX IF EXISTS {name}"))
+        db.session.commit()
+
+        started = time.perf_counter()
+        candidates = seed(db, args.rows, args.answers_per_candidate)
+        print(f"seeded {args.rows} trait_score rows for {candidates} candidates "
+              f"in {time.perf_counter() - started:.1f}s")
+
+        named = queries(db, candidates, random.Random(7))
+        before = time_queries(db, named, args.repeat)
+
+        for name, table, columns in INDEXES:
+            db.session.execute(db.text(f"CREATE INDEX {name} ON {table} ({columns})"))
+        db.session.execute(db.text("ANALYZE"))
+        db.session.commit()
+        after = time_queries(db, named, args.repeat)
+
+    print(f"{'query':<24}{'no index':>12}{'indexed':>12}{'speedup':>10}")
+    for name in named:
+        print(f"{name:<24}{before[name]:>10.2f}ms{after[name]:>10.2f}ms{before[name] / after[name]:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
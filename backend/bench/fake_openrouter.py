@@ -0,0 +1,316 @@
+"""
+Deterministic local stand-in for the OpenRouter chat completions endpoint.
+
+Run it directly (python -m bench.fake_openrouter --port 8081) and point
+OPENROUTER_API_URL at http://127.0.0.1:8081/api/v1/chat/completions, or
+start it in-process from a benchmark with start_server(). Requests with
+"stream": true are answered as server-sent events like the real API.
+
+Latency, failures and malformed replies are drawn from a seeded RNG, so a
+given seed and request sequence behave the same run to run:
+
+    python -m bench.fake_openrouter --latency lognormal:0.8,0.5 \\
+        --model-latency openai/gpt-4o-mini=lognormal:0.3,0.4 \\
+        --error-rate 0.02 --throttle-rate 0.01 --malformed-rate 0.1
+
+Latency specs: a number (fixed seconds), fixed:S, uniform:LOW,HIGH,
+normal:MEAN,STD, lognormal:MEDIAN,SIGMA or exp:MEAN.
+"""
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ANALYSIS_REPLY = {
+    "BigFive": {
+        "Openness": 72, "Conscientiousness": 65, "Extraversion": 48,
+        "Agreeableness": 70, "Neuroticism": 35,
+    },
+    "MBTI": {
+        "Introversion": 55, "Extraversion": 45, "Sensing": 40, "Intuition": 60,
+        "Thinking": 52, "Feeling": 48, "Judging": 63, "Perceiving": 37,
+    },
+}
+
+BANK_TRAITS = {"BigFive": {"Conscientiousness": 0.6, "Agreeableness": 0.4}, "MBTI": {"Judging": 0.5}}
+
+# Ways a JSON reply gets mangled when malformed-JSON injection is on
+MALFORMATIONS = ("fenced", "prose", "trailing_comma", "truncated", "garbage")
+
+
+def parse_latency(spec):
+    """
+    Parses a latency spec into a function of a random.Random returning seconds.
+
+    Raises:
+        ValueError: If the spec is not understood.
+    """
+    spec = str(spec).strip()
+    kind, _, args = spec.partition(":")
+    try:
+        if not args:
+            value = float(kind)
+            return lambda rng: value
+        params = [float(a) for a in args.split(",")]
+        if kind == "fixed":
+            return lambda rng: params[0]
+        if kind == "uniform":
+            return lambda rng: rng.uniform(params[0], params[1])
+        if kind == "normal":
+            return lambda rng: max(0.0, rng.gauss(params[0], params[1]))
+        if kind == "lognormal":
+            return lambda rng: rng.lognormvariate(math.log(params[0]), params[1])
+        if kind == "exp":
+            return lambda rng: rng.expovariate(1 / params[0])
+    except (IndexError, ValueError, ZeroDivisionError):
+        pass
+    raise ValueError(f"Invalid latency spec: {spec!r}")
+
+
+def completion_body(content):
+    """
+    Wraps reply text in an OpenAI-style chat completion payload.
+    """
+    return {
+        "id": "fake-completion",
+        "object": "chat.completion",
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}}],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }
+
+
+def analysis_for(text):
+    """
+    Returns a stable analysis for an answer: the canned scores shifted by up to +/-10 per answer.
+    """
+    shift = zlib.crc32(text.encode("utf-8")) % 21 - 10
+    return {
+        block: {trait: min(100, max(0, score + shift)) for trait, score in scores.items()}
+        for block, scores in ANALYSIS_REPLY.items()
+    }
+
+
+def reply_for(prompt):
+    """
+    Picks a plausible canned reply for the prompt the app sent.
+    """
+    if "behavioral interview questions" in prompt:
+        match = re.search(r"Write (\d+)", prompt)
+        count = int(match.group(1)) if match else 3
+        topic = re.search(r"questions about ([\w ]+)\.", prompt)
+        topic = topic.group(1) if topic else "work"
+        return json.dumps({"questions": [
+            {"text": f"Tell us about situation {i + 1} where {topic} mattered in your work.", "traits": BANK_TRAITS}
+            for i in range(count)
+        ]})
+    if "was meant to be a JSON object" in prompt:
+        return json.dumps(ANALYSIS_REPLY)
+    if "Big Five" in prompt:
+        batch = re.findall(r"^\[(\w+)\] \"(.*)\"$", prompt, flags=re.MULTILINE)
+        if batch:
+            return json.dumps({answer_id: analysis_for(answer) for answer_id, answer in batch})
+        return json.dumps(analysis_for(prompt.rsplit("Candidate Answer:", 1)[-1]))
+    if "behavioral question" in prompt:
+        return "Tell me about a time you resolved a conflict within your team."
+    return "The candidate is open, organised and works well with others."
+
+
+def malform(content, kind):
+    """
+    Mangles a JSON reply the way real models sometimes do.
+    """
+    if kind == "fenced":
+        return f"Here is the analysis:\n```json\n{json.dumps(json.loads(content), indent=2)}\n```"
+    if kind == "prose":
+        return f"Sure! Based on the answer, {content} Let me know if you need more detail."
+    if kind == "trailing_comma":
+        return re.sub(r"(\d)(\s*})", r"\1,\2", content, count=1)
+    if kind == "truncated":
+        return content[:int(len(content) * 0.8)]
+    return "I'm sorry, I can't provide a personality assessment from this answer."
+
+
+class FakeOpenRouterHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so clients can keep connections alive between requests
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    latency = staticmethod(parse_latency(0))
+    model_latency = {}
+    chunk_delay = 0.0
+    error_rate = 0.0
+    throttle_rate = 0.0
+    malformed_rate = 0.0
+    rng = random.Random(0)
+    rng_lock = threading.Lock()
+    stats = None
+
+    def draw(self, model):
+        """
+        Draws this request's latency and fate from the shared seeded RNG.
+        """
+        with self.rng_lock:
+            latency = self.model_latency.get(model, self.latency)(self.rng)
+            roll = self.rng.random()
+            malformed = self.rng.random() < self.malformed_rate
+            kind = self.rng.choice(MALFORMATIONS)
+        if roll < self.error_rate:
+            fate = "error"
+        elif roll < self.error_rate + self.throttle_rate:
+            fate = "throttled"
+        else:
+            fate = "malformed" if malformed else "ok"
+        return latency, fate, kind
+
+    def count(self, fate):
+        if self.stats is not None:
+            with self.rng_lock:
+                self.stats[fate] = self.stats.get(fate, 0) + 1
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        prompt = payload.get("messages", [{}])[-1].get("content", "")
+        latency, fate, kind = self.draw(payload.get("model"))
+        if latency:
+            time.sleep(latency)
+        self.count(fate)
+
+        if fate == "error":
+            self.send_json(500, {"error": {"message": "Injected upstream error", "code": 500}})
+            return
+        if fate == "throttled":
+            self.send_json(429, {"error": {"message": "Injected rate limit", "code": 429}}, {"Retry-After": "1"})
+            return
+
+        content = reply_for(prompt)
+        if fate == "malformed" and content.startswith("{"):
+            content = malform(content, kind)
+        if payload.get("stream"):
+            self.stream_reply(content)
+            return
+        self.send_json(200, completion_body(content))
+
+    def send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def write_chunk(self, data):
+        # HTTP/1.1 chunked transfer encoding, so the client sees each event as it is sent
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def stream_reply(self, content):
+        """
+        Sends the reply as OpenAI-style server-sent events, one word per chunk.
+        """
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        self.write_chunk(b": OPENROUTER PROCESSING\n\n")
+        for word in content.split(" "):
+            delta = {"choices": [{"index": 0, "delta": {"content": word + " "}}]}
+            self.write_chunk(f"data: {json.dumps(delta)}\n\n".encode())
+            if self.chunk_delay:
+                time.sleep(self.chunk_delay)
+        self.write_chunk(b"data: [DONE]\n\n")
+        self.write_chunk(b"")
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_handler(latency=0.0, chunk_delay=0.0, model_latency=None, error_rate=0.0,
+                 throttle_rate=0.0, malformed_rate=0.0, seed=0):
+    """
+    Builds a handler class with its own behaviour, RNG and outcome counters.
+
+    Args:
+        latency (float or str): Default latency spec (see module docstring).
+        chunk_delay (float): Delay between streamed chunks in seconds.
+        model_latency (dict, optional): Model name -> latency spec overrides.
+        error_rate (float): Share of requests answered with a 500.
+        throttle_rate (float): Share answered with a 429 and Retry-After.
+        malformed_rate (float): Share of JSON replies mangled (fences, prose,
+            trailing commas, truncation or no JSON at all).
+        seed (int): RNG seed.
+    """
+    return type("Handler", (FakeOpenRouterHandler,), {
+        "latency": staticmethod(parse_latency(latency)),
+        "model_latency": {m: parse_latency(s) for m, s in (model_latency or {}).items()},
+        "chunk_delay": chunk_delay,
+        "error_rate": error_rate,
+        "throttle_rate": throttle_rate,
+        "malformed_rate": malformed_rate,
+        "rng": random.Random(seed),
+        "rng_lock": threading.Lock(),
+        "stats": {},
+    })
+
+
+def start_server(host="127.0.0.1", port=0, **behaviour):
+    """
+    Starts the fake server on a background thread.
+
+    Args:
+        host (str): Interface to bind.
+        port (int): Port to bind; 0 picks a free one.
+        **behaviour: Passed to make_handler (latency, chunk_delay, error_rate, ...).
+
+    Returns:
+        tuple: (server, completions URL); server.RequestHandlerClass.stats
+            counts requests by outcome.
+    """
+    server = ThreadingHTTPServer((host, port), make_handler(**behaviour))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://{host}:{server.server_address[1]}/api/v1/chat/completions"
+    return server, url
+
+
+def add_behaviour_arguments(parser):
+    """
+    Adds the mock's behaviour options to an argparse parser (shared with the load test).
+    """
+    parser.add_argument("--latency", default="0", help="Latency spec for every model.")
+    parser.add_argument("--model-latency", action="append", default=[], metavar="MODEL=SPEC",
+                        help="Latency spec for one model (repeatable).")
+    parser.add_argument("--chunk-delay", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def behaviour_from_args(args):
+    return {
+        "latency": args.latency,
+        "model_latency": dict(item.split("=", 1) for item in args.model_latency),
+        "chunk_delay": args.chunk_delay,
+        "error_rate": args.error_rate,
+        "throttle_rate": args.throttle_rate,
+        "malformed_rate": args.malformed_rate,
+        "seed": args.seed,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    add_behaviour_arguments(parser)
+    args = parser.parse_args()
+    handler = make_handler(**behaviour_from_args(args))
+    print(f"Fake OpenRouter listening on http://{args.host}:{args.port}/api/v1/chat/completions")
+    ThreadingHTTPServer((args.host, args.port), handler).serve_forever()
@@ -0,0 +1,280 @@
+"""
+End-to-end load test: realistic candidate sessions against the API.
+
+Each virtual candidate runs /start, then --answers rounds of
+/generate-question + /submit (polling the scoring job, as the frontend
+does), then /profile and the feedback PDF (polling through 202s while the
+worker renders it). Prints throughput and
+p50/p95/p99 latency per route. --save writes the report as a baseline;
+--baseline compares against one and exits non-zero when a route's p95
+(or overall throughput) regressed by more than --tolerance.
+
+    python -m bench.load_test --candidates 50 --concurrency 10 --answers 5 \\
+        --latency lognormal:0.6,0.4 --error-rate 0.01 --malformed-rate 0.05 \\
+        --save bench/baseline.json
+
+By default the app is served in-process (threaded werkzeug server plus a job
+worker thread) against the DATABASE_URL and REDIS_URL from the environment,
+with OpenRouter replaced by the in-process mock (see bench.fake_openrouter
+for the latency/error options). Pass --base-url to drive an already running
+deployment instead; start its mock with python -m bench.fake_openrouter and
+point that deployment's OPENROUTER_API_URL at it.
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+from bench.fake_openrouter import add_behaviour_arguments, behaviour_from_args, start_server
+
+OPENERS = [
+    "In my last role I led a small team through a difficult migration.",
+    "When a teammate and I disagreed about priorities, I asked to talk it through in person.",
+    "I tend to plan my week carefully and keep a written list of what matters most.",
+    "At university I organised a volunteering project with twenty other students.",
+    "Once a client was unhappy with a delivery we had made late.",
+    "I prefer to think a problem through on my own before bringing it to the group.",
+]
+DETAILS = [
+    "I listened to everyone first and then proposed a compromise we could all accept.",
+    "I broke the work into smaller steps and checked in with people every few days.",
+    "It was stressful, but I stayed calm and focused on what we could control.",
+    "I tried a new approach I had read about, and it worked better than expected.",
+    "Looking back, I would ask for help earlier next time.",
+    "We finished on time and the relationship with the client actually improved.",
+]
+
+# Timings that are not single requests; left out of the request throughput
+PSEUDO_ROUTES = {"pdf ready", "session"}
+
+
+def make_answer(rng):
+    """
+    Builds a plausible answer; the small phrase pool yields realistic near-duplicates across candidates.
+    """
+    return " ".join([rng.choice(OPENERS)] + rng.sample(DETAILS, rng.randint(1, 3)))
+
+
+def percentile(ordered, q):
+    """
+    Nearest-rank percentile of an ascending list (q in 0-100).
+    """
+    if not ordered:
+        return None
+    rank = max(1, int(round(q / 100 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class Recorder:
+    """
+    Thread-safe collector of per-route latencies and errors.
+    """
+
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+        self._lock = threading.Lock()
+
+    def record(self, route, seconds, ok):
+        with self._lock:
+            self.samples.setdefault(route, []).append(seconds)
+            if not ok:
+                self.errors[route] = self.errors.get(route, 0) + 1
+
+    def report(self, elapsed):
+        routes = {}
+        for route, samples in sorted(self.samples.items()):
+            ordered = sorted(samples)
+            routes[route] = {
+                "requests": len(ordered),
+                "errors": self.errors.get(route, 0),
+                "rps": round(len(ordered) / elapsed, 2),
+                **{f"p{q}_ms": round(percentile(ordered, q) * 1000, 1) for q in (50, 95, 99)},
+            }
+        total = sum(r["requests"] for name, r in routes.items() if name not in PSEUDO_ROUTES)
+        return {
+            "elapsed_s": round(elapsed, 2),
+            "throughput_rps": round(total / elapsed, 2),
+            "routes": routes,
+        }
+
+
+def timed(recorder, route, call, ok_statuses=(200,)):
+    started = time.perf_counter()
+    try:
+        response = call()
+    except httpx.HTTPError:
+        recorder.record(route, time.perf_counter() - started, False)
+        return None
+    recorder.record(route, time.perf_counter() - started, response.status_code in ok_statuses)
+    return response
+
+
+def wait_for_job(client, status_url, args, recorder):
+    """
+    Polls a queued job like the frontend does and records the time until it finished.
+    """
+    started = time.perf_counter()
+    deadline = started + args.timeout
+    status = None
+    while time.perf_counter() < deadline:
+        response = timed(recorder, "GET /jobs", lambda: client.get(status_url))
+        status = response.json().get("status") if response is not None and response.status_code == 200 else None
+        if status in (None, "done", "failed"):
+            break
+        time.sleep(0.05)
+    recorder.record("answer scored", time.perf_counter() - started, status == "done")
+
+
+def run_session(base_url, index, args, recorder):
+    """
+    Runs one candidate's full assessment and records every request.
+    """
+    rng = random.Random(args.seed * 100003 + index)
+    started = time.perf_counter()
+    with httpx.Client(base_url=base_url, timeout=args.timeout) as client:
+        response = timed(recorder, "POST /start", lambda: client.post("/start", json={"name": f"Load {index}"}))
+        if response is None or response.status_code != 200:
+            return
+        session_id = response.json()["session_id"]
+
+        for _ in range(args.answers):
+            response = timed(recorder, "POST /generate-question",
+                             lambda: client.post("/generate-question", json={"session_id": session_id}))
+            question = response.json().get("next_question") if response is not None and response.status_code == 200 else None
+            if not question:
+                break
+            response = timed(recorder, "POST /submit", lambda: client.post("/submit", json={
+                "session_id": session_id, "question": question, "answer": make_answer(rng),
+            }), ok_statuses=(200, 202))
+            if response is not None and response.status_code == 202:
+                wait_for_job(client, response.json()["status_url"], args, recorder)
+
+        timed(recorder, "GET /profile", lambda: client.get(f"/profile/{session_id}"))
+
+        # The PDF may still be rendering: follow 202s like a client would, and record the total wait too
+        pdf_started = time.perf_counter()
+        deadline = pdf_started + args.pdf_timeout
+        while time.perf_counter() < deadline:
+            response = timed(recorder, "GET /candidate/feedback-pdf",
+                             lambda: client.get(f"/candidate/feedback-pdf/{session_id}"), ok_statuses=(200, 202))
+            if response is None or response.status_code != 202:
+                break
+            time.sleep(float(response.headers.get("Retry-After", 1)))
+        recorder.record("pdf ready", time.perf_counter() - pdf_started,
+                        response is not None and response.status_code == 200)
+    recorder.record("session", time.perf_counter() - started, True)
+
+
+def serve_in_process(args):
+    """
+    Starts the app (and a job worker) in this process against the mock OpenRouter.
+
+    Returns:
+        tuple: (base URL, stop callable, mock server)
+    """
+    from werkzeug.serving import make_server
+    from app import create_app
+    from app.config import Config
+    from app.jobs import Worker
+
+    mock, url = start_server(**behaviour_from_args(args))
+    Config.OPENROUTER_API_URL = url
+    app = create_app()
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    worker = Worker(app)
+    threading.Thread(target=lambda: asyncio.run(worker.run()), daemon=True).start()
+
+    def stop():
+        worker.stop()
+        server.shutdown()
+        mock.shutdown()
+
+    return f"http://127.0.0.1:{server.server_port}", stop, mock
+
+
+def compare(report, baseline, tolerance):
+    """
+    Lists regressions of per-route p95 latency and overall throughput against a baseline report.
+    """
+    regressions = []
+    for route, base in baseline["routes"].items():
+        current = report["routes"].get(route)
+        if current and current["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{route}: p95 {base['p95_ms']}ms -> {current['p95_ms']}ms")
+    if report["throughput_rps"] < baseline["throughput_rps"] * (1 - tolerance):
+        regressions.append(f"throughput {baseline['throughput_rps']} -> {report['throughput_rps']} req/s")
+    return regressions
+
+
+def print_report(report):
+    print(f"{'route':<30} {'requests':>8} {'errors':>6} {'req/s':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for route, r in report["routes"].items():
+        print(f"{route:<30} {r['requests']:>8} {r['errors']:>6} {r['rps']:>7} "
+              f"{r['p50_ms']:>9} {r['p95_ms']:>9} {r['p99_ms']:>9}")
+    print(f"throughput: {report['throughput_rps']} req/s over {report['elapsed_s']}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default=None, help="Drive a running deployment instead of serving in-process.")
+    parser.add_argument("--candidates", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--answers", type=int, default=5, help="Question/answer rounds per candidate.")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout in seconds.")
+    parser.add_argument("--pdf-timeout", type=float, default=60.0, help="How long a candidate waits for the PDF.")
+    parser.add_argument("--save", default=None, help="Write the report as JSON (a new baseline).")
+    parser.add_argument("--baseline", default=None, help="Compare against a saved report.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression (0.2 = 20%%).")
+    add_behaviour_arguments(parser)
+    args = parser.parse_args()
+
+    mock, stop = None, None
+    base_url = args.base_url
+    if base_url is None:
+        base_url, stop, mock = serve_in_process(args)
+
+    recorder = Recorder()
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            for future in [pool.submit(run_session, base_url, i, args, recorder) for i in range(args.candidates)]:
+                future.result()
+    finally:
+        elapsed = time.perf_counter() - started
+        if stop:
+            stop()
+
+    report = recorder.report(elapsed)
+    report["settings"] = {
+        "candidates": args.candidates, "concurrency": args.concurrency, "answers": args.answers,
+        **{k: v for k, v in behaviour_from_args(args).items()},
+    }
+    if mock is not None:
+        report["mock_outcomes"] = dict(mock.RequestHandlerClass.stats)
+    print_report(report)
+    if mock is not None:
+        print(f"mock OpenRouter outcomes: {report['mock_outcomes']}")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Add materialized trait statistics
+
+Revision ID: 4e7253372356
+Revises: dcfaa97dc7c1
+Create Date: 2026-10-17 11:02:17.530871
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4e7253372356'
+down_revision = 'dcfaa97dc7c1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('trait_score', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('created_at', sa.DateTime(), nullable=True))
+
+    op.create_table('trait_stat',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('trait', sa.String(length=50), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.Column('total', sa.Float(), nullable=False),
+    sa.Column('total_sq', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('trait', 'day')
+    )
+    op.create_table('trait_histogram_bin',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('trait', sa.String(length=50), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('bin', sa.Integer(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('trait', 'day', 'bin')
+    )
+
+
+def downgrade():
+    op.drop_table('trait_histogram_bin')
+    op.drop_table('trait_stat')
+    with op.batch_alter_table('trait_score', schema=None) as batch_op:
+        batch_op.drop_column('created_at')
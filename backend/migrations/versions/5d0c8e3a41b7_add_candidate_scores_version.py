@@ -0,0 +1,26 @@
+"""Add scores version to candidate
+
+Revision ID: 5d0c8e3a41b7
+Revises: b83e5d21c7a4
+Create Date: 2026-10-17 16:20:11.482910
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d0c8e3a41b7'
+down_revision = 'b83e5d21c7a4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('candidate', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('scores_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('candidate', schema=None) as batch_op:
+        batch_op.drop_column('scores_version')
@@ -0,0 +1,33 @@
+"""Add history tokens to candidate
+
+Revision ID: 7a2f4c9d1e60
+Revises: 5d0c8e3a41b7
+Create Date: 2026-10-17 18:05:42.117305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a2f4c9d1e60'
+down_revision = '5d0c8e3a41b7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('candidate', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('history_tokens', sa.Integer(), nullable=False, server_default='0'))
+
+    # Backfill from the answers already stored (about four characters per token)
+    op.execute(
+        "UPDATE candidate SET history_tokens = COALESCE(("
+        "SELECT SUM((LENGTH(response.answer) + 3) / 4) FROM response "
+        "WHERE response.candidate_id = candidate.id AND response.answer IS NOT NULL), 0)"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('candidate', schema=None) as batch_op:
+        batch_op.drop_column('history_tokens')
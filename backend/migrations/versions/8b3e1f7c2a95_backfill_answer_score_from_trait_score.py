@@ -0,0 +1,83 @@
+"""Backfill answer_score from legacy trait_score rows
+
+Revision ID: 8b3e1f7c2a95
+Revises: 7a2f4c9d1e60
+Create Date: 2026-10-17 18:40:03.528114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b3e1f7c2a95'
+down_revision = '7a2f4c9d1e60'
+branch_labels = None
+depends_on = None
+
+BIG_FIVE_COLUMNS = {
+    "Openness": "openness",
+    "Conscientiousness": "conscientiousness",
+    "Extraversion": "extraversion",
+    "Agreeableness": "agreeableness",
+    "Neuroticism": "neuroticism",
+}
+
+trait_score = sa.table(
+    'trait_score',
+    sa.column('id', sa.Integer), sa.column('candidate_id', sa.Integer), sa.column('trait', sa.String),
+    sa.column('score', sa.Float), sa.column('created_at', sa.DateTime),
+)
+answer_score = sa.table(
+    'answer_score',
+    sa.column('id', sa.Integer), sa.column('candidate_id', sa.Integer), sa.column('response_id', sa.Integer),
+    sa.column('created_at', sa.DateTime), sa.column('mbti_introversion', sa.Float),
+    *(sa.column(column, sa.Float) for column in BIG_FIVE_COLUMNS.values()),
+)
+
+
+def upgrade():
+    # trait_score rows written alongside an answer_score row share its (candidate_id, created_at);
+    # the others predate answer_score. As in the old profile fallback, the k-th row of each trait
+    # of a candidate is taken to be that candidate's k-th answer.
+    bind = op.get_bind()
+    paired = sa.exists().where(
+        answer_score.c.candidate_id == trait_score.c.candidate_id,
+        answer_score.c.created_at == trait_score.c.created_at,
+    )
+    legacy = bind.execute(
+        sa.select(trait_score.c.candidate_id, trait_score.c.trait, trait_score.c.score, trait_score.c.created_at)
+        .where(~paired)
+        .order_by(trait_score.c.candidate_id, trait_score.c.id)
+    )
+
+    answers, seen = {}, {}
+    for candidate_id, trait, score, created_at in legacy:
+        column = BIG_FIVE_COLUMNS.get(trait)
+        if column is None:
+            continue
+        rows = answers.setdefault(candidate_id, [])
+        position = seen.get((candidate_id, column), 0)
+        seen[(candidate_id, column)] = position + 1
+        if position == len(rows):
+            rows.append({"candidate_id": candidate_id, "response_id": None, "created_at": created_at})
+        rows[position][column] = score
+
+    batch = []
+    for rows in answers.values():
+        for row in rows:
+            batch.append({column: row.get(column) for column in
+                          ("candidate_id", "response_id", "created_at", *BIG_FIVE_COLUMNS.values())})
+            if len(batch) >= 10000:
+                bind.execute(answer_score.insert(), batch)
+                batch = []
+    if batch:
+        bind.execute(answer_score.insert(), batch)
+
+
+def downgrade():
+    # Backfilled rows are the only ones with neither a response nor MBTI scores
+    op.get_bind().execute(answer_score.delete().where(
+        answer_score.c.response_id.is_(None),
+        answer_score.c.mbti_introversion.is_(None),
+    ))
@@ -0,0 +1,28 @@
+"""Add candidate listing indexes
+
+Revision ID: 90c2d6553691
+Revises: 4e7253372356
+Create Date: 2026-10-17 11:48:03.274415
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '90c2d6553691'
+down_revision = '4e7253372356'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Keyset pagination on (created_at, id) and name-prefix search
+    op.create_index('ix_candidate_created_at_id', 'candidate', ['created_at', 'id'], unique=False)
+    op.create_index('ix_candidate_name', 'candidate', ['name'], unique=False,
+                    postgresql_ops={'name': 'varchar_pattern_ops'})
+
+
+def downgrade():
+    op.drop_index('ix_candidate_name', table_name='candidate')
+    op.drop_index('ix_candidate_created_at_id', table_name='candidate')
@@ -0,0 +1,34 @@
+"""Add question bank
+
+Revision ID: b83e5d21c7a4
+Revises: f9a16ebf35fc
+Create Date: 2026-10-17 15:41:07.503318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b83e5d21c7a4'
+down_revision = 'f9a16ebf35fc'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('bank_question',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('text', sa.Text(), nullable=False),
+    sa.Column('topic', sa.String(length=50), nullable=True),
+    sa.Column('traits', sa.JSON(), nullable=False),
+    sa.Column('source', sa.String(length=20), nullable=True),
+    sa.Column('active', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('text')
+    )
+
+
+def downgrade():
+    op.drop_table('bank_question')
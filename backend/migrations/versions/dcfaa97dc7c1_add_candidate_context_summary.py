@@ -0,0 +1,28 @@
+"""Add rolling context summary to candidate
+
+Revision ID: dcfaa97dc7c1
+Revises: 3c7443fb1fa3
+Create Date: 2026-10-17 10:12:40.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'dcfaa97dc7c1'
+down_revision = '3c7443fb1fa3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('candidate', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('context_summary', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('summarized_upto', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('candidate', schema=None) as batch_op:
+        batch_op.drop_column('summarized_upto')
+        batch_op.drop_column('context_summary')
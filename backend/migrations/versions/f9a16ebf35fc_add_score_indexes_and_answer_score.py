@@ -0,0 +1,54 @@
+"""Add score lookup indexes and compact answer_score table
+
+Revision ID: f9a16ebf35fc
+Revises: 90c2d6553691
+Create Date: 2026-10-17 12:20:44.861092
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f9a16ebf35fc'
+down_revision = '90c2d6553691'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Profile, compare, feedback and PDF routes all filter on these columns
+    op.create_index('ix_trait_score_candidate_id_trait', 'trait_score', ['candidate_id', 'trait'], unique=False)
+    op.create_index('ix_response_candidate_id_timestamp', 'response', ['candidate_id', 'timestamp'], unique=False)
+
+    # One row per analyzed answer holding every Big Five and MBTI value
+    op.create_table('answer_score',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('candidate_id', sa.Integer(), nullable=False),
+    sa.Column('response_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('openness', sa.Float(), nullable=True),
+    sa.Column('conscientiousness', sa.Float(), nullable=True),
+    sa.Column('extraversion', sa.Float(), nullable=True),
+    sa.Column('agreeableness', sa.Float(), nullable=True),
+    sa.Column('neuroticism', sa.Float(), nullable=True),
+    sa.Column('mbti_introversion', sa.Float(), nullable=True),
+    sa.Column('mbti_extraversion', sa.Float(), nullable=True),
+    sa.Column('mbti_sensing', sa.Float(), nullable=True),
+    sa.Column('mbti_intuition', sa.Float(), nullable=True),
+    sa.Column('mbti_thinking', sa.Float(), nullable=True),
+    sa.Column('mbti_feeling', sa.Float(), nullable=True),
+    sa.Column('mbti_judging', sa.Float(), nullable=True),
+    sa.Column('mbti_perceiving', sa.Float(), nullable=True),
+    sa.ForeignKeyConstraint(['candidate_id'], ['candidate.id'], ),
+    sa.ForeignKeyConstraint(['response_id'], ['response.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_answer_score_candidate_id_id', 'answer_score', ['candidate_id', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_answer_score_candidate_id_id', table_name='answer_score')
+    op.drop_table('answer_score')
+    op.drop_index('ix_response_candidate_id_timestamp', table_name='response')
+    op.drop_index('ix_trait_score_candidate_id_trait', table_name='trait_score')
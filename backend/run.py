@@ -1,11 +1,6 @@
 import logging
 from app import create_app
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s %(levelname)s %(name)s %(message)s'
-)
 logger = logging.getLogger(__name__)
 
 # Create the Flask app using the factory pattern
@@ -0,0 +1,27 @@
+from app import personality_engine
+from app.personality_engine import analysis_cache_key, normalize_answer, similarity_scope
+
+
+def test_normalize_answer_ignores_case_and_whitespace():
+    assert normalize_answer("  I LEAD\tsmall\n teams ") == "i lead small teams"
+
+
+def test_cache_key_matches_reformatted_answer():
+    key = analysis_cache_key("I lead small teams.", model="model-a")
+    assert analysis_cache_key("  i LEAD small\nteams. ", model="model-a") == key
+    assert analysis_cache_key("I lead large teams.", model="model-a") != key
+
+
+def test_cache_key_depends_on_model_and_prompt_version(monkeypatch):
+    key = analysis_cache_key("I lead small teams.", model="model-a")
+    assert analysis_cache_key("I lead small teams.", model="model-b") != key
+
+    monkeypatch.setattr(personality_engine, "PROMPT_VERSION", "next")
+    assert analysis_cache_key("I lead small teams.", model="model-a") != key
+
+
+def test_cache_key_defaults_to_primary_model(monkeypatch):
+    monkeypatch.setattr(personality_engine, "primary_model", lambda task: "model-a")
+    assert analysis_cache_key("I lead small teams.") == analysis_cache_key("I lead small teams.", model="model-a")
+    assert similarity_scope("Tell me about a conflict.") == similarity_scope("Tell me about a conflict.", "model-a")
+    assert similarity_scope("Tell me about a conflict.") != similarity_scope("Tell me about a conflict.", "model-b")
@@ -0,0 +1,23 @@
+import base64
+from datetime import datetime
+import pytest
+from app.candidate_queries import InvalidCursor, decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2026, 3, 14, 15, 9, 26, 535897)
+    cursor = encode_cursor(created_at, 42)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, 42)
+
+
+@pytest.mark.parametrize("raw", ["not a cursor", "2026-03-14T15:09:26", "2026-03-14T15:09:26|x", "a|b|c"])
+def test_malformed_cursor_is_rejected(raw):
+    cursor = base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
+
+
+def test_undecodable_cursor_is_rejected():
+    with pytest.raises(InvalidCursor):
+        decode_cursor("%%%")
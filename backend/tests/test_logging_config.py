@@ -0,0 +1,54 @@
+import logging
+from app import logging_config, metrics
+from app.config import Config
+from app.logging_config import Redacted, SamplingFilter
+
+
+def record(msg, level=logging.INFO, name="app.test"):
+    return logging.LogRecord(name, level, __file__, 1, msg, ("x",), None)
+
+
+def test_redacted_hides_content_by_default(monkeypatch):
+    monkeypatch.setattr(Config, "LOG_INCLUDE_CONTENT", False)
+    rendered = str(Redacted("I was fired for arguing with my manager."))
+    assert "manager" not in rendered
+    assert rendered.startswith("<redacted 40 chars sha256:")
+    assert rendered == str(Redacted("I was fired for arguing with my manager."))
+    assert str(Redacted(None)).startswith("<redacted 0 chars")
+
+
+def test_redacted_passes_content_through_when_enabled(monkeypatch):
+    monkeypatch.setattr(Config, "LOG_INCLUDE_CONTENT", True)
+    assert "%s" % Redacted("an answer") == "an answer"
+
+
+def test_sampling_passes_burst_then_one_in_every():
+    sampler = SamplingFilter(burst=2, window=60, every=3)
+    passed = [sampler.filter(record("Stored response for %s")) for _ in range(8)]
+    assert passed == [True, True, False, False, True, False, False, True]
+    # Templates are sampled independently
+    assert sampler.filter(record("Generated question for %s"))
+
+
+def test_sampling_counts_dropped_records(monkeypatch):
+    dropped = []
+    monkeypatch.setattr(metrics, "inc", lambda name, **labels: dropped.append((name, labels)))
+    sampler = SamplingFilter(burst=1, window=60, every=0)
+    for _ in range(3):
+        sampler.filter(record("Cache hit for %s"))
+    assert dropped == [("log_records_sampled", {"logger": "app.test"})] * 2
+
+
+def test_warnings_are_never_sampled():
+    sampler = SamplingFilter(burst=1, window=60, every=0)
+    assert all(sampler.filter(record("Upstream slow: %s", logging.WARNING)) for _ in range(5))
+
+
+def test_window_resets_the_burst(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(logging_config.time, "monotonic", lambda: now[0])
+    sampler = SamplingFilter(burst=1, window=10, every=0)
+    assert sampler.filter(record("Tick %s"))
+    assert not sampler.filter(record("Tick %s"))
+    now[0] += 10
+    assert sampler.filter(record("Tick %s"))
@@ -0,0 +1,59 @@
+import pytest
+from flask import Flask
+from app import db, question_bank
+from app.models import Candidate, Response
+from app.question_bank import clean_traits, import_questions, select_question, uncertainty
+
+QUESTIONS = [
+    {"text": "Tell me about leading a team.", "topic": "leadership", "traits": {"BigFive": {"Extraversion": 1.0}}},
+    {"text": "Describe taking charge of a crisis.", "topic": "leadership", "traits": {"BigFive": {"Extraversion": 0.9}}},
+    {"text": "How do you plan your week?", "topic": "pressure", "traits": {"BigFive": {"Conscientiousness": 0.6}}},
+]
+
+
+@pytest.fixture
+def app(monkeypatch):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    db.init_app(app)
+    monkeypatch.setattr(question_bank, "cached_profile", lambda candidate_id: {})
+    with app.app_context():
+        db.create_all()
+        import_questions(QUESTIONS)
+        db.session.add(Candidate("Ada", "session-1"))
+        db.session.commit()
+        yield app
+        question_bank.invalidate_bank()
+
+
+def test_clean_traits_drops_unknown_names_and_clamps():
+    traits = {"BigFive": {"Openness": 1.7, "Charisma": 0.5, "Neuroticism": True}, "MBTI": {"Thinking": -0.2}}
+    assert clean_traits(traits) == {"BigFive": {"Openness": 1.0}, "MBTI": {"Thinking": 0.0}}
+    assert clean_traits({"BigFive": {"Charisma": 0.5}}) is None
+    assert clean_traits("Openness") is None
+
+
+def test_uncertainty_treats_missing_traits_as_unknown():
+    values = uncertainty({"BigFive": {"Openness": {"score": 70, "confidence": 0.75}}})
+    assert values.max() == 1.0
+    assert sorted(values)[0] == pytest.approx(0.25)
+
+
+def test_import_skips_duplicates(app):
+    assert import_questions([{**QUESTIONS[0], "text": "  tell me about LEADING a team. "}]) == 0
+
+
+def test_select_prefers_uncertain_traits_and_skips_asked(app):
+    assert select_question(1)["text"] == QUESTIONS[0]["text"]
+
+    db.session.add(Response(candidate_id=1, question=QUESTIONS[0]["text"], answer="..."))
+    db.session.commit()
+    # The crisis question weighs more, but repeats the leadership topic
+    assert select_question(1)["text"] == QUESTIONS[2]["text"]
+
+
+def test_select_returns_none_when_bank_is_exhausted(app):
+    for question in QUESTIONS:
+        db.session.add(Response(candidate_id=1, question=question["text"], answer="..."))
+    db.session.commit()
+    assert select_question(1) is None
@@ -0,0 +1,37 @@
+from app.config import Config
+from app.similarity import bands, blend, estimate_similarity, shingles, signature
+
+ANSWER = "When our team disagreed about the release date, I set up a short call so everyone could explain their concerns."
+
+
+def test_shingles_ignore_case_and_punctuation():
+    assert shingles("Hello, World!", size=5) == shingles("hello   world", size=5)
+
+
+def test_short_answers_have_no_signature():
+    assert signature("Yes.") is None
+    assert len(signature(ANSWER)) == Config.SIMILARITY_PERMUTATIONS
+
+
+def test_signature_is_deterministic():
+    assert (signature(ANSWER) == signature(ANSWER.upper())).all()
+
+
+def test_near_duplicates_score_higher_than_different_answers():
+    edited = ANSWER.replace("short call", "quick call")
+    different = "I prefer working alone on research problems and writing detailed documentation for others."
+    near = estimate_similarity(signature(ANSWER), signature(edited))
+    far = estimate_similarity(signature(ANSWER), signature(different))
+    assert near > 0.5
+    assert far < 0.2
+
+
+def test_identical_answers_share_every_band():
+    assert bands(signature(ANSWER)) == bands(signature(ANSWER + " "))
+    assert len(bands(signature(ANSWER))) == Config.SIMILARITY_BANDS
+
+
+def test_blend_weights_by_similarity():
+    low = {"BigFive": {"Openness": 40}, "MBTI": {"Thinking": 20}}
+    high = {"BigFive": {"Openness": 70}, "MBTI": {"Thinking": 80}}
+    assert blend([(1.0, high), (0.5, low)]) == {"BigFive": {"Openness": 60.0}, "MBTI": {"Thinking": 60.0}}
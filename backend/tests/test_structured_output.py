@@ -0,0 +1,90 @@
+import json
+import pytest
+from app.personality_engine import BIG_FIVE_TRAITS, MBTI_TRAITS, parse_analysis, repair_analysis
+from app.structured_output import coerce_score, extract_json, outermost_object
+
+ANALYSIS = {
+    "BigFive": {trait: 60 for trait in BIG_FIVE_TRAITS},
+    "MBTI": {trait: 50 for trait in MBTI_TRAITS},
+}
+
+
+def test_strict_json_is_reported_as_strict():
+    assert extract_json('{"a": 1}') == ({"a": 1}, True)
+
+
+@pytest.mark.parametrize("reply", [
+    'Here you go:\n```json\n{"a": 1}\n```',
+    'Sure! {"a": 1} Hope that helps.',
+    'Note {this} is {"a": 1}',
+    '{"a": 1,}',
+    "{'a': 1}",
+    '{"a": 1, "b": {"c": 2',
+    '{a: 1}',
+])
+def test_tolerates_formatting_slips(reply):
+    parsed, strict = extract_json(reply)
+    assert parsed["a"] == 1
+    assert not strict
+
+
+def test_python_literals_and_comments():
+    parsed, _ = extract_json('{\n  // flags\n  "ok": True,\n  "missing": None\n}')
+    assert parsed == {"ok": True, "missing": None}
+
+
+def test_accept_skips_objects_of_the_wrong_shape():
+    reply = 'Example: {"x": 1}. Answer: {"questions": ["Why?"]}'
+    parsed, _ = extract_json(reply, accept=lambda obj: isinstance(obj, dict) and "questions" in obj)
+    assert parsed == {"questions": ["Why?"]}
+
+
+def test_no_object_returns_none():
+    assert extract_json("no json here {at all") == (None, False)
+    assert extract_json(None) == (None, False)
+
+
+def test_outermost_object_ignores_braces_in_strings():
+    assert outermost_object('x {"a": "}{", "b": {}} y') == '{"a": "}{", "b": {}}'
+
+
+@pytest.mark.parametrize("value, expected", [
+    (72, 72.0), ("72", 72.0), ("72%", 72.0), ("7/10", 70.0), ({"score": 40}, 40.0), (True, None), ("high", None),
+])
+def test_coerce_score(value, expected):
+    assert coerce_score(value) == expected
+
+
+def test_parse_analysis_outcomes():
+    assert parse_analysis(json.dumps(ANALYSIS)) == (ANALYSIS, "clean")
+    analysis, outcome = parse_analysis("Result: " + json.dumps(ANALYSIS))
+    assert outcome == "repaired" and analysis == ANALYSIS
+    assert parse_analysis("I cannot score this answer.") == (None, "failed")
+
+
+def test_repair_matches_names_and_clamps_scores():
+    data = {
+        "big_five": {trait.lower(): "72%" for trait in BIG_FIVE_TRAITS},
+        "MBTI": {**{trait: 50 for trait in MBTI_TRAITS}, "Thinking": 140},
+    }
+    analysis, changes = repair_analysis(data)
+    assert analysis["BigFive"] == {trait: 72 for trait in BIG_FIVE_TRAITS}
+    assert analysis["MBTI"]["Thinking"] == 100
+    assert changes == len(BIG_FIVE_TRAITS) + 1
+
+
+def test_repair_fills_opposite_mbti_pole():
+    data = json.loads(json.dumps(ANALYSIS))
+    data["MBTI"]["Introversion"] = 30
+    del data["MBTI"]["Extraversion"]
+    analysis, changes = repair_analysis(data)
+    assert analysis["MBTI"]["Extraversion"] == 70
+    assert changes == 1
+
+
+def test_repair_gives_up_when_too_much_is_missing(monkeypatch):
+    from app.config import Config
+
+    monkeypatch.setattr(Config, "ANALYSIS_MAX_FILLED_SCORES", 2)
+    assert repair_analysis({"BigFive": {"Openness": 50}})[0] is None
+    assert repair_analysis(["not", "a", "dict"]) == (None, 0)
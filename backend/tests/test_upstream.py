@@ -0,0 +1,98 @@
+import asyncio
+import pytest
+from app import upstream
+from app.config import Config
+from app.upstream import CircuitBreaker, UpstreamUnavailable
+
+
+class FakeResponse:
+    status_code = 200
+    is_error = False
+
+    async def aclose(self):
+        pass
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    # No shared Redis bucket in tests; an opened breaker goes half-open immediately
+    monkeypatch.setattr(Config, "OPENROUTER_RATE_LIMIT", 0)
+    fresh = CircuitBreaker(threshold=1, cooldown=0, probe_timeout=60)
+    monkeypatch.setattr(upstream, "breaker", fresh)
+    return fresh
+
+
+def test_cancelled_probe_releases_half_open_slot(breaker):
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    async def scenario():
+        async def hang():
+            await asyncio.sleep(3600)
+
+        # The probe is cancelled the way a routing timeout or a losing hedge cancels it
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(upstream.call(hang), 0.01)
+
+        async def ok():
+            return FakeResponse()
+
+        return await upstream.call(ok)
+
+    response = asyncio.run(scenario())
+    assert response.status_code == 200
+    assert breaker.state == "closed"
+
+
+def test_failed_probe_reopens_circuit(breaker):
+    breaker.record_failure()
+
+    async def boom():
+        raise ValueError("unexpected")
+
+    with pytest.raises(ValueError):
+        asyncio.run(upstream.call(boom))
+    assert breaker.state == "open"
+    assert not breaker._probing
+
+
+def test_half_open_retry_after_while_probing():
+    breaker = CircuitBreaker(threshold=1, cooldown=0, probe_timeout=30)
+    breaker.record_failure()
+    assert breaker.allow()
+    assert not breaker.allow()
+    assert 1.0 <= breaker.retry_after() <= 30
+
+
+def test_stuck_probe_is_reclaimed_after_probe_timeout():
+    breaker = CircuitBreaker(threshold=1, cooldown=0, probe_timeout=0)
+    breaker.record_failure()
+    assert breaker.allow()
+    assert breaker.allow()
+
+
+def test_open_circuit_rejects_with_retry_after(monkeypatch):
+    monkeypatch.setattr(Config, "OPENROUTER_RATE_LIMIT", 0)
+    breaker = CircuitBreaker(threshold=1, cooldown=30)
+    monkeypatch.setattr(upstream, "breaker", breaker)
+    breaker.record_failure()
+
+    async def never():
+        raise AssertionError("must not be sent")
+
+    with pytest.raises(UpstreamUnavailable) as excinfo:
+        asyncio.run(upstream.call(never))
+    assert excinfo.value.retry_after > 29
+
+
+def test_open_circuit_propagates_from_analysis(monkeypatch):
+    from app.personality_engine import analyze_response
+
+    monkeypatch.setattr(Config, "OPENROUTER_RATE_LIMIT", 0)
+    breaker = CircuitBreaker(threshold=1, cooldown=30)
+    monkeypatch.setattr(upstream, "breaker", breaker)
+    breaker.record_failure()
+
+    # Routes answer 503 with Retry-After instead of a 200 carrying an analysis error
+    with pytest.raises(UpstreamUnavailable):
+        asyncio.run(analyze_response("I enjoy leading small teams.", reuse=False))
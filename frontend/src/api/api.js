@@ -28,19 +28,41 @@ export const startAssessment = (name, token) => {
     });
 };
 
+const JOB_POLL_INTERVAL_MS = 500;
+const JOB_POLL_ATTEMPTS = 120;
+
+/**
+ * Polls a background job until it finishes.
+ * @param {string} statusUrl - Path returned by the backend, e.g. /jobs/<id>
+ * @returns {Promise} Resolves with the finished job, rejects if it failed or timed out
+ */
+const waitForJob = async (statusUrl) => {
+    for (let attempt = 0; attempt < JOB_POLL_ATTEMPTS; attempt++) {
+        const res = await axios.get(`${API_URL}${statusUrl}`);
+        if (res.data.status === 'done') return res.data;
+        if (res.data.status === 'failed') throw new Error(res.data.error || 'Job failed');
+        await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+    }
+    throw new Error('Timed out waiting for job');
+};
+
 /**
  * Submits a response to a question in an assessment session.
+ * Scoring runs as a background job; this waits for it and resolves with { data: { analysis } }.
  * @param {string} sessionId
  * @param {string} question
  * @param {string} answer
  * @param {string} token
  * @returns {Promise}
  */
-export const submitResponse = (sessionId, question, answer, token) => {
+export const submitResponse = async (sessionId, question, answer, token) => {
     console.log('Submitting response:', { sessionId, question, answer });
-    return axios.post(`${API_URL}/submit`, { session_id: sessionId, question, answer }, {
+    const res = await axios.post(`${API_URL}/submit`, { session_id: sessionId, question, answer }, {
         headers: { Authorization: `Bearer ${token}` }
     });
+    if (res.status !== 202) return res;
+    const job = await waitForJob(res.data.status_url);
+    return { ...res, data: job.result };
 };
 
 /**